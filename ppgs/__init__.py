@@ -22,13 +22,37 @@ from .config.static import *
 
 from .phonemes import *
 from .core import *
+from .stream import Stream
+from .sparse import SparsePPG
 from .model import Model
 from .train import loss, train
-from . import data
+from . import cache
+from . import container
 from . import edit
-from . import evaluate
+from . import encoding
 from . import load
+from . import longform
+from . import manifest
 from . import model
 from . import partition
-from . import preprocess
-from . import plot
+from . import pipeline
+from . import precision
+from . import registry
+from . import replica
+from . import serve
+from . import sparse
+
+
+###############################################################################
+# Lazy module imports
+###############################################################################
+
+
+import importlib
+
+
+def __getattr__(name):
+    """Import submodules with heavy dependencies on first access"""
+    if name in ['data', 'evaluate', 'plot', 'preprocess']:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__} has no attribute {name}')
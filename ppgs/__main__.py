@@ -53,6 +53,35 @@ def parse_args():
         action='store_true',
         help='Use legacy (unchunked) inference'
     )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Reuse and store results in the on-disk PPG cache')
+    parser.add_argument(
+        '--manifest_file',
+        type=Path,
+        help='Journal of completed outputs used to resume interrupted runs')
+    parser.add_argument(
+        '--encoding',
+        choices=ppgs.encoding.ENCODINGS,
+        help='Storage encoding of the output files. Defaults to float32.')
+    parser.add_argument(
+        '--container_directory',
+        type=Path,
+        help='Append PPGs to a sharded container keyed by output_files')
+    parser.add_argument(
+        '--replicas',
+        type=int,
+        default=0,
+        help='Number of inference processes that each hold a model copy')
+    parser.add_argument(
+        '--threads',
+        type=int,
+        help='Number of intra-op threads per replica')
+    parser.add_argument(
+        '--quantize',
+        choices=ppgs.model.quantization.QUANTIZATIONS,
+        help='Int8 quantization mode for CPU inference')
     return parser.parse_args()
 
 
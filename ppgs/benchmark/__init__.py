@@ -0,0 +1,12 @@
+from .core import *
+from . import attention
+from . import backend
+from . import encoding
+from . import features
+from . import imports
+from . import packed
+from . import precision
+from . import replica
+from . import serve
+from . import startup
+from . import stream
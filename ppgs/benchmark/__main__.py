@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Per-stage benchmark
+###############################################################################
+
+
+def main(output_file=None, **kwargs):
+    """Benchmark each stage of inference"""
+    ppgs.benchmark.save(ppgs.benchmark.stages(**kwargs), output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark each stage of PPG inference on synthetic audio')
+    parser.add_argument(
+        '--durations',
+        nargs='+',
+        type=float,
+        default=[1., 10., 60.],
+        help='Utterance lengths in seconds')
+    parser.add_argument(
+        '--batch_sizes',
+        nargs='+',
+        type=int,
+        default=[1, 8],
+        help='Numbers of utterances per batch')
+    parser.add_argument(
+        '--threads',
+        nargs='+',
+        type=int,
+        help='Numbers of intra-op CPU threads. Defaults to the current number.')
+    parser.add_argument(
+        '--legacy_modes',
+        nargs='+',
+        type=int,
+        choices=[0, 1],
+        default=[0, 1],
+        help='Values of legacy_mode used for inference')
+    parser.add_argument(
+        '--representations',
+        nargs='+',
+        choices=ppgs.ALL_REPRESENTATIONS,
+        help='Representations to preprocess and infer')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use. Defaults to CPU.')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=10,
+        help='Number of timed repetitions of each stage')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    args = parser.parse_args()
+    args.legacy_modes = [bool(mode) for mode in args.legacy_modes]
+    return args
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Attention benchmark
+###############################################################################
+
+
+def main(
+    lengths=(500, 1000, 2000, 4000, 8000, 16000),
+    attentions=('full', 'local'),
+    gpu=None,
+    iterations=5,
+    output_file=None):
+    """Benchmark full and local attention"""
+    results = ppgs.benchmark.attention.from_lengths(
+        lengths,
+        attentions,
+        gpu,
+        iterations)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark time and memory of full and local attention')
+    parser.add_argument(
+        '--lengths',
+        type=int,
+        nargs='+',
+        default=[500, 1000, 2000, 4000, 8000, 16000],
+        help='Numbers of frames to infer')
+    parser.add_argument(
+        '--attentions',
+        nargs='+',
+        default=['full', 'local'],
+        choices=['full', 'local'],
+        help='Attention types to benchmark')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=5,
+        help='Number of timed repetitions of each configuration')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,117 @@
+import json
+import subprocess
+import sys
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Time and peak memory of inference in a fresh process, reported as JSON on
+# the last line
+SCRIPT = """
+import json, sys, time
+import torch
+import ppgs
+import ppgs.benchmark
+
+attention, frames, iterations = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+device = torch.device('cpu' if sys.argv[4] == '' else f'cuda:{sys.argv[4]}')
+model = ppgs.model.Transformer(attention=attention).to(device).eval()
+features = torch.randn((1, ppgs.NUM_MELS, frames), device=device)
+
+# Measure peak memory of the first inference
+baseline = ppgs.benchmark.peak_rss()
+if device.type == 'cuda':
+    torch.cuda.reset_peak_memory_stats(device)
+with torch.inference_mode():
+    model(features)
+if device.type == 'cuda':
+    memory = torch.cuda.max_memory_allocated(device)
+else:
+    memory = ppgs.benchmark.peak_rss() - baseline
+
+times = []
+with torch.inference_mode():
+    for _ in range(iterations):
+        _, elapsed = ppgs.benchmark.timer(model, features)
+        times.append(elapsed)
+
+print(json.dumps({'times': times, 'memory': memory}))
+"""
+
+
+###############################################################################
+# Attention benchmark
+###############################################################################
+
+
+def from_lengths(
+    lengths=(500, 1000, 2000, 4000, 8000, 16000),
+    attentions=('full', 'local'),
+    gpu=None,
+    iterations=5):
+    """Measure inference time and memory against length for each attention
+
+    Each configuration runs in a fresh process so that peak memory is not
+    shared between configurations. Full attention infers inputs longer than
+    the positional encoding in overlapping chunks, while local attention
+    infers them whole. Memory is the peak GPU memory allocated, or on CPU
+    the growth in peak resident set size, during the first inference.
+    Models are randomly initialized with the attention window of
+    ppgs.ATTENTION_WINDOW_SIZE.
+
+    Arguments
+        lengths
+            Numbers of frames to infer
+        attentions
+            Attention types. Each is one of ['full', 'local'].
+        gpu
+            The index of the GPU to use
+        iterations
+            Number of timed repetitions of each configuration
+
+    Returns
+        Dictionary of benchmark results
+    """
+    results = {
+        'environment': ppgs.benchmark.environment(),
+        'window_size': ppgs.ATTENTION_WINDOW_SIZE,
+        'attentions': {}}
+    for attention in attentions:
+        results['attentions'][attention] = []
+        for frames in lengths:
+            result = run(attention, frames, gpu, iterations)
+            seconds = frames * ppgs.HOPSIZE / ppgs.SAMPLE_RATE
+            results['attentions'][attention].append({
+                'frames': frames,
+                'latency': ppgs.benchmark.percentiles(result['times']),
+                'real_time_factor': (
+                    sum(result['times']) / (seconds * iterations)),
+                'memory': result['memory']})
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def run(attention, frames, gpu=None, iterations=5):
+    """Time inference in a fresh process"""
+    output = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            SCRIPT,
+            attention,
+            str(frames),
+            str(iterations),
+            '' if gpu is None else str(gpu)],
+        check=True,
+        capture_output=True,
+        text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Inference backend benchmark
+###############################################################################
+
+
+def main(
+    audio_file=None,
+    duration=30.,
+    backends=ppgs.model.backend.BACKENDS,
+    checkpoint=None,
+    iterations=10,
+    output_file=None):
+    """Benchmark inference backends"""
+    if audio_file is None:
+        audio = ppgs.benchmark.audio(duration)
+    else:
+        audio = ppgs.load.audio(audio_file)[None]
+    results = ppgs.benchmark.backend.from_audio(
+        audio,
+        backends,
+        checkpoint,
+        iterations)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark compiled and exported inference backends')
+    parser.add_argument(
+        '--audio_file',
+        type=Path,
+        help='Audio file to infer. Defaults to synthetic audio.')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=30.,
+        help='Duration in seconds of synthetic audio')
+    parser.add_argument(
+        '--backends',
+        nargs='+',
+        default=ppgs.model.backend.BACKENDS,
+        choices=ppgs.model.backend.BACKENDS,
+        help='The backends to benchmark')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=10,
+        help='Number of timed inferences per backend')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
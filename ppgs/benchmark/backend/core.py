@@ -0,0 +1,101 @@
+import torch
+import torchutil
+
+import ppgs
+
+
+###############################################################################
+# Inference backend benchmark
+###############################################################################
+
+
+def from_audio(
+    audio,
+    backends=ppgs.model.backend.BACKENDS,
+    checkpoint=None,
+    iterations=10):
+    """Compare throughput and parity of inference backends
+
+    Parity is measured against default eager inference, which infers inputs
+    of up to the maximum length of the model without chunking. Parity with
+    eager chunked inference, which infers the same chunks as the compiled
+    backends, separates numerical error from the effect of chunking.
+
+    Arguments
+        audio
+            Audio at ppgs.SAMPLE_RATE
+            shape=(1, 1, samples)
+        backends
+            Backends to benchmark. See ppgs.model.backend.BACKENDS.
+        checkpoint
+            The checkpoint file
+        iterations
+            Number of timed inferences per backend
+
+    Returns
+        Dictionary of benchmark results
+    """
+    features = ppgs.preprocess.from_audio(audio, representation='mel')
+    features = features.to(torch.float32)
+    lengths = torch.tensor([features.shape[-1]], dtype=torch.long)
+    results = {'frames': features.shape[-1], 'threads': torch.get_num_threads()}
+
+    # References
+    reference = infer(features, lengths, checkpoint, 'eager').to(
+        torch.float32)
+    model = ppgs.load.model(checkpoint, 'mel', backend='eager')
+    with torchutil.inference.context(model):
+        chunked = torch.softmax(
+            model.chunked(features, lengths).to(torch.float32),
+            dim=1)
+
+    for backend in backends:
+
+        # Compile and warm up
+        try:
+            ppg, elapsed = ppgs.benchmark.timer(
+                infer,
+                features,
+                lengths,
+                checkpoint,
+                backend)
+        except ImportError as error:
+            results[backend] = {'error': str(error)}
+            continue
+        result = {'compile_seconds': elapsed}
+
+        # Throughput
+        times = [
+            ppgs.benchmark.timer(infer, features, lengths, checkpoint, backend)[1]
+            for _ in range(iterations)]
+        result['latency'] = ppgs.benchmark.percentiles(times)
+        result['frames_per_second'] = \
+            features.shape[-1] * iterations / sum(times)
+
+        # Parity
+        ppg = ppg.to(torch.float32)
+        result['max_absolute_error'] = (ppg - reference).abs().max().item()
+        result['argmax_agreement'] = (
+            ppg.argmax(dim=1) == reference.argmax(dim=1)
+        ).float().mean().item()
+        result['chunked_max_absolute_error'] = \
+            (ppg - chunked).abs().max().item()
+
+        results[backend] = result
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def infer(features, lengths, checkpoint, backend):
+    """Infer PPGs with a backend"""
+    return ppgs.infer(
+        features,
+        lengths,
+        representation='mel',
+        checkpoint=checkpoint,
+        backend=backend)
@@ -0,0 +1,374 @@
+import importlib.metadata
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+import torchaudio
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Sample rate of audio that is resampled by the resampling stage
+RESAMPLE_RATE = 44100
+
+# Times the stages of one configuration in a fresh process, reported as JSON
+# on the last line
+SCRIPT = """
+import json, sys
+import ppgs
+import ppgs.benchmark
+
+print(json.dumps(ppgs.benchmark.configuration(**json.loads(sys.argv[1]))))
+"""
+
+
+###############################################################################
+# Per-stage benchmark
+###############################################################################
+
+
+def stages(
+    durations=(1., 10., 60.),
+    batch_sizes=(1, 8),
+    threads=None,
+    legacy_modes=(False, True),
+    representations=None,
+    checkpoint=None,
+    gpu=None,
+    iterations=10):
+    """Time each stage of inference on synthetic audio
+
+    Stages are ppgs.load.audio, ppgs.resample, the from_audios function of
+    each representation, ppgs.infer for each legacy mode, and
+    ppgs.preprocess.save_masked. Each stage is warmed up once and then timed
+    for a number of iterations. Each configuration runs in a fresh process,
+    so its peak resident set size does not include other configurations.
+
+    Arguments
+        durations
+            Utterance lengths in seconds
+        batch_sizes
+            Numbers of utterances per batch
+        threads
+            Numbers of intra-op CPU threads. Defaults to the current number.
+        legacy_modes
+            Values of legacy_mode used for inference
+        representations
+            Representations to preprocess and infer.
+            Defaults to [ppgs.REPRESENTATION].
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use
+        iterations
+            Number of timed repetitions of each stage
+
+    Returns
+        Dictionary of benchmark results
+    """
+    if threads is None:
+        threads = [torch.get_num_threads()]
+    if representations is None:
+        representations = [ppgs.REPRESENTATION]
+
+    results = {'environment': environment(), 'configurations': []}
+    for duration, batch_size, num_threads in itertools.product(
+        durations,
+        batch_sizes,
+        threads
+    ):
+        output = subprocess.run(
+            [
+                sys.executable,
+                '-c',
+                SCRIPT,
+                json.dumps({
+                    'duration': duration,
+                    'batch_size': batch_size,
+                    'num_threads': num_threads,
+                    'legacy_modes': list(legacy_modes),
+                    'representations': list(representations),
+                    'checkpoint':
+                        None if checkpoint is None else str(checkpoint),
+                    'gpu': gpu,
+                    'iterations': iterations})],
+            check=True,
+            capture_output=True,
+            text=True).stdout
+        results['configurations'].append(
+            json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def configuration(
+    duration,
+    batch_size,
+    num_threads,
+    legacy_modes=(False, True),
+    representations=None,
+    checkpoint=None,
+    gpu=None,
+    iterations=10):
+    """Time each stage of inference for one configuration
+
+    Arguments
+        duration
+            Utterance length in seconds
+        batch_size
+            Number of utterances per batch
+        num_threads
+            Number of intra-op CPU threads
+        legacy_modes
+            Values of legacy_mode used for inference
+        representations
+            Representations to preprocess and infer.
+            Defaults to [ppgs.REPRESENTATION].
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use
+        iterations
+            Number of timed repetitions of each stage
+
+    Returns
+        Dictionary of stage timings and the peak resident set size of the
+        process
+    """
+    if representations is None:
+        representations = [ppgs.REPRESENTATION]
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+    default_threads = torch.get_num_threads()
+
+    torch.set_num_threads(num_threads)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            result = {
+                'duration': duration,
+                'batch_size': batch_size,
+                'threads': num_threads,
+                'stages': {}}
+            seconds = duration * batch_size
+
+            # Synthetic audio
+            audio = ppgs.benchmark.audio(duration, batch_size)
+            lengths = torch.full(
+                (batch_size,),
+                audio.shape[-1],
+                dtype=torch.long)
+            file = directory / 'audio.wav'
+            torchaudio.save(file, audio[0], ppgs.SAMPLE_RATE)
+
+            # Load
+            _, times = repeat(ppgs.load.audio, iterations, file)
+            result['stages']['load'] = summarize(times, duration)
+
+            # Resample
+            original = ppgs.resample(
+                audio,
+                ppgs.SAMPLE_RATE,
+                RESAMPLE_RATE)
+            _, times = repeat(
+                ppgs.resample,
+                iterations,
+                original,
+                RESAMPLE_RATE)
+            result['stages']['resample'] = summarize(times, seconds)
+
+            ppg = None
+            for representation in representations:
+
+                # Preprocess
+                with torch.inference_mode():
+                    features, times = repeat(
+                        getattr(
+                            ppgs.preprocess,
+                            representation
+                        ).from_audios,
+                        iterations,
+                        audio.to(device),
+                        lengths.to(device),
+                        gpu=gpu)
+                result['stages'][f'preprocess-{representation}'] = \
+                    summarize(times, seconds)
+
+                # Infer
+                frame_lengths = lengths // ppgs.HOPSIZE
+                for legacy_mode in legacy_modes:
+                    name = f'infer-{representation}' + (
+                        '-legacy' if legacy_mode else '')
+                    try:
+                        ppg, times = repeat(
+                            ppgs.infer,
+                            iterations,
+                            features.to(device),
+                            frame_lengths.to(device),
+                            representation=representation,
+                            checkpoint=checkpoint,
+                            legacy_mode=legacy_mode)
+                    except ValueError as error:
+                        result['stages'][name] = {'error': str(error)}
+                        continue
+                    result['stages'][name] = summarize(times, seconds)
+
+            # Save
+            if ppg is not None:
+                _, times = repeat(
+                    save_masked,
+                    iterations,
+                    ppg.cpu(),
+                    frame_lengths,
+                    directory)
+                result['stages']['save'] = summarize(times, seconds)
+
+            result['peak_rss'] = peak_rss()
+            return result
+
+    finally:
+        torch.set_num_threads(default_threads)
+
+
+###############################################################################
+# Benchmarking utilities
+###############################################################################
+
+
+def audio(duration, batch_size=1, sample_rate=ppgs.SAMPLE_RATE):
+    """Create deterministic synthetic audio so no dataset is required
+
+    Arguments
+        duration
+            Length of the audio in seconds
+        batch_size
+            Number of waveforms to generate
+        sample_rate
+            Audio sampling rate
+
+    Returns
+        audio
+            Synthetic audio
+            shape=(batch_size, 1, samples)
+    """
+    generator = torch.Generator().manual_seed(ppgs.RANDOM_SEED)
+    samples = int(duration * sample_rate)
+    times = torch.arange(samples, dtype=torch.float) / sample_rate
+
+    # Amplitude-modulated harmonic tone with a noise floor
+    frequency = 100. + 100. * torch.rand(
+        (batch_size, 1, 1),
+        generator=generator)
+    harmonics = torch.arange(1, 9, dtype=torch.float)[None, :, None]
+    tone = torch.sin(
+        2 * torch.pi * frequency * harmonics * times) / harmonics
+    envelope = .5 + .5 * torch.sin(2 * torch.pi * 4. * times)
+    noise = .01 * torch.randn(
+        (batch_size, 1, samples),
+        generator=generator)
+    return .1 * envelope * tone.sum(dim=1, keepdim=True) + noise
+
+
+def environment():
+    """Describe the software and hardware being benchmarked"""
+    try:
+        version = importlib.metadata.version('ppgs')
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+    return {
+        'ppgs': version,
+        'torch': torch.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': ppgs.CONFIG}
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes and macOS reports bytes
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def percentiles(times, quantiles=(.5, .99)):
+    """Summarize a list of durations in seconds"""
+    times = torch.tensor(times, dtype=torch.float64)
+    return {
+        f'p{int(100 * q)}': torch.quantile(times, q).item()
+        for q in quantiles}
+
+
+def repeat(fn, iterations, *args, **kwargs):
+    """Warm up and then time repeated calls to a function
+
+    Returns
+        The last output and a list of elapsed seconds
+    """
+    output = fn(*args, **kwargs)
+    times = []
+    for _ in range(iterations):
+        output, elapsed = timer(fn, *args, **kwargs)
+        times.append(elapsed)
+    return output, times
+
+
+def save(results, file=None):
+    """Print results as JSON and maybe save to disk"""
+    print(json.dumps(results, indent=4))
+    if file is not None:
+        with open(file, 'w') as file:
+            json.dump(results, file, indent=4)
+
+
+def save_masked(ppg, lengths, directory):
+    """Save each PPG in a batch"""
+    for i, (item, length) in enumerate(zip(ppg, lengths)):
+        ppgs.preprocess.save_masked(item, Path(directory) / f'{i}.pt', length)
+
+
+def summarize(times, seconds):
+    """Summarize stage timings for a given duration of audio
+
+    Arguments
+        times
+            Elapsed seconds of each repetition
+        seconds
+            Seconds of audio processed by each repetition
+
+    Returns
+        Dictionary of latency percentiles, throughput in seconds of audio
+        per second, and real-time factor
+    """
+    total = sum(times)
+    return {
+        'latency': percentiles(times),
+        'throughput': seconds * len(times) / total,
+        'real_time_factor': total / (seconds * len(times))}
+
+
+def timer(fn, *args, **kwargs):
+    """Time a function call, returning output and elapsed seconds"""
+    start = time.perf_counter()
+    output = fn(*args, **kwargs)
+
+    # Wait for asynchronous GPU work
+    if torch.cuda.is_available() and torch.cuda.is_initialized():
+        torch.cuda.synchronize()
+
+    return output, time.perf_counter() - start
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Storage encoding benchmark
+###############################################################################
+
+
+def main(
+    files=None,
+    encodings=ppgs.encoding.ENCODINGS,
+    duration=10.,
+    checkpoint=None,
+    gpu=None,
+    output_file=None):
+    """Benchmark the size and reconstruction error of storage encodings"""
+    results = ppgs.benchmark.encoding.from_files(
+        files,
+        encodings,
+        duration,
+        checkpoint,
+        gpu)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark the size and reconstruction error of '
+                    'storage encodings')
+    parser.add_argument(
+        '--files',
+        type=Path,
+        nargs='+',
+        help='PPG files to encode. Defaults to PPGs of synthetic audio.')
+    parser.add_argument(
+        '--encodings',
+        nargs='+',
+        default=ppgs.encoding.ENCODINGS,
+        choices=ppgs.encoding.ENCODINGS,
+        help='Encodings to benchmark')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=10.,
+        help='Length of the synthetic audio in seconds')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,88 @@
+import tempfile
+from pathlib import Path
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Storage encoding benchmark
+###############################################################################
+
+
+def from_files(
+    files=None,
+    encodings=ppgs.encoding.ENCODINGS,
+    duration=10.,
+    checkpoint=None,
+    gpu=None):
+    """Measure the size and reconstruction error of each storage encoding
+
+    Arguments
+        files
+            PPG files to encode (e.g., the outputs of python -m ppgs). If
+            None, PPGs are inferred from synthetic audio with the checkpoint.
+        encodings
+            Encodings to benchmark. Each is one of ppgs.encoding.ENCODINGS.
+        duration
+            Length of the synthetic audio in seconds if files is None
+        checkpoint
+            The checkpoint file used if files is None
+        gpu
+            The index of the GPU to use if files is None
+
+    Returns
+        Dictionary of benchmark results
+    """
+    # Load or infer PPGs
+    if files is None:
+        device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+        audio = ppgs.benchmark.audio(duration).to(device)
+        ppg = ppgs.from_audio(
+            audio[0],
+            ppgs.SAMPLE_RATE,
+            checkpoint=checkpoint,
+            gpu=gpu)
+        ppgs_ = [ppg[0].cpu()]
+    else:
+        ppgs_ = [ppgs.load.ppg(file) for file in files]
+    ppgs_ = [ppg.to(torch.float32) for ppg in ppgs_]
+    frames = sum(ppg.shape[-1] for ppg in ppgs_)
+    seconds = frames * ppgs.HOPSIZE / ppgs.SAMPLE_RATE
+
+    results = {
+        'environment': ppgs.benchmark.environment(),
+        'files': len(ppgs_),
+        'seconds': seconds,
+        'encodings': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for encoding in encodings:
+            nbytes, errors, agreement = 0, [], 0
+            for i, ppg in enumerate(ppgs_):
+
+                # Encode and save
+                file = Path(directory) / f'{encoding}-{i}.pt'
+                ppgs.preprocess.save_masked(
+                    ppg,
+                    file,
+                    ppg.shape[-1],
+                    encoding)
+                nbytes += file.stat().st_size
+
+                # Load and decode
+                decoded = ppgs.load.ppg(file)
+                errors.append((decoded - ppg).abs().flatten())
+                agreement += (
+                    decoded.argmax(dim=0) == ppg.argmax(dim=0)
+                ).sum().item()
+
+            errors = torch.cat(errors)
+            results['encodings'][encoding] = {
+                'bytes': nbytes,
+                'bytes_per_second': nbytes / seconds,
+                'max_abs_error': errors.max().item(),
+                'mean_abs_error': errors.mean().item(),
+                'argmax_agreement': agreement / frames}
+
+    return results
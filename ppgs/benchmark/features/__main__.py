@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Feature extraction benchmark
+###############################################################################
+
+
+def main(
+    durations=(1., 10., 60.),
+    batch_sizes=(1, 8),
+    gpu=None,
+    iterations=10,
+    output_file=None):
+    """Benchmark mel extraction"""
+    results = ppgs.benchmark.features.from_configurations(
+        durations,
+        batch_sizes,
+        gpu,
+        iterations)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark cached, fused mel extraction')
+    parser.add_argument(
+        '--durations',
+        type=float,
+        nargs='+',
+        default=[1., 10., 60.],
+        help='Longest utterance length in seconds')
+    parser.add_argument(
+        '--batch_sizes',
+        type=int,
+        nargs='+',
+        default=[1, 8],
+        help='Numbers of utterances per batch')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=10,
+        help='Number of timed repetitions of each path')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,146 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Feature extraction benchmark
+###############################################################################
+
+
+def from_configurations(
+    durations=(1., 10., 60.),
+    batch_sizes=(1, 8),
+    gpu=None,
+    iterations=10):
+    """Compare cached, fused mel extraction with the previous path
+
+    The previous path is the implementation of ppgs.preprocess.mel.from_audios
+    that ppgs.preprocess.features replaces (see reference). It computes every
+    item to the length of the longest one and rebuilds the mel basis on every
+    call. Items of a batch have lengths spread evenly between half of and the
+    full duration.
+
+    Arguments
+        durations
+            Longest utterance length in seconds
+        batch_sizes
+            Numbers of utterances per batch
+        gpu
+            The index of the GPU to use
+        iterations
+            Number of timed repetitions of each path
+
+    Returns
+        Dictionary of benchmark results
+    """
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+    results = {
+        'environment': ppgs.benchmark.environment(),
+        'configurations': []}
+    for duration in durations:
+        for batch_size in batch_sizes:
+            audio = ppgs.benchmark.audio(duration, batch_size).to(device)
+            lengths = torch.linspace(
+                audio.shape[-1] // 2,
+                audio.shape[-1],
+                batch_size
+            ).to(torch.long).flip(0).to(device)
+            seconds = lengths.sum().item() / ppgs.SAMPLE_RATE
+
+            # Previous path
+            with torch.inference_mode():
+                previous, times = ppgs.benchmark.repeat(
+                    reference,
+                    iterations,
+                    audio,
+                    lengths)
+            result = {
+                'duration': duration,
+                'batch_size': batch_size,
+                'previous': ppgs.benchmark.summarize(times, seconds)}
+
+            # Cached, fused path
+            with torch.inference_mode():
+                fused, times = ppgs.benchmark.repeat(
+                    ppgs.preprocess.features.from_audios,
+                    iterations,
+                    audio,
+                    lengths)
+            result['fused'] = ppgs.benchmark.summarize(times, seconds)
+            result['speedup'] = (
+                result['previous']['latency']['p50'] /
+                result['fused']['latency']['p50'])
+
+            # Parity on frames that do not overlap padding, where the
+            # previous path reads zeros instead of reflecting the audio
+            result['max_abs_error'] = max(
+                (
+                    previous[i, :, :frames] - fused[i, :, :frames]
+                ).abs().max().item()
+                for i, frames in enumerate((
+                    (lengths - ppgs.NUM_FFT + ppgs.preprocess.features.PADDING)
+                    // ppgs.HOPSIZE + 1).tolist()))
+
+            results['configurations'].append(result)
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def reference(audio, lengths):
+    """Compute mels with the implementation replaced by
+    ppgs.preprocess.features
+
+    Copied from ppgs.preprocess.spectrogram.from_audios and
+    ppgs.preprocess.mel.linear_to_mel as they were before. The STFT window
+    was cached, but the cache of the mel basis was never hit, so the basis
+    was rebuilt on every call.
+    """
+    import librosa
+
+    if (
+        not hasattr(reference, 'window') or
+        reference.dtype != audio.dtype or
+        reference.device != audio.device
+    ):
+        reference.window = torch.hann_window(
+            ppgs.WINDOW_SIZE,
+            dtype=audio.dtype,
+            device=audio.device)
+        reference.dtype = audio.dtype
+        reference.device = audio.device
+
+    # Pad audio
+    size = (ppgs.NUM_FFT - ppgs.HOPSIZE) // 2
+    audio = torch.nn.functional.pad(audio, (size, size), mode='reflect')
+
+    # Compute stft
+    stft = torch.stft(
+        audio.squeeze(1),
+        ppgs.NUM_FFT,
+        hop_length=ppgs.HOPSIZE,
+        window=reference.window,
+        center=False,
+        normalized=False,
+        onesided=True,
+        return_complex=True)
+    stft = torch.view_as_real(stft)
+
+    # Compute magnitude
+    spectrogram = torch.sqrt(stft.pow(2).sum(-1) + 1e-6).to(torch.float16)
+
+    # Create mel basis
+    basis = torch.from_numpy(librosa.filters.mel(
+        sr=ppgs.SAMPLE_RATE,
+        n_fft=ppgs.NUM_FFT,
+        n_mels=ppgs.NUM_MELS)).to(spectrogram.device)
+
+    # Convert to mels and apply dynamic range compression
+    melspectrogram = torch.matmul(basis, spectrogram.to(torch.float))
+    return torch.log(torch.clamp(melspectrogram, min=1e-5)).to(
+        torch.float16)
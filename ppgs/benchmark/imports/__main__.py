@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Import-time benchmark
+###############################################################################
+
+
+def main(iterations=5, checkpoint=None, duration=4., output_file=None):
+    """Benchmark import and CLI startup time"""
+    results = ppgs.benchmark.imports.from_commands(
+        iterations,
+        checkpoint,
+        duration)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark import ppgs and single-file CLI startup time')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=5,
+        help='Number of timed runs of each command')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file used for CLI inference')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=4.,
+        help='Duration in seconds of the audio file for CLI inference')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,109 @@
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import torchaudio
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Third-party packages that ppgs only needs for some workflows
+HEAVY_MODULES = [
+    'cv2',
+    'espnet',
+    'librosa',
+    'matplotlib',
+    'moviepy',
+    'transformers']
+
+
+###############################################################################
+# Import-time benchmark
+###############################################################################
+
+
+def from_commands(iterations=5, checkpoint=None, duration=4.):
+    """Measure the startup cost of importing ppgs and of CLI inference
+
+    Each measurement runs in a fresh Python process.
+
+    Arguments
+        iterations
+            Number of timed runs of each command
+        checkpoint
+            The checkpoint file used for CLI inference
+        duration
+            Duration in seconds of the synthetic audio file for CLI inference
+
+    Returns
+        Dictionary of benchmark results
+    """
+    results = {'environment': ppgs.benchmark.environment()}
+
+    # Import
+    times = [
+        run([sys.executable, '-c', 'import ppgs'])
+        for _ in range(iterations)]
+    results['import'] = {
+        'seconds': ppgs.benchmark.percentiles(times),
+        'heavy_modules': heavy_modules()}
+
+    # Single-file CLI inference
+    with tempfile.TemporaryDirectory() as directory:
+        audio_file = Path(directory) / 'audio.wav'
+        torchaudio.save(
+            audio_file,
+            ppgs.benchmark.audio(duration)[0],
+            ppgs.SAMPLE_RATE)
+        command = [
+            sys.executable,
+            '-m',
+            'ppgs',
+            '--audio_files',
+            str(audio_file),
+            '--output_files',
+            str(Path(directory) / 'audio.pt')]
+        if checkpoint is not None:
+            command += ['--checkpoint', str(checkpoint)]
+        times = [run(command) for _ in range(iterations)]
+    results['cli'] = {
+        'duration': duration,
+        'seconds': ppgs.benchmark.percentiles(times)}
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def heavy_modules():
+    """Get the heavy third-party packages loaded by import ppgs"""
+    output = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            'import json, sys, ppgs; '
+            'print(json.dumps(sorted({m.split(".")[0] for m in sys.modules})))'
+        ],
+        check=True,
+        capture_output=True,
+        text=True).stdout
+    loaded = json.loads(output.strip().splitlines()[-1])
+    return [module for module in HEAVY_MODULES if module in loaded]
+
+
+def run(command):
+    """Time a command in a fresh process"""
+    start = time.perf_counter()
+    subprocess.run(command, check=True, capture_output=True)
+    return time.perf_counter() - start
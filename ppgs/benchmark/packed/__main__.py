@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Packed inference benchmark
+###############################################################################
+
+
+def main(
+    batch_sizes=(8, 32),
+    median=4.,
+    sigma=.6,
+    batches=10,
+    checkpoint=None,
+    gpu=None,
+    output_file=None):
+    """Benchmark packed and padded batched inference"""
+    results = ppgs.benchmark.packed.from_distribution(
+        batch_sizes,
+        median,
+        sigma,
+        batches,
+        checkpoint,
+        gpu)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark packed and padded batched inference')
+    parser.add_argument(
+        '--batch_sizes',
+        type=int,
+        nargs='+',
+        default=[8, 32],
+        help='Numbers of utterances per batch')
+    parser.add_argument(
+        '--median',
+        type=float,
+        default=4.,
+        help='Median utterance duration in seconds')
+    parser.add_argument(
+        '--sigma',
+        type=float,
+        default=.6,
+        help='Standard deviation of the log of utterance durations')
+    parser.add_argument(
+        '--batches',
+        type=int,
+        default=10,
+        help='Number of random batches of each batch size')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,160 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Packed inference benchmark
+###############################################################################
+
+
+def from_distribution(
+    batch_sizes=(8, 32),
+    median=4.,
+    sigma=.6,
+    batches=10,
+    checkpoint=None,
+    gpu=None):
+    """Compare packed and padded batched inference
+
+    Utterance durations are drawn from a log-normal distribution, which
+    approximates the skewed lengths of speech datasets, and are clipped to
+    the length inferred without chunking.
+
+    Arguments
+        batch_sizes
+            Numbers of utterances per batch
+        median
+            Median utterance duration in seconds
+        sigma
+            Standard deviation of the log of utterance durations
+        batches
+            Number of random batches of each batch size
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use
+
+    Returns
+        Dictionary of benchmark results
+    """
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+    generator = torch.Generator().manual_seed(ppgs.RANDOM_SEED)
+    model = ppgs.cached_model(device, 'mel', checkpoint)
+    frames_per_second = ppgs.SAMPLE_RATE / ppgs.HOPSIZE
+
+    results = {
+        'environment': ppgs.benchmark.environment(),
+        'median': median,
+        'sigma': sigma,
+        'configurations': []}
+    for batch_size in batch_sizes:
+
+        # Sample batches of features
+        inputs = []
+        for _ in range(batches):
+            seconds = torch.exp(
+                torch.log(torch.tensor(median)) +
+                sigma * torch.randn((batch_size,), generator=generator))
+            lengths = (seconds * frames_per_second).to(torch.long).clamp(
+                min=1,
+                max=model.max_len)
+            features = torch.randn(
+                (batch_size, ppgs.NUM_MELS, int(lengths.max())),
+                generator=generator)
+            features *= ppgs.model.transformer.mask_from_lengths(lengths)[
+                :, None]
+            inputs.append((features.to(device), lengths.to(device)))
+
+        # Time padded and packed inference
+        result = {'batch_size': batch_size}
+        outputs = {}
+        for mode, packed in [('padded', False), ('packed', True)]:
+            previous = ppgs.PACKED_INFERENCE
+            ppgs.PACKED_INFERENCE = packed
+            try:
+                times, outputs[mode] = [], []
+                for features, lengths in inputs:
+                    output, times_ = ppgs.benchmark.repeat(
+                        ppgs.infer,
+                        1,
+                        features,
+                        lengths,
+                        checkpoint=checkpoint)
+                    times += times_
+                    outputs[mode].append(output)
+            finally:
+                ppgs.PACKED_INFERENCE = previous
+            result[mode] = {
+                'latency': ppgs.benchmark.percentiles(times),
+                'seconds': sum(times),
+                'flops': sum(
+                    flops(model, lengths, not packed)
+                    for _, lengths in inputs)}
+
+        # Savings
+        valid = sum(int(lengths.sum()) for _, lengths in inputs)
+        padded = sum(
+            lengths.numel() * int(lengths.max()) for _, lengths in inputs)
+        result['padding_fraction'] = 1. - valid / padded
+        result['flops_saved'] = (
+            1. - result['packed']['flops'] / result['padded']['flops'])
+        result['speedup'] = (
+            result['padded']['seconds'] / result['packed']['seconds'])
+
+        # Parity on frames away from the convolution receptive field of
+        # padding, where padded inference sees transformer outputs of padding
+        edge = 2 * (model.kernel_size // 2)
+        result['max_abs_error'] = max(
+            (
+                padded[i, :, :max(0, length - edge)] -
+                packed[i, :, :max(0, length - edge)]
+            ).abs().max().item()
+            for padded, packed, (_, lengths) in zip(
+                outputs['padded'],
+                outputs['packed'],
+                inputs)
+            for i, length in enumerate(lengths.tolist()))
+
+        results['configurations'].append(result)
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def flops(model, lengths, padded=True):
+    """Count multiply-accumulate operations times two of a forward pass
+
+    Arguments
+        model
+            ppgs.model.Transformer
+        lengths
+            Number of valid frames of each item
+            shape=(batch,)
+        padded
+            Whether every item is computed to the longest length
+
+    Returns
+        Number of floating-point operations
+    """
+    if padded:
+        lengths = torch.full_like(lengths, int(lengths.max()))
+    lengths = lengths.to(torch.float64)
+    frames, squared = lengths.sum().item(), (lengths ** 2).sum().item()
+
+    # Convolutions
+    hidden = model.model.layers[0].linear1.in_features
+    total = 2 * frames * model.kernel_size * hidden * (
+        model.input_channels + len(ppgs.PHONEMES))
+
+    # Transformer layers
+    for layer in model.model.layers:
+        feedforward = layer.linear1.out_features
+        total += 2 * frames * (4 * hidden ** 2 + 2 * hidden * feedforward)
+        total += 4 * squared * hidden
+
+    return total
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Precision benchmark
+###############################################################################
+
+
+def main(
+    precisions=ppgs.precision.PRECISIONS,
+    duration=10.,
+    batch_size=1,
+    checkpoint=None,
+    gpu=None,
+    iterations=10,
+    output_file=None):
+    """Benchmark preprocessing and inference at each precision"""
+    results = ppgs.benchmark.precision.from_precisions(
+        precisions,
+        duration,
+        batch_size,
+        checkpoint,
+        gpu,
+        iterations)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark preprocessing and inference at each precision')
+    parser.add_argument(
+        '--precisions',
+        nargs='+',
+        default=ppgs.precision.PRECISIONS,
+        choices=ppgs.precision.PRECISIONS,
+        help='Precisions to benchmark')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=10.,
+        help='Length of each utterance in seconds')
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=1,
+        help='Number of utterances per batch')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=10,
+        help='Number of timed repetitions of each stage')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,109 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Precision benchmark
+###############################################################################
+
+
+def from_precisions(
+    precisions=ppgs.precision.PRECISIONS,
+    duration=10.,
+    batch_size=1,
+    checkpoint=None,
+    gpu=None,
+    iterations=10):
+    """Compare preprocessing and inference at each precision
+
+    Each precision is applied to the device for the duration of its run.
+    PPGs are compared with those inferred at float32.
+
+    Arguments
+        precisions
+            Precisions to benchmark. Each is one of ppgs.precision.PRECISIONS.
+        duration
+            Length of each utterance in seconds
+        batch_size
+            Number of utterances per batch
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use
+        iterations
+            Number of timed repetitions of each stage
+
+    Returns
+        Dictionary of benchmark results
+    """
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+    audio = ppgs.benchmark.audio(duration, batch_size).to(device)
+    lengths = torch.full(
+        (batch_size,),
+        audio.shape[-1],
+        dtype=torch.long,
+        device=device)
+    frame_lengths = lengths // ppgs.HOPSIZE
+    seconds = duration * batch_size
+
+    # Reference PPGs
+    with ppgs.precision.using('float32', device.type):
+        reference = infer(audio, lengths, frame_lengths, checkpoint, gpu)
+
+    results = {
+        'environment': ppgs.benchmark.environment(),
+        'device': str(device),
+        'precisions': {}}
+    for precision in precisions:
+        with ppgs.precision.using(precision, device.type):
+            try:
+
+                # Preprocess
+                with torch.inference_mode():
+                    features, times = ppgs.benchmark.repeat(
+                        ppgs.preprocess.mel.from_audios,
+                        iterations,
+                        audio,
+                        lengths,
+                        gpu=gpu)
+                result = {
+                    'preprocess': ppgs.benchmark.summarize(times, seconds)}
+
+                # Infer
+                ppg, times = ppgs.benchmark.repeat(
+                    ppgs.infer,
+                    iterations,
+                    features,
+                    frame_lengths,
+                    checkpoint=checkpoint)
+                result['infer'] = ppgs.benchmark.summarize(times, seconds)
+
+            except RuntimeError as error:
+                results['precisions'][precision] = {'error': str(error)}
+                continue
+
+        # Compare with float32
+        ppg = ppg.to(torch.float32)
+        result['max_abs_error'] = (ppg - reference).abs().max().item()
+        result['argmax_agreement'] = (
+            ppg.argmax(dim=1) == reference.argmax(dim=1)
+        ).to(torch.float32).mean().item()
+        results['precisions'][precision] = result
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def infer(audio, lengths, frame_lengths, checkpoint=None, gpu=None):
+    """Infer PPGs of a batch of audio under the current precision policy"""
+    with torch.inference_mode():
+        features = ppgs.preprocess.mel.from_audios(audio, lengths, gpu=gpu)
+    return ppgs.infer(
+        features,
+        frame_lengths,
+        checkpoint=checkpoint).to(torch.float32)
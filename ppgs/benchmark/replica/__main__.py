@@ -0,0 +1,92 @@
+import tempfile
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Multi-replica scaling benchmark
+###############################################################################
+
+
+def main(
+    audio_files=None,
+    files=64,
+    duration=10.,
+    replicas=None,
+    threads=None,
+    checkpoint=None,
+    max_frames=ppgs.MAX_INFERENCE_FRAMES,
+    num_workers=0,
+    output_file=None):
+    """Benchmark inference throughput for replica and thread counts"""
+    configurations = ppgs.benchmark.replica.grid(replicas, threads)
+    with tempfile.TemporaryDirectory() as directory:
+        if audio_files is None:
+            audio_files = ppgs.benchmark.replica.synthetic(
+                directory,
+                files,
+                duration)
+        results = ppgs.benchmark.replica.from_files(
+            audio_files,
+            configurations,
+            checkpoint,
+            max_frames,
+            num_workers)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark multi-replica CPU inference')
+    parser.add_argument(
+        '--audio_files',
+        nargs='+',
+        type=Path,
+        help='Audio files to infer. Defaults to synthetic audio.')
+    parser.add_argument(
+        '--files',
+        type=int,
+        default=64,
+        help='Number of synthetic audio files')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=10.,
+        help='Maximum duration in seconds of each synthetic audio file')
+    parser.add_argument(
+        '--replicas',
+        nargs='+',
+        type=int,
+        help='Replica counts. Defaults to 0 and powers of two up to the '
+             'number of CPUs. 0 is single-process inference.')
+    parser.add_argument(
+        '--threads',
+        nargs='+',
+        type=int,
+        help='Threads per replica. Defaults to dividing CPUs evenly.')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--max_frames',
+        type=int,
+        default=ppgs.MAX_INFERENCE_FRAMES,
+        help='Maximum number of frames in a batch')
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=0,
+        help='Number of CPU threads for data loading and saving')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,137 @@
+import os
+import tempfile
+from pathlib import Path
+
+import torch
+import torchaudio
+
+import ppgs
+
+
+###############################################################################
+# Multi-replica scaling benchmark
+###############################################################################
+
+
+def from_files(
+    audio_files,
+    configurations,
+    checkpoint=None,
+    max_frames=ppgs.MAX_INFERENCE_FRAMES,
+    num_workers=0):
+    """Measure inference throughput for replica and thread counts
+
+    Arguments
+        audio_files
+            The audio files to infer
+        configurations
+            List of (replicas, threads). Zero replicas is single-process
+            inference with torch.set_num_threads(threads).
+        checkpoint
+            The checkpoint file
+        max_frames
+            Maximum number of frames in a batch
+        num_workers
+            Number of CPU threads for data loading and saving
+
+    Returns
+        Dictionary of benchmark results
+    """
+    infos = [torchaudio.info(file) for file in audio_files]
+    duration = sum(info.num_frames / info.sample_rate for info in infos)
+    results = {
+        'cpus': os.cpu_count(),
+        'files': len(audio_files),
+        'duration': duration,
+        'configurations': []}
+
+    # Warmup (loads and caches the model in this process)
+    ppgs.from_file(audio_files[0], checkpoint=checkpoint)
+
+    default_threads = torch.get_num_threads()
+    with tempfile.TemporaryDirectory() as directory:
+        output_files = [
+            Path(directory) / f'{i:06d}.pt' for i in range(len(audio_files))]
+        for replicas, threads in configurations:
+
+            # Single-process inference uses this process' thread pool
+            if not replicas:
+                torch.set_num_threads(threads)
+
+            try:
+                _, elapsed = ppgs.benchmark.timer(
+                    ppgs.from_files_to_files,
+                    audio_files,
+                    output_files,
+                    checkpoint=checkpoint,
+                    num_workers=num_workers,
+                    max_frames=max_frames,
+                    replicas=replicas,
+                    threads=threads)
+            finally:
+                torch.set_num_threads(default_threads)
+
+            results['configurations'].append({
+                'replicas': replicas,
+                'threads': threads,
+                'seconds': elapsed,
+                'files_per_second': len(audio_files) / elapsed,
+                'real_time_factor': elapsed / duration})
+
+    return results
+
+
+def grid(replicas=None, threads=None, cpus=None):
+    """Create (replicas, threads) configurations
+
+    Arguments
+        replicas
+            Replica counts. Defaults to single-process inference and powers
+            of two up to the number of CPUs.
+        threads
+            Thread counts per replica. Defaults to dividing the CPUs evenly
+            between replicas.
+        cpus
+            Number of CPUs. Defaults to os.cpu_count().
+
+    Returns
+        List of (replicas, threads)
+    """
+    if cpus is None:
+        cpus = os.cpu_count()
+    if replicas is None:
+        replicas = [0] + [
+            2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus]
+    configurations = []
+    for count in replicas:
+        if threads is None:
+            configurations.append((count, max(1, cpus // max(1, count))))
+        else:
+            configurations.extend((count, thread) for thread in threads)
+    return configurations
+
+
+def synthetic(directory, files=64, duration=10.):
+    """Write synthetic audio files of varied length
+
+    Arguments
+        directory
+            Directory to write audio files
+        files
+            Number of files
+        duration
+            Maximum duration of each file in seconds
+
+    Returns
+        List of audio files
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    audio = ppgs.benchmark.audio(duration)[0]
+    audio_files = []
+    for i in range(files):
+        length = int((.25 + .75 * (i % 8) / 7) * audio.shape[-1])
+        file = directory / f'{i:06d}.wav'
+        torchaudio.save(file, audio[:, :length], ppgs.SAMPLE_RATE)
+        audio_files.append(file)
+    return audio_files
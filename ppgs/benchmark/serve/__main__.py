@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Inference server benchmark
+###############################################################################
+
+
+def main(
+    clients=8,
+    requests=32,
+    duration=4.,
+    host=None,
+    port=None,
+    socket=None,
+    checkpoint=None,
+    max_frames=None,
+    max_wait=None,
+    output_file=None):
+    """Load test an inference server"""
+    if host is None and port is None and socket is None:
+        results = ppgs.benchmark.serve.loopback(
+            clients,
+            requests,
+            duration,
+            checkpoint,
+            max_frames,
+            max_wait)
+    else:
+        results = ppgs.benchmark.serve.from_clients(
+            clients,
+            requests,
+            duration,
+            '127.0.0.1' if host is None else host,
+            port,
+            socket)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Load test the micro-batching inference server')
+    parser.add_argument(
+        '--clients',
+        type=int,
+        default=8,
+        help='Number of concurrent clients')
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=32,
+        help='Number of requests sent by each client')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=4.,
+        help='Maximum duration in seconds of each request')
+    parser.add_argument(
+        '--host',
+        help='Host of a running server. Defaults to starting a loopback '
+             'server and comparing with per-request inference.')
+    parser.add_argument(
+        '--port',
+        type=int,
+        help='Port of a running server')
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        help='Unix socket path of a running server')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file of the loopback server')
+    parser.add_argument(
+        '--max_frames',
+        type=int,
+        help='Maximum number of padded frames in a loopback server batch')
+    parser.add_argument(
+        '--max_wait',
+        type=float,
+        help='Maximum seconds a loopback server request waits for a batch')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,176 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import ppgs
+
+
+###############################################################################
+# Inference server benchmark
+###############################################################################
+
+
+def from_clients(
+    clients=8,
+    requests=32,
+    duration=4.,
+    host='127.0.0.1',
+    port=None,
+    socket=None):
+    """Load test a running inference server from concurrent clients
+
+    Arguments
+        clients
+            Number of concurrent clients, each with its own connection
+        requests
+            Number of requests sent by each client
+        duration
+            Maximum duration in seconds of each request. Durations vary
+            between a quarter of this and this.
+        host
+            The server host
+        port
+            The server port. Defaults to ppgs.SERVE_PORT.
+        socket
+            Optional Unix socket path of the server instead of a port
+
+    Returns
+        Dictionary of benchmark results
+    """
+    audios = segments(ppgs.benchmark.audio(duration)[0, 0])
+
+    def client(index):
+        times = []
+        with ppgs.serve.Client(host, port, socket) as connection:
+            for i in range(requests):
+                audio = audios[(index + i) % len(audios)]
+                _, elapsed = ppgs.benchmark.timer(connection, audio)
+                times.append(elapsed)
+        return times
+
+    # Send requests from all clients at once
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(clients) as executor:
+        times = sum(executor.map(client, range(clients)), [])
+    elapsed = time.perf_counter() - start
+
+    # Get server-side metrics
+    with ppgs.serve.Client(host, port, socket) as connection:
+        metrics = connection.metrics()
+
+    return {
+        'clients': clients,
+        'requests': clients * requests,
+        'seconds': elapsed,
+        'requests_per_second': clients * requests / elapsed,
+        'latency': ppgs.benchmark.percentiles(times, (.5, .9, .99)),
+        'server': metrics}
+
+
+def loopback(
+    clients=8,
+    requests=32,
+    duration=4.,
+    checkpoint=None,
+    max_frames=None,
+    max_wait=None):
+    """Compare a loopback server with concurrent per-request inference
+
+    Starts a server on a free loopback port in this process and load tests
+    it. As a baseline, the same number of threads each call ppgs.from_audio
+    for the same requests.
+
+    Arguments
+        clients
+            Number of concurrent clients
+        requests
+            Number of requests sent by each client
+        duration
+            Maximum duration in seconds of each request
+        checkpoint
+            The checkpoint file
+        max_frames
+            Maximum number of padded frames in a batch
+        max_wait
+            Maximum seconds a request waits for a batch to fill
+
+    Returns
+        Dictionary of benchmark results
+    """
+    audios = segments(ppgs.benchmark.audio(duration)[0, 0])
+
+    # Baseline: one batch-size-1 inference per request
+    ppgs.from_audio(
+        audios[0][None, None],
+        ppgs.SAMPLE_RATE,
+        checkpoint=checkpoint)
+
+    def direct(index):
+        times = []
+        for i in range(requests):
+            audio = audios[(index + i) % len(audios)]
+            _, elapsed = ppgs.benchmark.timer(
+                ppgs.from_audio,
+                audio[None, None],
+                ppgs.SAMPLE_RATE,
+                checkpoint=checkpoint)
+            times.append(elapsed)
+        return times
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(clients) as executor:
+        times = sum(executor.map(direct, range(clients)), [])
+    elapsed = time.perf_counter() - start
+    results = {
+        'direct': {
+            'clients': clients,
+            'requests': clients * requests,
+            'seconds': elapsed,
+            'requests_per_second': clients * requests / elapsed,
+            'latency': ppgs.benchmark.percentiles(times, (.5, .9, .99))}}
+
+    # Start server on a free port
+    server = ppgs.serve.Server(
+        checkpoint=checkpoint,
+        max_frames=max_frames,
+        max_wait=max_wait)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve('127.0.0.1', 0))
+    thread = threading.Thread(target=run, args=(loop, task))
+    thread.start()
+    try:
+        while not server.started.wait(.1):
+            if not thread.is_alive():
+                raise RuntimeError('Inference server failed to start')
+        results['served'] = from_clients(
+            clients,
+            requests,
+            duration,
+            port=server.address[1])
+    finally:
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+        loop.close()
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def run(loop, task):
+    """Run a server task until it is cancelled"""
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+
+
+def segments(audio, count=8):
+    """Create requests with lengths between a quarter of and all of audio"""
+    return [
+        audio[:int((.25 + .75 * i / (count - 1)) * audio.shape[-1])]
+        for i in range(count)]
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Startup benchmark
+###############################################################################
+
+
+def main(iterations=5, checkpoint=None, output_file=None):
+    """Benchmark time to first PPG"""
+    results = ppgs.benchmark.startup.from_modes(iterations, checkpoint)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark time to first PPG in a fresh process')
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=5,
+        help='Number of fresh processes per mode')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='Checkpoint file to load instead of the default')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
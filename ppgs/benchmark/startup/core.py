@@ -0,0 +1,110 @@
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Time to first PPG in a fresh process, reported as JSON on the last line
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from pathlib import Path
+import huggingface_hub
+import torch
+import ppgs
+
+# Count hub requests
+calls = []
+download = huggingface_hub.hf_hub_download
+def counted(*args, **kwargs):
+    calls.append(args)
+    return download(*args, **kwargs)
+huggingface_hub.hf_hub_download = counted
+
+ppgs.CHECKPOINT_MMAP = sys.argv[1] == 'mmap'
+if sys.argv[2]:
+    ppgs.CHECKPOINT_INDEX_FILE = Path(sys.argv[2])
+ppgs.from_audio(
+    torch.zeros((1, 1, ppgs.SAMPLE_RATE)),
+    ppgs.SAMPLE_RATE,
+    checkpoint=sys.argv[3] or None)
+seconds = time.perf_counter() - start
+
+import ppgs.benchmark
+print(json.dumps({
+    'seconds': seconds,
+    'hub_calls': len(calls),
+    'peak_rss': ppgs.benchmark.peak_rss()}))
+"""
+
+
+###############################################################################
+# Startup benchmark
+###############################################################################
+
+
+def from_modes(iterations=5, checkpoint=None):
+    """Measure time to first PPG with and without the checkpoint index
+
+    Modes are 'hub', which resolves the default checkpoint with the hub and
+    copies weights in every process (the previous behavior), 'index', which
+    resolves it from a warm ppgs.CHECKPOINT_INDEX_FILE, and 'index-mmap',
+    which also memory-maps weights. If a checkpoint is given, no hub
+    requests are made and 'hub' and 'index' are equivalent.
+
+    Arguments
+        iterations
+            Number of fresh processes per mode
+        checkpoint
+            Optional checkpoint file to load instead of the default
+
+    Returns
+        Dictionary of benchmark results
+    """
+    results = {'environment': ppgs.benchmark.environment(), 'modes': {}}
+    checkpoint = '' if checkpoint is None else str(checkpoint)
+
+    # Make sure the index is warm
+    run('mmap', '', checkpoint)
+
+    for mode in ['hub', 'index', 'index-mmap']:
+        runs = []
+        for _ in range(iterations):
+            with tempfile.TemporaryDirectory() as directory:
+                index = (
+                    str(Path(directory) / 'checkpoints.json')
+                    if mode == 'hub' else '')
+                runs.append(run(
+                    'mmap' if mode == 'index-mmap' else 'copy',
+                    index,
+                    checkpoint))
+        results['modes'][mode] = {
+            'seconds': ppgs.benchmark.percentiles(
+                [item['seconds'] for item in runs]),
+            'hub_calls': max(item['hub_calls'] for item in runs),
+            'peak_rss': max(item['peak_rss'] or 0 for item in runs)}
+
+    return results
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def run(mmap, index, checkpoint):
+    """Time to first PPG in a fresh process"""
+    output = subprocess.run(
+        [sys.executable, '-c', SCRIPT, mmap, index, checkpoint],
+        check=True,
+        capture_output=True,
+        text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Streaming benchmark
+###############################################################################
+
+
+def main(
+    audio_file=None,
+    duration=30.,
+    chunk_duration=.1,
+    context=ppgs.CHUNK_LENGTH - 2 * ppgs.CHUNK_OVERLAP,
+    checkpoint=None,
+    gpu=None,
+    recompute=False,
+    output_file=None):
+    """Benchmark streaming inference against whole-file inference"""
+    if audio_file is None:
+        audio = ppgs.benchmark.audio(duration)
+    else:
+        audio = ppgs.load.audio(audio_file)[None]
+    results = ppgs.benchmark.stream.from_audio(
+        audio,
+        chunk_duration,
+        checkpoint,
+        gpu,
+        context,
+        not recompute)
+    ppgs.benchmark.save(results, output_file)
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Benchmark streaming PPG inference')
+    parser.add_argument(
+        '--audio_file',
+        type=Path,
+        help='Audio file to stream. Defaults to synthetic audio.')
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=30.,
+        help='Duration in seconds of synthetic audio')
+    parser.add_argument(
+        '--chunk_duration',
+        type=float,
+        default=.1,
+        help='Duration in seconds of each streamed chunk')
+    parser.add_argument(
+        '--context',
+        type=int,
+        default=ppgs.CHUNK_LENGTH - 2 * ppgs.CHUNK_OVERLAP,
+        help='Number of mel frames of left context')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use for inference. Defaults to CPU.')
+    parser.add_argument(
+        '--recompute',
+        action='store_true',
+        help='Recompute causal models from left context at every chunk '
+             'instead of inferring incrementally')
+    parser.add_argument(
+        '--output_file',
+        type=Path,
+        help='JSON file to save results')
+    return parser.parse_args()
+
+
+main(**vars(parse_args()))
@@ -0,0 +1,101 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Streaming benchmark
+###############################################################################
+
+
+def from_audio(
+    audio,
+    chunk_duration=.1,
+    checkpoint=None,
+    gpu=None,
+    context=ppgs.CHUNK_LENGTH - 2 * ppgs.CHUNK_OVERLAP,
+    incremental=True):
+    """Compare streaming and whole-file inference latency and throughput
+
+    Arguments
+        audio
+            Audio at ppgs.SAMPLE_RATE
+            shape=(1, 1, samples)
+        chunk_duration
+            Duration in seconds of each audio chunk pushed to the stream
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        context
+            Number of mel frames of left context kept by the stream
+        incremental
+            Whether the stream infers causal transformers incrementally
+
+    Returns
+        Dictionary of benchmark results
+    """
+    duration = audio.shape[-1] / ppgs.SAMPLE_RATE
+
+    # Warmup (loads and caches the model)
+    ppgs.from_audio(
+        audio[..., :ppgs.SAMPLE_RATE],
+        ppgs.SAMPLE_RATE,
+        checkpoint=checkpoint,
+        gpu=gpu)
+
+    # Whole-file inference
+    whole, elapsed = ppgs.benchmark.timer(
+        ppgs.from_audio,
+        audio,
+        ppgs.SAMPLE_RATE,
+        checkpoint=checkpoint,
+        gpu=gpu)
+    results = {
+        'duration': duration,
+        'whole': {
+            'latency': elapsed,
+            'real_time_factor': elapsed / duration,
+            'frames_per_second': whole.shape[-1] / elapsed}}
+
+    # Streaming inference
+    stream = ppgs.Stream(
+        checkpoint=checkpoint,
+        gpu=gpu,
+        context=context,
+        incremental=incremental)
+    hopsize = int(chunk_duration * ppgs.SAMPLE_RATE)
+    times, frames, first = [], [], None
+    for i in range(0, audio.shape[-1], hopsize):
+        ppg, elapsed = ppgs.benchmark.timer(
+            stream,
+            audio[..., i:i + hopsize])
+        times.append(elapsed)
+        frames.append(ppg)
+        if first is None and ppg.shape[-1]:
+            first = (i + hopsize) / ppgs.SAMPLE_RATE + sum(times)
+    ppg, elapsed = ppgs.benchmark.timer(stream.flush)
+    times.append(elapsed)
+    frames.append(ppg)
+    streamed = torch.cat(frames, dim=-1)
+    results['stream'] = {
+        'chunk_duration': chunk_duration,
+        'context': context,
+        'incremental': incremental,
+        'lookahead': stream.lookahead,
+        'chunk_latency': ppgs.benchmark.percentiles(times),
+        'time_to_first_frame': first,
+        'real_time_factor': sum(times) / duration,
+        'frames_per_second': streamed.shape[-1] / sum(times)}
+
+    # Agreement with whole-file inference
+    whole = whole[0]
+    results['stream']['frames'] = streamed.shape[-1]
+    results['whole']['frames'] = whole.shape[-1]
+    length = min(whole.shape[-1], streamed.shape[-1])
+    results['stream']['argmax_agreement'] = (
+        whole[:, :length].argmax(dim=0) ==
+        streamed[:, :length].to(whole.device).argmax(dim=0)
+    ).float().mean().item()
+
+    return results
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Bytes to read at a time when hashing audio files
+HASH_BLOCK_SIZE = 1 << 20
+
+# Guards the running total size of the cache
+LOCK = threading.Lock()
+
+
+###############################################################################
+# Content-addressed PPG result cache
+###############################################################################
+
+
+def key(
+    audio_file: Union[str, bytes, os.PathLike],
+    representation: str = ppgs.REPRESENTATION,
+    checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+    legacy_mode: bool = False,
+    quantize: Optional[str] = None
+) -> str:
+    """Compute the cache key of the PPG of an audio file
+
+    The key is a hash of the audio file contents, the checkpoint, the
+    representation, and the configuration values that affect inference.
+
+    Arguments
+        audio_file
+            The audio file
+        representation
+            The representation to use for inference
+        checkpoint
+            The checkpoint file
+        legacy_mode
+            Use legacy (unchunked) inference
+        quantize
+            Optional int8 quantization mode
+
+    Returns
+        Hexadecimal cache key
+    """
+    hasher = hashlib.sha256()
+
+    # Hash audio contents
+    with open(audio_file, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+
+    # Identify checkpoint without reading the weights
+    if checkpoint is None:
+        checkpoint = ppgs.LOCAL_CHECKPOINT
+    if checkpoint is not None and Path(checkpoint).exists():
+        stat = Path(checkpoint).stat()
+        checkpoint = f'{Path(checkpoint).resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    # Hash inference configuration
+    hasher.update(repr((
+        str(checkpoint),
+        str(representation),
+        ppgs.CONFIG,
+        ppgs.MODEL,
+        ppgs.REPRESENTATION_KIND,
+        ppgs.SAMPLE_RATE,
+        ppgs.HOPSIZE,
+        ppgs.CHUNK_LENGTH,
+        ppgs.CHUNK_OVERLAP,
+        legacy_mode,
+        quantize
+    )).encode())
+
+    return hasher.hexdigest()
+
+
+def load(key: str) -> Optional[torch.Tensor]:
+    """Load a cached PPG, or None if the key is not cached"""
+    file = path(key)
+    try:
+        ppg = torch.load(file, map_location='cpu')
+    except (FileNotFoundError, EOFError, RuntimeError):
+        return None
+
+    # Mark as recently used
+    touch(file)
+
+    return ppg
+
+
+def copy(
+    key: str,
+    output_file: Union[str, bytes, os.PathLike],
+    encoding: Optional[str] = None,
+    container: Optional['ppgs.container.Writer'] = None
+) -> bool:
+    """Copy a cached PPG to an output file, returning whether it was cached
+
+    Arguments
+        key
+            The cache key
+        output_file
+            The file to write
+        encoding
+            Storage encoding of the output file. One of
+            ppgs.encoding.ENCODINGS, or None to copy the cached file as is.
+        container
+            Optional ppgs.container.Writer to append the PPG to, with
+            output_file as the key, instead of writing a file
+    """
+    file = path(key)
+    try:
+        if container is not None:
+            ppg = torch.load(file, map_location='cpu')
+            container.write(output_file, ppgs.encoding.encode(ppg, encoding))
+        elif encoding is None:
+            shutil.copyfile(file, output_file)
+        else:
+            ppg = torch.load(file, map_location='cpu')
+            torch.save(ppgs.encoding.encode(ppg, encoding), output_file)
+    except FileNotFoundError:
+        return False
+
+    # Mark as recently used
+    touch(file)
+
+    return True
+
+
+def save(key: str, ppg: torch.Tensor):
+    """Add a PPG to the cache and maybe evict least-recently-used entries"""
+    file = path(key)
+    file.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write atomically so concurrent readers never see partial files
+    temporary = file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}')
+    torch.save(ppg.detach().cpu().clone(), temporary)
+    os.replace(temporary, file)
+
+    # Maybe evict
+    with LOCK:
+        if not hasattr(save, 'total'):
+            save.total = size()
+        else:
+            save.total += file.stat().st_size
+        if save.total > ppgs.MAX_RESULT_CACHE_BYTES:
+            save.total = evict()
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def evict(max_bytes=None):
+    """Delete least-recently-used entries until the cache is within budget
+
+    Entries are removed until the cache is 10% under budget so that
+    eviction is not triggered again by the next save.
+
+    Returns
+        The size of the cache in bytes after eviction
+    """
+    if max_bytes is None:
+        max_bytes = ppgs.MAX_RESULT_CACHE_BYTES
+    entries = []
+    for file in ppgs.RESULT_CACHE_DIR.glob('*/*.pt'):
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, file))
+    total = sum(entry[1] for entry in entries)
+    for _, nbytes, file in sorted(entries):
+        if total <= .9 * max_bytes:
+            break
+        file.unlink(missing_ok=True)
+        total -= nbytes
+    return total
+
+
+def path(key):
+    """Location of a cache entry"""
+    return ppgs.RESULT_CACHE_DIR / key[:2] / f'{key}.pt'
+
+
+def size():
+    """Total size in bytes of the cache"""
+    return sum(
+        file.stat().st_size for file in ppgs.RESULT_CACHE_DIR.glob('*/*.pt'))
+
+
+def touch(file):
+    """Update the last-used time of a cache entry"""
+    try:
+        os.utime(file)
+    except FileNotFoundError:
+        pass
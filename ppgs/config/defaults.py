@@ -92,9 +92,20 @@ SOURCES_DIR = ROOT_DIR / 'data' / 'sources'
 # Location of similarity matrix
 SIMILARITY_MATRIX_PATH = ASSETS_DIR / 'balanced_similarity.pt'
 
+# Location of the on-disk cache of inferred PPGs
+RESULT_CACHE_DIR = Path(
+    os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')
+) / 'ppgs' / 'results'
+
 # Location of checkpoints
 CHECKPOINT_DIR = ASSETS_DIR / 'checkpoints'
 
+# Local index of downloaded checkpoints, so that warm starts make no network
+# requests
+CHECKPOINT_INDEX_FILE = Path(
+    os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')
+) / 'ppgs' / 'checkpoints.json'
+
 # Location of similarity matrix
 SIMILARITY_MATRIX_PATH = ASSETS_DIR / 'balanced_similarity.pt'
 
@@ -123,10 +134,27 @@ EVALUATION_INTERVAL = 1000  # steps
 # If None, Huggingface will be used unless a checkpoint is given in the CLI
 LOCAL_CHECKPOINT = None
 
+# Number of phonemes kept per frame by the 'topk' PPG storage encoding
+ENCODING_TOPK = 4
+
+# Size in bytes after which a sharded container starts a new shard
+SHARD_BYTES = 1024 ** 3
+
+# Maximum total size in bytes of the on-disk cache of inferred PPGs
+MAX_RESULT_CACHE_BYTES = 10 * 1024 ** 3
+
+# Maximum total size in bytes of models kept in memory at once
+MAX_MODEL_CACHE_BYTES = 4 * 1024 ** 3
+
 # Number of attention heads
 ATTENTION_HEADS = 2
 
-# Attention window size
+# Attention type. One of ['full', 'local'].
+# Local attention only attends to frames within ATTENTION_WINDOW_SIZE frames,
+# so long inputs are inferred without chunking.
+ATTENTION = 'full'
+
+# Attention window size of local attention
 ATTENTION_WINDOW_SIZE = 4
 
 # Use causal masking/methods
@@ -160,6 +188,36 @@ CHUNK_OVERLAP = 50
 # Maximum number of frames in a chunk
 CHUNK_LENGTH = 500
 
+# Maximum number of frames in one batched forward pass over chunks
+MAX_CHUNK_FRAMES = 50000
+
+# Infer padded batches without computing padding (see
+# ppgs.model.Transformer.packed)
+PACKED_INFERENCE = True
+
+# Files longer than this many frames are inferred in windows read from disk
+# (see ppgs.longform)
+LONG_FORM_FRAMES = 90000
+
+# Number of frames inferred per window of a long file
+LONG_FORM_WINDOW_FRAMES = 24000
+
+# Inference backend. One of ['eager', 'compile', 'torchscript', 'onnx'].
+# Backends other than 'eager' infer fixed-length chunks on CPU, so PPGs of
+# inputs longer than CHUNK_LENGTH frames differ from eager inference.
+BACKEND = 'eager'
+
+# Precision of preprocessing and inference on each device type (see
+# ppgs.precision). One of ['float32', 'bfloat16', 'float16'].
+PRECISION = {'cpu': 'float32', 'cuda': 'float16'}
+
+# Memory-map checkpoint weights instead of copying them into memory, so that
+# processes on one host share weights through the page cache
+CHECKPOINT_MMAP = True
+
+# Number of validation batches used to calibrate static quantization
+QUANTIZATION_CALIBRATION_BATCHES = 8
+
 
 ###############################################################################
 # Training parameters
@@ -198,6 +256,10 @@ STEPS = 500000
 #     NUM_WORKERS = os.cpu_count()
 NUM_WORKERS = 8
 
+# Maximum number of batches waiting between stages of the inference and
+# preprocessing pipelines
+PIPELINE_QUEUE_SIZE = 4
+
 # Seed for all random number generators
 RANDOM_SEED = 1234
 
@@ -212,3 +274,24 @@ RANDOM_SEED = 1234
 # correlation between word error rate (WER) and the average JS divergence
 # between PPGs.
 SIMILARITY_EXPONENT = 1.2
+
+# Approximate memory budget in bytes of each block of pairwise distances
+MAX_DISTANCE_BYTES = 1024 ** 3
+
+
+###############################################################################
+# Server parameters
+###############################################################################
+
+
+# Default port of the inference server (see ppgs.serve)
+SERVE_PORT = 8765
+
+# Maximum number of frames of padded audio in one micro-batch
+SERVE_MAX_FRAMES = 10000
+
+# Maximum seconds a request waits for other requests to batch with
+SERVE_MAX_WAIT = .01
+
+# Number of recent request latencies used to report percentiles
+SERVE_LATENCY_WINDOW = 10000
@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Name of the index file of a container
+INDEX_FILE = 'index.jsonl'
+
+# Byte alignment of each tensor within a shard
+ALIGNMENT = 64
+
+
+###############################################################################
+# Sharded container
+###############################################################################
+
+
+class Writer:
+    """Append tensors to a sharded container
+
+    A container is a directory of large append-only shard files and an
+    append-only index mapping each key to the shard, byte offset, byte
+    length, shape, and dtype of its tensors. Values are tensors or
+    dictionaries of tensors and JSON-serializable values (e.g., the output of
+    ppgs.encoding.encode). Writing to an existing container appends to it,
+    so the index doubles as a record of completed work.
+
+    Arguments
+        directory
+            The container directory
+        shard_bytes
+            Size in bytes after which a new shard is started.
+            Defaults to ppgs.SHARD_BYTES.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, bytes, os.PathLike],
+        shard_bytes: int = None
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shard_bytes = (
+            ppgs.SHARD_BYTES if shard_bytes is None else shard_bytes)
+        self.lock = threading.Lock()
+
+        # Existing keys
+        self.entries = load_index(self.directory)
+
+        # Write to a new shard so that a partial write from a previous run is
+        # never appended to. The shard is created on the first write.
+        shards = [
+            shard for entry in self.entries.values()
+            for shard in entry_shards(entry)]
+        shards += [
+            int(file.stem.split('-')[-1])
+            for file in self.directory.glob('shard-*.bin')]
+        self.shard = max(shards, default=-1) + 1
+        self.offset = 0
+        self.data = None
+        self.index = open(self.directory / INDEX_FILE, 'a')
+
+    def __contains__(self, key):
+        return str(key) in self.entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Close the container"""
+        with self.lock:
+            if self.data is not None:
+                self.data.close()
+            self.index.close()
+
+    def write(self, key, value):
+        """Append a tensor or dictionary of tensors under a key"""
+        with self.lock:
+
+            # Maybe start a new shard
+            if self.data is None or self.offset >= self.shard_bytes:
+                if self.data is not None:
+                    self.data.close()
+                    self.shard += 1
+                self.offset = 0
+                self.data = open(shard_path(self.directory, self.shard), 'ab')
+
+            # Write data before the index, so that indexed data is complete
+            if isinstance(value, torch.Tensor):
+                entry = {'tensor': self.append(value)}
+            else:
+                entry = {
+                    'fields': {
+                        name: self.append(field)
+                        for name, field in value.items()
+                        if isinstance(field, torch.Tensor)},
+                    'attributes': {
+                        name: field
+                        for name, field in value.items()
+                        if not isinstance(field, torch.Tensor)}}
+            self.data.flush()
+
+            # Update index
+            entry['key'] = str(key)
+            self.index.write(json.dumps(entry) + '\n')
+            self.index.flush()
+            self.entries[str(key)] = entry
+
+    def append(self, tensor):
+        """Append the bytes of a tensor to the current shard"""
+        tensor = tensor.detach().cpu().contiguous()
+        data = tensor.view(-1).view(torch.uint8).numpy().tobytes() \
+            if tensor.numel() else b''
+
+        # Align start of tensor
+        padding = -self.offset % ALIGNMENT
+        self.data.write(b'\0' * padding)
+        self.offset += padding
+
+        location = [
+            self.shard,
+            self.offset,
+            len(data),
+            list(tensor.shape),
+            str(tensor.dtype).replace('torch.', '')]
+        self.data.write(data)
+        self.offset += len(data)
+        return location
+
+
+class Reader:
+    """Zero-copy reader for a sharded container
+
+    Shards are memory-mapped copy-on-write, so tensors are views of the page
+    cache that can be shared by many processes. Shards are mapped lazily and
+    the reader can be pickled (e.g., by DataLoader workers).
+
+    Arguments
+        directory
+            The container directory
+    """
+
+    def __init__(self, directory: Union[str, bytes, os.PathLike]):
+        self.directory = Path(directory)
+        self.entries = load_index(self.directory)
+        self.shards = {}
+
+    def __contains__(self, key):
+        return str(key) in self.entries
+
+    def __getitem__(self, key):
+        """Retrieve the tensor or dictionary stored under a key"""
+        entry = self.entries[str(key)]
+        if 'tensor' in entry:
+            return self.view(entry['tensor'])
+        value = {
+            name: self.view(location)
+            for name, location in entry['fields'].items()}
+        value.update(entry['attributes'])
+        return value
+
+    def __getstate__(self):
+        return {'directory': self.directory, 'entries': self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shards = {}
+
+    def keys(self):
+        return self.entries.keys()
+
+    def view(self, location):
+        """Create a tensor view of bytes in a shard"""
+        shard, offset, nbytes, shape, dtype = location
+        dtype = getattr(torch, dtype)
+        if nbytes == 0:
+            return torch.zeros(shape, dtype=dtype)
+        if shard not in self.shards:
+            self.shards[shard] = np.memmap(
+                shard_path(self.directory, shard),
+                dtype=np.uint8,
+                mode='c')
+        data = torch.from_numpy(self.shards[shard][offset:offset + nbytes])
+        return data.view(dtype).view(shape)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def entry_shards(entry):
+    """Get the shards used by an index entry"""
+    if 'tensor' in entry:
+        return [entry['tensor'][0]]
+    return [location[0] for location in entry['fields'].values()]
+
+
+def load_index(directory) -> Dict[str, dict]:
+    """Load the index of a container, ignoring a partial final line"""
+    entries = {}
+    file = Path(directory) / INDEX_FILE
+    if file.exists():
+        with open(file) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry['key']] = entry
+    return entries
+
+
+def shard_path(directory, shard):
+    """Location of a shard"""
+    return Path(directory) / f'shard-{shard:05d}.bin'
@@ -1,11 +1,8 @@
 import contextlib
-import functools
 import itertools
-import multiprocessing as mp
 import os
-import time
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import torch
 import torchaudio
@@ -25,7 +22,8 @@ def from_audio(
     representation: str = ppgs.REPRESENTATION,
     checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
     gpu: int = None,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    quantize: Optional[str] = None
 ) -> torch.Tensor:
     """Infer ppgs from audio
 
@@ -43,6 +41,9 @@ def from_audio(
             The index of the GPU to use for inference
         legacy_mode
             Use legacy (unchunked) inference
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
 
     Returns
         ppgs
@@ -66,7 +67,8 @@ def from_audio(
         representation=representation,
         checkpoint=checkpoint,
         gpu=gpu,
-        legacy_mode=legacy_mode)
+        legacy_mode=legacy_mode,
+        quantize=quantize)
 
 
 def from_features(
@@ -76,7 +78,8 @@ def from_features(
     checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
     gpu: Optional[int] = None,
     softmax: bool = True,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    quantize: Optional[str] = None
 ) -> torch.Tensor:
     """Infer ppgs from input features (e.g. w2v2fb, mel, etc.)
 
@@ -97,6 +100,9 @@ def from_features(
             Whether to apply softmax normalization to the inferred logits
         legacy_mode
             Use legacy (unchunked) inference
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
 
     Returns
         ppgs
@@ -107,16 +113,13 @@ def from_features(
 
     if representation is None: # neither mel nor w2v2fb have a frontend
 
-        # Maybe load and cache codebook
-        if (
-            not hasattr(from_features, 'frontend') and
-            ppgs.FRONTEND is not None
-        ):
-            from_features.frontend = ppgs.FRONTEND(device)
-
         # Codebook lookup
-        if hasattr(from_features, 'frontend'):
-            features = from_features.frontend(features.to(device))
+        if ppgs.FRONTEND is not None:
+            frontend = ppgs.registry.get(
+                ('frontend', ppgs.FRONTEND),
+                device,
+                lambda: ppgs.FRONTEND(device))
+            features = frontend(features.to(device))
 
     # Infer
     return infer(
@@ -125,7 +128,8 @@ def from_features(
         representation=representation,
         checkpoint=checkpoint,
         softmax=softmax,
-        legacy_mode=legacy_mode)
+        legacy_mode=legacy_mode,
+        quantize=quantize)
 
 
 def from_file(
@@ -133,7 +137,9 @@ def from_file(
     representation: str = ppgs.REPRESENTATION,
     checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
     gpu: Optional[int] = None,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    cache: bool = False,
+    quantize: Optional[str] = None
 ) -> torch.Tensor:
     """Infer ppgs from an audio file
 
@@ -148,25 +154,49 @@ def from_file(
             The index of the GPU to use for inference
         legacy_mode
             Use legacy (unchunked) inference
+        cache
+            Reuse and store results in the on-disk PPG cache
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
 
     Returns
         ppgs
             Phonetic posteriorgram
             shape=(len(ppgs.PHONEMES), frames)
     """
+    # Maybe load from cache
+    if cache:
+        key = ppgs.cache.key(
+            file,
+            representation,
+            checkpoint,
+            legacy_mode,
+            quantize)
+        result = ppgs.cache.load(key)
+        if result is not None:
+            return result.to('cpu' if gpu is None else f'cuda:{gpu}')
+
     # Load audio
     audio = ppgs.load.audio(file)
 
     # Compute PPGs
-    return from_audio(
+    result = from_audio(
         audio=audio,
         sample_rate=ppgs.SAMPLE_RATE,
         representation=representation,
         checkpoint=checkpoint,
         gpu=gpu,
-        legacy_mode=legacy_mode
+        legacy_mode=legacy_mode,
+        quantize=quantize
     ).squeeze(0)
 
+    # Maybe cache
+    if cache:
+        ppgs.cache.save(key, result)
+
+    return result
+
 
 def from_file_to_file(
     audio_file: Union[str, bytes, os.PathLike],
@@ -174,10 +204,15 @@ def from_file_to_file(
     representation: str = ppgs.REPRESENTATION,
     checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
     gpu: Optional[int] = None,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    cache: bool = False,
+    quantize: Optional[str] = None
 ) -> None:
     """Infer ppg from an audio file and save to a torch tensor file
 
+    Files longer than ppgs.LONG_FORM_FRAMES frames are inferred with
+    ppgs.longform.from_file_to_file and are not cached.
+
     Arguments
         audio_file
             The audio file
@@ -191,14 +226,48 @@ def from_file_to_file(
             The index of the GPU to use for inference
         legacy_mode
             Use legacy (unchunked) inference
+        cache
+            Reuse and store results in the on-disk PPG cache
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
     """
+    # Maybe copy from cache
+    if cache:
+        key = ppgs.cache.key(
+            audio_file,
+            representation,
+            checkpoint,
+            legacy_mode,
+            quantize)
+        if ppgs.cache.copy(key, output_file):
+            return
+
+    # Infer long files in windows read from disk
+    if long_form_supported(representation, legacy_mode):
+        frames = ppgs.load.frames(audio_file)
+        if frames > ppgs.LONG_FORM_FRAMES:
+            ppgs.longform.from_file_to_file(
+                audio_file,
+                output_file,
+                checkpoint,
+                gpu,
+                quantize=quantize,
+                frames=frames)
+            return
+
     # Compute PPGs
     result = from_file(
         file=audio_file,
         checkpoint=checkpoint,
         representation=representation,
         gpu=gpu,
-        legacy_mode=legacy_mode)
+        legacy_mode=legacy_mode,
+        quantize=quantize)
+
+    # Maybe cache
+    if cache:
+        ppgs.cache.save(key, result)
 
     # Save to disk
     torch.save(result.detach().cpu(), output_file)
@@ -212,7 +281,14 @@ def from_files_to_files(
     num_workers: int = 0,
     gpu: Optional[int] = None,
     max_frames: int = ppgs.MAX_INFERENCE_FRAMES,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    cache: bool = False,
+    manifest_file: Optional[Union[str, bytes, os.PathLike]] = None,
+    encoding: Optional[str] = None,
+    container_directory: Optional[Union[str, bytes, os.PathLike]] = None,
+    replicas: int = 0,
+    threads: Optional[int] = None,
+    quantize: Optional[str] = None
 ) -> None:
     """Infer ppgs from audio files and save to torch tensor files
 
@@ -226,34 +302,137 @@ def from_files_to_files(
         checkpoint
             The checkpoint file
         num_workers
-            Number of CPU threads for multiprocessing
+            Number of CPU threads for multiprocessing. With 0 workers, files
+            are still batched by length but loaded and saved in-process.
         gpu
             The index of the GPU to use for inference
         max_frames
-            The maximum number of frames on the GPU at once
+            The maximum number of frames on the GPU at once. Files longer
+            than this or ppgs.LONG_FORM_FRAMES are inferred in windows read
+            from disk (see ppgs.longform) and are not cached.
         legacy_mode
             Use legacy (unchunked) inference
+        cache
+            Reuse and store results in the on-disk PPG cache
+        manifest_file
+            Journal of completed outputs. If given, outputs completed by a
+            previous run with the same journal are skipped.
+        encoding
+            Storage encoding of the output files. One of
+            ppgs.encoding.ENCODINGS, or None for dense float32.
+            Load with ppgs.load.ppg.
+        container_directory
+            Directory of a sharded container (see ppgs.container). If given,
+            PPGs are appended to the container with output_files as keys
+            instead of being saved as separate files. Keys already in the
+            container are skipped.
+        replicas
+            Number of inference processes that each keep a copy of the model
+            and pull length-sorted batches from a shared queue. With 0
+            replicas, inference runs in this process.
+        threads
+            Number of intra-op threads per replica. Defaults to the number
+            of CPUs divided by the number of replicas.
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
     """
-    # Single-threaded
-    if num_workers == 0:
-        infer_fn = functools.partial(
-            from_file_to_file,
-            representation=representation,
-            checkpoint=checkpoint,
-            gpu=gpu,
-            legacy_mode=legacy_mode)
-        for audio_file, output_file in zip(audio_files, output_files):
-            infer_fn(audio_file, output_file)
-
-    # Multi-threaded
-    else:
+    with (
+        contextlib.nullcontext() if manifest_file is None
+        else ppgs.manifest.Manifest(manifest_file)
+    ) as manifest, (
+        contextlib.nullcontext() if container_directory is None
+        else ppgs.container.Writer(container_directory)
+    ) as container:
+
+        # Skip outputs completed by a previous run
+        if manifest is not None:
+            audio_files, output_files = manifest.pending(
+                audio_files,
+                output_files)
+        if container is not None:
+            pending = [
+                (audio_file, output_file)
+                for audio_file, output_file in zip(audio_files, output_files)
+                if output_file not in container]
+            audio_files = [audio_file for audio_file, _ in pending]
+            output_files = [output_file for _, output_file in pending]
+
+        # Copy cached results without loading audio
+        if cache:
+            misses = []
+            for audio_file, output_file in zip(audio_files, output_files):
+                key = ppgs.cache.key(
+                    audio_file,
+                    representation,
+                    checkpoint,
+                    legacy_mode,
+                    quantize)
+                if not ppgs.cache.copy(key, output_file, encoding, container):
+                    misses.append((audio_file, output_file))
+                elif manifest is not None and container is None:
+                    manifest.record(audio_file, output_file)
+            audio_files = [audio_file for audio_file, _ in misses]
+            output_files = [output_file for _, output_file in misses]
+
+        # Get lengths in frames from audio file headers, reusing the lengths
+        # recorded by a previous run
+        known = {} if manifest is None else manifest.lengths
+        lengths = {
+            audio_file: known[str(audio_file)] if str(audio_file) in known
+            else ppgs.load.frames(audio_file)
+            for audio_file in audio_files}
+
+        # Save lengths so that a restart does not read the headers again
+        if manifest is not None:
+            manifest.record_lengths(lengths)
+
+        # Infer files that are too long to load at once in windows read from
+        # disk. Container and encoded outputs still load the whole file.
+        if (
+            long_form_supported(representation, legacy_mode) and
+            container is None and
+            encoding is None
+        ):
+            threshold = min(max_frames, ppgs.LONG_FORM_FRAMES)
+            pending = []
+            for audio_file, output_file in zip(audio_files, output_files):
+                if lengths[audio_file] > threshold:
+                    ppgs.longform.from_file_to_file(
+                        audio_file,
+                        output_file,
+                        checkpoint,
+                        gpu,
+                        quantize=quantize,
+                        frames=lengths[audio_file])
+                    if manifest is not None:
+                        manifest.record(audio_file, output_file)
+                else:
+                    pending.append((audio_file, output_file))
+            audio_files = [audio_file for audio_file, _ in pending]
+            output_files = [output_file for _, output_file in pending]
+
+        # Nothing left to infer
+        if not audio_files:
+            return
+
+        # Single-process inference still batches files of similar length, but
+        # caps batch size so that an unbounded max_frames does not load every
+        # file
+        if num_workers == 0 and max_frames == float('inf'):
+            batch_frames = ppgs.MAX_PREPROCESS_FRAMES
+        else:
+            batch_frames = max_frames
 
-        # Initialize multi-threaded dataloader
+        # Initialize dataloader that batches files in order of length
         dataloader = ppgs.data.loader(
             audio_files,
             features=['audio', 'length', 'audio_file'],
             num_workers=num_workers // 2,
-            max_frames=max_frames)
+            max_frames=max_frames,
+            batch_frames=batch_frames,
+            shuffle=False,
+            lengths=lengths)
 
         # Maintain file correspondence
         output_files = {
@@ -268,8 +447,14 @@ def from_files_to_files(
             checkpoint=checkpoint,
             save_workers=num_workers // 2,
             gpu=gpu,
-            legacy_mode=legacy_mode
-        )
+            legacy_mode=legacy_mode,
+            cache=cache,
+            manifest=manifest,
+            encoding=encoding,
+            container=container,
+            replicas=replicas,
+            threads=threads,
+            quantize=quantize)
 
 
 ###############################################################################
@@ -286,10 +471,23 @@ def from_dataloader(
     checkpoint: Union[str, bytes, os.PathLike] = None,
     save_workers: int = 1,
     gpu: Optional[int] = None,
-    legacy_mode: bool = False
+    legacy_mode: bool = False,
+    preprocess_workers: int = 1,
+    infer_workers: int = 1,
+    cache: bool = False,
+    manifest: Optional['ppgs.manifest.Manifest'] = None,
+    encoding: Optional[str] = None,
+    container: Optional['ppgs.container.Writer'] = None,
+    replicas: int = 0,
+    threads: Optional[int] = None,
+    quantize: Optional[str] = None
 ) -> None:
     """Infer ppgs from a dataloader yielding audio files
 
+    Feature extraction, inference, and saving run as pipelined stages of
+    worker threads joined by bounded queues (see ppgs.pipeline.run), so each
+    stage works on a different batch at the same time.
+
     Arguments
         dataloader
             A DataLoader object to do preprocessing for
@@ -306,30 +504,82 @@ def from_dataloader(
             The index of the GPU to use for inference
         legacy_mode
             Use legacy (unchunked) inference
+        preprocess_workers
+            The number of worker threads to use for feature extraction
+        infer_workers
+            The number of worker threads to use for inference. Workers
+            share one model from the registry, which stays in evaluation
+            mode, so any number of workers is safe.
+        cache
+            Reuse and store results in the on-disk PPG cache
+        manifest
+            Optional ppgs.manifest.Manifest in which to record saved outputs
+        encoding
+            Storage encoding of the output files. One of
+            ppgs.encoding.ENCODINGS, or None for dense float32.
+        container
+            Optional ppgs.container.Writer to append PPGs to instead of
+            saving separate files. Output filenames are used as keys.
+        replicas
+            Number of inference processes (see ppgs.replica.Pool). If
+            nonzero, feature extraction and inference run in the replicas
+            and infer_workers is ignored.
+        threads
+            Number of intra-op threads per replica
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
     """
-    # Setup multiprocessing
-    if save_workers == 0:
-        pool = contextlib.nullcontext()
-    else:
-        pool = mp.get_context('spawn').Pool(save_workers)
-
-    try:
-
-        # Setup progress bar
-        progress = torchutil.iterator(
-            range(0, len(dataloader.dataset)),
-            ppgs.CONFIG,
-            total=len(dataloader.dataset))
-
-        # Iterate over dataset
-        for audios, lengths, audio_files in dataloader:
-            frame_lengths = lengths // ppgs.HOPSIZE
-
-            # Preprocess
-            if representation == 'wav':
-                features = audios
-                attention_mask_lengths = lengths
-            else:
+    def preprocess(batch):
+        audios, lengths, audio_files = batch
+
+        # Maybe copy cached results and only infer the remainder
+        keys = [None] * len(audio_files)
+        hits = 0
+        if cache:
+            keys = [
+                ppgs.cache.key(
+                    file,
+                    representation,
+                    checkpoint,
+                    legacy_mode,
+                    quantize)
+                for file in audio_files]
+            misses = []
+            for i, (file, key) in enumerate(zip(audio_files, keys)):
+                if not ppgs.cache.copy(
+                    key,
+                    output_files[file],
+                    encoding,
+                    container
+                ):
+                    misses.append(i)
+                elif manifest is not None and container is None:
+                    manifest.record(file, output_files[file])
+            hits = len(audio_files) - len(misses)
+
+            # Pass the number of cache hits on to the progress bar
+            if not misses:
+                return hits
+
+            if len(misses) < len(audio_files):
+                audios, lengths = audios[misses], lengths[misses]
+                audio_files = [audio_files[i] for i in misses]
+                keys = [keys[i] for i in misses]
+                audios = audios[..., :lengths.max()]
+
+        frame_lengths = lengths // ppgs.HOPSIZE
+
+        # Replicas extract their own features
+        if pool is not None:
+            return audios, lengths, frame_lengths, audio_files, keys, hits
+
+        # Preprocess
+        if representation == 'wav':
+            features = audios
+            attention_mask_lengths = lengths
+        else:
+            with torch.inference_mode():
                 features = getattr(
                     ppgs.preprocess,
                     representation
@@ -337,58 +587,117 @@ def from_dataloader(
                     audios,
                     lengths,
                     gpu=gpu)
-                attention_mask_lengths = frame_lengths
+            attention_mask_lengths = frame_lengths
+
+        if features.requires_grad:
+            raise ValueError('All representations should be detached')
 
-            if features.requires_grad:
-                raise ValueError('All representations should be detached')
+        return (
+            features,
+            attention_mask_lengths,
+            frame_lengths,
+            audio_files,
+            keys,
+            hits)
+
+    def infer(item):
+        if isinstance(item, int):
+            return item
+        (
+            features,
+            attention_mask_lengths,
+            frame_lengths,
+            audio_files,
+            keys,
+            hits
+        ) = item
 
-            # Infer
+        # Infer
+        if pool is not None:
+            result = pool(features, attention_mask_lengths)
+        else:
             result = from_features(
                 features=features,
                 lengths=attention_mask_lengths,
                 representation=representation,
                 checkpoint=checkpoint,
                 gpu=gpu,
-                legacy_mode=legacy_mode)
+                legacy_mode=legacy_mode,
+                quantize=quantize)
 
-            # Get output filenames
-            filenames = [output_files[file] for file in audio_files]
+        return result.cpu(), frame_lengths.cpu(), audio_files, keys, hits
 
-            # Save to disk
-            if save_workers > 0:
+    def save(item):
+        if isinstance(item, int):
+            return item
+        result, frame_lengths, audio_files, keys, hits = item
 
-                # Asynchronous save
-                pool.starmap_async(
-                    ppgs.preprocess.save_masked,
-                    zip(result.cpu(), filenames, frame_lengths.cpu()))
-                while pool._taskqueue.qsize() > 100:
-                    time.sleep(1)
+        # Save to disk
+        for ppg_output, audio_file, new_length, key in zip(
+            result,
+            audio_files,
+            frame_lengths,
+            keys
+        ):
+            ppgs.preprocess.save_masked(
+                ppg_output,
+                output_files[audio_file],
+                new_length,
+                encoding,
+                container)
+
+            # Maybe cache
+            if key is not None:
+                ppgs.cache.save(key, ppg_output[..., :new_length])
+
+            # Maybe mark as complete
+            if manifest is not None and container is None:
+                manifest.record(audio_file, output_files[audio_file])
+
+        return len(audio_files) + hits
+
+    # Maybe start inference replicas
+    pool = None
+    if replicas:
+        pool = ppgs.replica.Pool(
+            replicas,
+            threads,
+            representation,
+            checkpoint,
+            gpu,
+            legacy_mode,
+            quantize)
+        infer_workers = replicas
+
+    # Setup progress bar
+    progress = torchutil.iterator(
+        range(0, len(dataloader.dataset)),
+        ppgs.CONFIG,
+        total=len(dataloader.dataset))
 
-            else:
+    try:
 
-                # Synchronous save
-                for ppg_output, filename, new_length in zip(
-                    result.cpu(),
-                    filenames,
-                    frame_lengths.cpu()
-                ):
-                    ppgs.preprocess.save_masked(
-                        ppg_output,
-                        filename,
-                        new_length)
+        # Iterate over dataset
+        for count in ppgs.pipeline.run(
+            dataloader,
+            [
+                (preprocess, preprocess_workers),
+                (infer, infer_workers),
+                (save, save_workers)
+            ]
+        ):
 
             # Increment by batch size
-            progress.update(len(audios))
+            progress.update(count)
 
     finally:
 
         # Close progress bar
         progress.close()
 
-        # Maybe shutdown multiprocessing
-        if save_workers > 0:
+        # Maybe stop replicas
+        if pool is not None:
             pool.close()
-            pool.join()
 
 
 ###############################################################################
@@ -401,74 +710,305 @@ def distance(
     ppgY: torch.Tensor,
     reduction: str = 'mean',
     normalize: bool = True,
-    exponent: float = ppgs.SIMILARITY_EXPONENT
+    exponent: float = ppgs.SIMILARITY_EXPONENT,
+    lengths: Optional[torch.Tensor] = None
 ) -> torch.Tensor:
     """Compute the pronunciation distance between two aligned PPGs
 
     Arguments
         ppgX
-            Input PPG X
-            shape=(len(ppgs.PHONEMES), frames)
+            Input PPG X. May be a ppgs.SparsePPG.
+            shape=(len(ppgs.PHONEMES), frames) or
+            (batch, len(ppgs.PHONEMES), frames)
         ppgY
-            Input PPG Y to compare with PPG X
-            shape=(len(ppgs.PHONEMES), frames)
+            Input PPG Y to compare with PPG X. Sparse if PPG X is sparse.
+            shape=(len(ppgs.PHONEMES), frames) or
+            (batch, len(ppgs.PHONEMES), frames)
         reduction
             Reduction to apply to the output. One of ['mean', 'none', 'sum'].
         normalize
             Apply similarity based normalization
         exponent
             Similarty exponent
+        lengths
+            Optional number of valid frames of each batch item. Frames past
+            each length are excluded from the reduction and zeroed when
+            reduction is 'none'.
+            shape=(batch,)
 
     Returns
         Normalized Jenson-shannon divergence between PPGs
+        shape=() or (batch,) for 'mean' and 'sum', and (frames,) or
+        (batch, frames) for 'none'
     """
-    # Handle numerical instability at boundaries
-    ppgX = torch.clamp(ppgX, 1e-8, 1 - 1e-8)
-    ppgY = torch.clamp(ppgY, 1e-8, 1 - 1e-8)
-    if normalize:
-        if (
-            not hasattr(distance, 'similarity_matrix') or
-            distance.device != ppgX.device
-        ):
-            distance.similarity_matrix = torch.load(
-                ppgs.SIMILARITY_MATRIX_PATH
-            ).to(device=ppgX.device, dtype=ppgX.dtype)
-            distance.device = ppgX.device
-        ppgX = torch.mm(distance.similarity_matrix.T ** exponent, ppgX).T
-        ppgY = torch.mm(distance.similarity_matrix.T ** exponent, ppgY).T
+    # Distance of each frame
+    # shape=(..., frames)
+    if isinstance(ppgX, ppgs.SparsePPG):
+        jsd = ppgs.sparse.frame_distance(ppgX, ppgY, normalize, exponent)
     else:
-        ppgX = ppgX.T
-        ppgY = ppgY.T
-
-    # Average in parameter space
-    log_average = torch.log((ppgX + ppgY) / 2)
-
-    # Compute KL divergences in both directions
-    kl_X = torch.nn.functional.kl_div(
-        log_average,
-        ppgX,
-        reduction='none')
-    kl_Y = torch.nn.functional.kl_div(
-        log_average,
-        ppgY,
-        reduction='none')
+        jsd = frame_distance(
+            project(ppgX, normalize, exponent),
+            project(ppgY, normalize, exponent))
 
-    # Average KL
-    average_kl = (kl_X + kl_Y) / 2
-    average_kl[average_kl < 0] = 0
-    jsd = torch.sqrt(average_kl)
-    jsd = jsd.sum(dim=1)
+    # Maybe mask padding
+    if lengths is not None:
+        mask = ppgs.model.transformer.mask_from_lengths(lengths.to(jsd.device))
+        mask = torch.nn.functional.pad(mask, (0, jsd.shape[-1] - mask.shape[-1]))
+        jsd = jsd * mask
 
     # Maybe reduce
     if reduction == 'mean':
-        return jsd.mean(dim=0)
+        if lengths is None:
+            return jsd.mean(dim=-1)
+        return jsd.sum(dim=-1) / lengths.to(jsd.device)
     elif reduction == 'none' or reduction is None:
         return jsd
     elif reduction == 'sum':
-        return jsd.sum(dim=0)
+        return jsd.sum(dim=-1)
     raise ValueError(f'Reduction method {reduction} not defined')
 
 
+def pairwise_distance(
+    ppgsX: torch.Tensor,
+    ppgsY: Optional[torch.Tensor] = None,
+    lengthsX: Optional[torch.Tensor] = None,
+    lengthsY: Optional[torch.Tensor] = None,
+    reduction: str = 'mean',
+    normalize: bool = True,
+    exponent: float = ppgs.SIMILARITY_EXPONENT,
+    max_bytes: Optional[int] = None
+) -> torch.Tensor:
+    """Compute the pronunciation distance between all pairs of aligned PPGs
+
+    Every PPG is projected through the similarity matrix once. Pairs are
+    then compared in blocks that fit within a memory budget. Each pair is
+    compared over the frames that are valid in both PPGs.
+
+    Arguments
+        ppgsX
+            Input PPGs X
+            shape=(N, len(ppgs.PHONEMES), frames)
+        ppgsY
+            Input PPGs Y to compare with PPGs X. Defaults to ppgsX.
+            shape=(M, len(ppgs.PHONEMES), frames)
+        lengthsX
+            Optional number of valid frames of each PPG in X
+            shape=(N,)
+        lengthsY
+            Optional number of valid frames of each PPG in Y
+            shape=(M,)
+        reduction
+            Reduction over frames. One of ['mean', 'sum'].
+        normalize
+            Apply similarity based normalization
+        exponent
+            Similarty exponent
+        max_bytes
+            Approximate memory budget of each block of pairs.
+            Defaults to ppgs.MAX_DISTANCE_BYTES.
+
+    Returns
+        Normalized Jenson-shannon divergence between each pair of PPGs
+        shape=(N, M)
+    """
+    if reduction not in ['mean', 'sum']:
+        raise ValueError(f'Reduction method {reduction} not defined')
+    if ppgsY is None:
+        ppgsY, lengthsY = ppgsX, lengthsX
+    if max_bytes is None:
+        max_bytes = ppgs.MAX_DISTANCE_BYTES
+
+    # Compare overlapping frames
+    frames = min(ppgsX.shape[-1], ppgsY.shape[-1])
+    if lengthsX is None:
+        lengthsX = torch.full((len(ppgsX),), ppgsX.shape[-1])
+    if lengthsY is None:
+        lengthsY = torch.full((len(ppgsY),), ppgsY.shape[-1])
+    lengthsX = lengthsX.to(ppgsX.device).clamp(max=frames)
+    lengthsY = lengthsY.to(ppgsX.device).clamp(max=frames)
+
+    # Project once
+    ppgsX = project(ppgsX[..., :frames], normalize, exponent)
+    ppgsY = project(ppgsY[..., :frames].to(ppgsX.device), normalize, exponent)
+
+    # Choose block size from the size of the intermediate tensors of a pair
+    pair_bytes = 4 * ppgsX.shape[-2] * frames * ppgsX.element_size()
+    pairs = max(1, max_bytes // pair_bytes)
+    columns = min(len(ppgsY), pairs)
+    rows = max(1, pairs // columns)
+
+    # Compare blocks of pairs
+    steps = torch.arange(frames, device=ppgsX.device)
+    output = ppgsX.new_empty((len(ppgsX), len(ppgsY)))
+    for i in range(0, len(ppgsX), rows):
+        for j in range(0, len(ppgsY), columns):
+
+            # shape=(rows, columns, frames)
+            jsd = frame_distance(
+                ppgsX[i:i + rows, None],
+                ppgsY[None, j:j + columns])
+
+            # Mask frames that are not valid in both PPGs
+            lengths = torch.minimum(
+                lengthsX[i:i + rows, None],
+                lengthsY[None, j:j + columns])
+            block = (jsd * (steps < lengths[..., None])).sum(dim=-1)
+            if reduction == 'mean':
+                block = block / lengths
+            output[i:i + rows, j:j + columns] = block
+
+    return output
+
+
+def dtw_distance(
+    ppgX: torch.Tensor,
+    ppgY: torch.Tensor,
+    lengthsX: Optional[torch.Tensor] = None,
+    lengthsY: Optional[torch.Tensor] = None,
+    band: Optional[int] = None,
+    reduction: str = 'mean',
+    normalize: bool = True,
+    exponent: float = ppgs.SIMILARITY_EXPONENT,
+    max_bytes: Optional[int] = None
+) -> Tuple[torch.Tensor, Union[torch.Tensor, List[torch.Tensor]]]:
+    """Compute the pronunciation distance between two unaligned PPGs
+
+    PPGs are aligned with dynamic time warping using the normalized
+    Jenson-Shannon divergence between frames as the local cost. Cells of
+    each anti-diagonal of the cost matrix are updated in parallel.
+
+    Arguments
+        ppgX
+            Input PPG X
+            shape=(len(ppgs.PHONEMES), framesX) or
+            (batch, len(ppgs.PHONEMES), framesX)
+        ppgY
+            Input PPG Y to compare with PPG X
+            shape=(len(ppgs.PHONEMES), framesY) or
+            (batch, len(ppgs.PHONEMES), framesY)
+        lengthsX
+            Optional number of valid frames of each PPG in X
+            shape=(batch,)
+        lengthsY
+            Optional number of valid frames of each PPG in Y
+            shape=(batch,)
+        band
+            Optional Sakoe-Chiba band radius in frames of Y around the
+            diagonal scaled to the lengths of each pair. Widened to at least
+            the ceiling of the slope of that diagonal, which is the narrowest
+            band that connects the first and last frames of each pair.
+        reduction
+            Reduction over the alignment path. One of ['mean', 'sum'].
+        normalize
+            Apply similarity based normalization
+        exponent
+            Similarty exponent
+        max_bytes
+            Approximate memory budget used to compute the cost matrix.
+            Defaults to ppgs.MAX_DISTANCE_BYTES.
+
+    Returns
+        distance
+            Normalized Jenson-shannon divergence along the alignment path
+            shape=() or (batch,)
+        path
+            Indices into X and Y of each aligned frame pair, from the first
+            to the last frame. A list of paths for batched inputs.
+            shape=(2, steps)
+    """
+    if reduction not in ['mean', 'sum']:
+        raise ValueError(f'Reduction method {reduction} not defined')
+    if max_bytes is None:
+        max_bytes = ppgs.MAX_DISTANCE_BYTES
+    unbatched = ppgX.dim() == 2
+    if unbatched:
+        ppgX, ppgY = ppgX[None], ppgY[None]
+    device = ppgX.device
+    batch, channels, framesX = ppgX.shape
+    framesY = ppgY.shape[-1]
+    if lengthsX is None:
+        lengthsX = torch.full((batch,), framesX)
+    if lengthsY is None:
+        lengthsY = torch.full((batch,), framesY)
+    lengthsX, lengthsY = lengthsX.to(device), lengthsY.to(device)
+
+    # Project once
+    ppgX = project(ppgX.to(torch.float32), normalize, exponent)
+    ppgY = project(ppgY.to(device, torch.float32), normalize, exponent)
+
+    # Compute cost matrix in blocks of rows
+    # shape=(batch, framesX, framesY)
+    cost = ppgX.new_empty((batch, framesX, framesY))
+    rows = max(1, max_bytes // (4 * batch * channels * framesY * 4))
+    x = ppgX.transpose(1, 2)[..., None]
+    for i in range(0, framesX, rows):
+        cost[:, i:i + rows] = frame_distance(x[:, i:i + rows], ppgY[:, None])
+
+    # Exclude padding and cells outside of the band
+    i = torch.arange(framesX, device=device)[None, :, None]
+    j = torch.arange(framesY, device=device)[None, None]
+    valid = (i < lengthsX[:, None, None]) & (j < lengthsY[:, None, None])
+    if band is not None:
+        slope = (
+            (lengthsY - 1).clamp(min=0) / (lengthsX - 1).clamp(min=1)
+        )[:, None, None]
+        radius = slope.ceil().clamp(min=band)
+        valid &= (i * slope - j).abs() <= radius
+    cost = cost.masked_fill(~valid, float('inf'))
+
+    # Accumulate costs along anti-diagonals
+    # Steps are 0 (diagonal), 1 (from previous frame of X), and 2 (from
+    # previous frame of Y)
+    total = cost.new_full((batch, framesX + 1, framesY + 1), float('inf'))
+    total[:, 0, 0] = 0.
+    steps = torch.zeros(
+        (batch, framesX + 1, framesY + 1),
+        dtype=torch.uint8,
+        device=device)
+    for k in range(2, framesX + framesY + 1):
+        i = torch.arange(
+            max(1, k - framesY),
+            min(framesX, k - 1) + 1,
+            device=device)
+        j = k - i
+        best, step = torch.stack((
+            total[:, i - 1, j - 1],
+            total[:, i - 1, j],
+            total[:, i, j - 1])).min(dim=0)
+        total[:, i, j] = cost[:, i - 1, j - 1] + best
+        steps[:, i, j] = step.to(torch.uint8)
+    indices = torch.arange(batch, device=device)
+    distance = total[indices, lengthsX, lengthsY]
+
+    # Backtrack all paths at once
+    i, j = lengthsX.clone(), lengthsY.clone()
+    active = torch.ones(batch, dtype=torch.bool, device=device)
+    points, masks = [], []
+    while active.any():
+        points.append(torch.stack((i - 1, j - 1)))
+        masks.append(active)
+        step = steps[indices, i, j]
+
+        # Only one move is possible along the first frame of X or Y
+        step = torch.where(i == 1, 2, step)
+        step = torch.where(j == 1, 1, step)
+
+        active = active & ~((i == 1) & (j == 1))
+        i = torch.where(active & (step != 2), i - 1, i)
+        j = torch.where(active & (step != 1), j - 1, j)
+    points, masks = torch.stack(points, dim=-1), torch.stack(masks, dim=-1)
+    paths = [
+        points[:, b, masks[b]].flip(-1) for b in range(batch)]
+
+    # Maybe average over the path
+    if reduction == 'mean':
+        distance = distance / masks.sum(dim=-1)
+
+    if unbatched:
+        return distance[0], paths[0]
+    return distance, paths
+
+
 ###############################################################################
 # PPG interpolation
 ###############################################################################
@@ -483,10 +1023,10 @@ def interpolate(
 
     Arguments
         ppgX
-            Input PPG X
+            Input PPG X. May be a ppgs.SparsePPG.
             shape=(len(ppgs.PHONEMES), frames)
         ppgY
-            Input PPG Y
+            Input PPG Y. Sparse if PPG X is sparse.
             shape=(len(ppgs.PHONEMES), frames)
         interp
             Interpolation values
@@ -496,6 +1036,8 @@ def interpolate(
         Interpolated PPGs
         shape=(len(ppgs.PHONEMES), frames)
     """
+    if isinstance(ppgX, ppgs.SparsePPG):
+        return ppgs.sparse.interpolate(ppgX, ppgY, interp)
     return (1. - interp) * ppgX + interp * ppgY
 
 
@@ -535,9 +1077,7 @@ def sparsify(
         values, indices = ppg.topk(
             threshold,
             dim=-2)
-        ppg.zero_()
-        for t in range(ppg.shape[-1]):
-            ppg[:, indices[..., t], t] = values[..., t]
+        ppg = torch.zeros_like(ppg).scatter_(-2, indices, values)
 
     # Renormalize after sparsification
     return torch.softmax(torch.log(ppg + 1e-8), -2)
@@ -554,40 +1094,37 @@ def infer(
     representation='mel',
     checkpoint=None,
     softmax=True,
-    legacy_mode=False):
-    """Perform model inference"""
+    legacy_mode=False,
+    backend=None,
+    quantize=None):
+    """Perform model inference
+
+    The backend is one of ppgs.model.backend.BACKENDS and defaults to
+    ppgs.BACKEND. The optional quantization mode is one of
+    ppgs.model.quantization.QUANTIZATIONS. Backends other than 'eager' and
+    quantized models only support CPU inference. Features are cast to and
+    inference runs at the precision of ppgs.PRECISION for their device.
+    """
 
     # Skip inference if we want input representations
     if ppgs.REPRESENTATION_KIND == 'latents':
         return features
 
-    # Maybe cache model
-    if not hasattr(infer, 'models'): infer.models = {}
-    if (
-        not hasattr(infer, 'model') or
-        infer.checkpoint != checkpoint or
-        infer.device_type != features.device.type or
-        infer.representation != representation
-    ):
-        model_key = str(representation) + str(checkpoint)
-        if model_key not in infer.models:
-            infer.models[model_key] = ppgs.load.model(
-                checkpoint=checkpoint,
-                representation=representation)
-        infer.model = infer.models[model_key]
-        infer.checkpoint = checkpoint
-        infer.representation = representation
-        infer.device_type = features.device.type
-
-    # Move model to correct device (no-op if devices are the same)
-    infer.model = infer.model.to(features.device)
+    # Load and cache model
+    model = cached_model(
+        features.device,
+        representation,
+        checkpoint,
+        backend,
+        quantize)
 
     # Infer
-    with torchutil.inference.context(infer.model):
-        if isinstance(infer.model, ppgs.model.Transformer):
-            logits = infer.model(features, lengths, legacy_mode=legacy_mode)
+    features = ppgs.precision.cast(features)
+    with ppgs.precision.inference(model, features.device):
+        if isinstance(model, ppgs.model.Transformer):
+            logits = model(features, lengths, legacy_mode=legacy_mode)
         else:
-            logits = infer.model(features, lengths)
+            logits = model(features, lengths)
 
         # Postprocess
         if softmax:
@@ -596,6 +1133,82 @@ def infer(
         return logits
 
 
+def cached_model(
+    device,
+    representation='mel',
+    checkpoint=None,
+    backend=None,
+    quantize=None):
+    """Get a model from the model registry, loading it on first use"""
+    if backend is None:
+        backend = ppgs.BACKEND
+    if backend != 'eager' and device.type != 'cpu':
+        raise ValueError(f'Backend {backend} only supports CPU inference')
+    if quantize is not None and device.type != 'cpu':
+        raise ValueError('Quantized models only support CPU inference')
+    return ppgs.registry.get(
+        ('model', str(representation), str(checkpoint), backend, quantize),
+        device,
+        lambda: ppgs.load.model(
+            checkpoint=checkpoint,
+            representation=representation,
+            backend=backend,
+            quantize=quantize))
+
+
+def frame_distance(ppgX, ppgY):
+    """Jenson-Shannon divergence of each frame of projected PPGs
+
+    Arguments
+        ppgX
+            Projected PPG X
+            shape=(..., len(ppgs.PHONEMES), frames)
+        ppgY
+            Projected PPG Y, broadcastable with ppgX
+            shape=(..., len(ppgs.PHONEMES), frames)
+
+    Returns
+        shape=(..., frames)
+    """
+    # Average in parameter space
+    log_average = torch.log((ppgX + ppgY) / 2)
+
+    # Compute KL divergences in both directions
+    kl_X = torch.nn.functional.kl_div(
+        log_average,
+        ppgX,
+        reduction='none')
+    kl_Y = torch.nn.functional.kl_div(
+        log_average,
+        ppgY,
+        reduction='none')
+
+    # Average KL
+    average_kl = ((kl_X + kl_Y) / 2).clamp(min=0)
+    return torch.sqrt(average_kl).sum(dim=-2)
+
+
+def long_form_supported(representation, legacy_mode):
+    """Whether long files can be inferred in windows with ppgs.longform"""
+    return (
+        (representation or ppgs.REPRESENTATION) == 'mel' and
+        ppgs.REPRESENTATION_KIND == 'ppg' and
+        ppgs.FRONTEND is None and
+        not legacy_mode)
+
+
+def project(ppg, normalize=True, exponent=ppgs.SIMILARITY_EXPONENT):
+    """Prepare a PPG for distance computation
+
+    Clamps probabilities for numerical stability at boundaries and maybe
+    applies similarity based normalization.
+    """
+    ppg = torch.clamp(ppg, 1e-8, 1 - 1e-8)
+    if not normalize:
+        return ppg
+    return torch.matmul(similarity(exponent, ppg.dtype, ppg.device), ppg)
+
+
 def resample(
     audio: torch.Tensor,
     sample_rate: Union[int, float],
@@ -619,3 +1232,23 @@ def representation_file_extension():
             return f'-{ppgs.REPRESENTATION}-ppg.pt'
         else:
             return f'-{ppgs.REPRESENTATION}.pt'
+
+
+def similarity(
+    exponent: float = ppgs.SIMILARITY_EXPONENT,
+    dtype: torch.dtype = torch.float32,
+    device: Union[str, torch.device] = 'cpu'
+) -> torch.Tensor:
+    """Get the transposed phoneme similarity matrix raised to an exponent
+
+    Cached per exponent, dtype, and device.
+    """
+    key = (exponent, dtype, str(device))
+    if not hasattr(similarity, 'cache'):
+        similarity.matrix = torch.load(ppgs.SIMILARITY_MATRIX_PATH)
+        similarity.cache = {}
+    if key not in similarity.cache:
+        similarity.cache[key] = (
+            similarity.matrix.T.to(torch.float32) ** exponent
+        ).to(device=device, dtype=dtype)
+    return similarity.cache[key]
@@ -6,7 +6,6 @@ from pathlib import Path
 import numpy as np
 import pypar
 import torch
-import torchaudio
 
 import ppgs
 
@@ -55,17 +54,26 @@ class Dataset(torch.utils.data.Dataset):
         name_or_files,
         partition=None,
         features=['audio'],
-        max_frames=ppgs.MAX_TRAINING_FRAMES):
+        max_frames=ppgs.MAX_TRAINING_FRAMES,
+        lengths=None):
         self.features = features
         self.metadata = Metadata(
             name_or_files,
             partition=partition,
-            max_frames=max_frames)
+            max_frames=max_frames,
+            lengths=lengths)
         self.cache = self.metadata.cache
         self.stems = self.metadata.stems
         self.audio_files = self.metadata.audio_files
         self.lengths = self.metadata.lengths
 
+        # Maybe read features from a sharded container
+        self.container = None
+        if self.cache is not None:
+            shards = self.cache / 'shards'
+            if (shards / ppgs.container.INDEX_FILE).exists():
+                self.container = ppgs.container.Reader(shards)
+
     def __getitem__(self, index):
         """Retrieve the indexth item"""
         stem = self.stems[index]
@@ -118,8 +126,11 @@ class Dataset(torch.utils.data.Dataset):
             # Add input representation
             else:
                # print(stem,torch.load(self.cache / f'{stem}-{feature}.pt').shape)
-                feature_values.append(
-                    torch.load(self.cache / f'{stem}-{feature}.pt'))
+                key = f'{stem}-{feature}.pt'
+                if self.container is not None and key in self.container:
+                    feature_values.append(self.container[key])
+                else:
+                    feature_values.append(torch.load(self.cache / key))
         return feature_values
 
     def __len__(self):
@@ -160,8 +171,15 @@ class Metadata:
         name_or_files,
         partition=None,
         overwrite_cache=False,
-        max_frames=ppgs.MAX_TRAINING_FRAMES):
-        """Create a metadata object for the given dataset or sources"""
+        max_frames=ppgs.MAX_TRAINING_FRAMES,
+        lengths=None):
+        """Create a metadata object for the given dataset or sources
+
+        Lengths of audio files in the optional lengths dictionary, which maps
+        audio filenames to lengths in frames, are not recomputed.
+        """
+        known = {} if lengths is None else {
+            str(file): length for file, length in lengths.items()}
         lengths = {}
 
         # Create dataset from string identifier
@@ -201,14 +219,12 @@ class Metadata:
             self.cache = None
 
         if not lengths:
-            t = 0
             # Compute length in frames
             for stem, audio_file in zip(self.stems, self.audio_files):
-                info = torchaudio.info(audio_file)
-               
-                length = int(
-                    info.num_frames * (ppgs.SAMPLE_RATE / info.sample_rate)
-                ) // ppgs.HOPSIZE
+                if str(audio_file) in known:
+                    length = known[str(audio_file)]
+                else:
+                    length = ppgs.load.frames(audio_file)
 
                 # Omit if length is too long to avoid OOM
                 if length <= max_frames:
@@ -216,12 +232,14 @@ class Metadata:
                 else:
                     warnings.warn(
                         f'File {audio_file} of length {length} '
-                        f'exceeds max_frames of {max_frames}. Skipping.')
+                        f'exceeds max_frames of {max_frames}. Skipping. '
+                        'Use ppgs.longform to infer long files.')
 
             # Maybe cache lengths
             if self.cache is not None:
                 with open(lengths_file, 'w+') as file:
                     json.dump(lengths, file)
+
         # Match ordering
         (
             self.audio_files,
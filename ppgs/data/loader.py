@@ -22,17 +22,30 @@ def loader(
     partition=None,
     features=TRAINING_FEATURES,
     num_workers=ppgs.NUM_WORKERS,
-    max_frames=ppgs.MAX_TRAINING_FRAMES):
-    """Retrieve a data loader"""
+    max_frames=ppgs.MAX_TRAINING_FRAMES,
+    batch_frames=None,
+    shuffle=True,
+    lengths=None):
+    """Retrieve a data loader
+
+    Files longer than max_frames are skipped. Batches are capped at
+    batch_frames frames, which defaults to max_frames. If shuffle is False,
+    batches are sorted by length. The optional lengths dictionary maps
+    audio filenames to precomputed lengths in frames.
+    """
     # Initialize dataset
     dataset = ppgs.data.Dataset(
         dataset_or_files,
         partition,
         features,
-        max_frames)
+        max_frames,
+        lengths)
 
     # Initialize sampler
-    sampler = ppgs.data.Sampler(dataset, max_frames)
+    sampler = ppgs.data.Sampler(
+        dataset,
+        max_frames if batch_frames is None else batch_frames,
+        shuffle)
 
     # Initialize dataloader
     return torch.utils.data.DataLoader(
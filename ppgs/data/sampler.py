@@ -32,8 +32,13 @@ def sampler(dataset, partition):
 
 class Sampler(torch.utils.data.sampler.BatchSampler):
 
-    def __init__(self, dataset, max_frames=ppgs.MAX_TRAINING_FRAMES):
+    def __init__(
+        self,
+        dataset,
+        max_frames=ppgs.MAX_TRAINING_FRAMES,
+        shuffle=True):
         self.max_frames = max_frames
+        self.shuffle = shuffle
         self.epoch = 0
         self.buckets = dataset.buckets()
 
@@ -54,8 +59,9 @@ class Sampler(torch.utils.data.sampler.BatchSampler):
         for bucket in self.buckets:
 
             # Shuffle bucket
-            bucket = bucket[
-                torch.randperm(len(bucket), generator=generator).tolist()]
+            if self.shuffle:
+                bucket = bucket[
+                    torch.randperm(len(bucket), generator=generator).tolist()]
 
             # Variable batch size
             batch = []
@@ -76,6 +82,10 @@ class Sampler(torch.utils.data.sampler.BatchSampler):
             if batch:
                 batches.append(batch)
 
+        # Keep batches in order of length
+        if not self.shuffle:
+            return batches
+
         # Shuffle
         return [
             batches[i] for i in
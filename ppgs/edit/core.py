@@ -34,6 +34,9 @@ def reallocate(
     Returns
         Edited PPG
     """
+    if isinstance(ppg, ppgs.SparsePPG):
+        return ppgs.sparse.reallocate(ppg, source, target, value)
+
     # Get indices corresponding to source and target
     source_index = ppgs.PHONEMES.index(source)
     target_index = ppgs.PHONEMES.index(target)
@@ -207,6 +210,9 @@ def swap(ppg: torch.Tensor, phonemeA: str, phonemeB: str) -> torch.Tensor:
     Returns
         Edited PPG
     """
+    if isinstance(ppg, ppgs.SparsePPG):
+        return ppgs.sparse.swap(ppg, phonemeA, phonemeB)
+
     # Get indices of phoneme probabilities to swap
     indexA = ppgs.PHONEMES.index(phonemeA)
     indexB = ppgs.PHONEMES.index(phonemeB)
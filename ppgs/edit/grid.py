@@ -22,6 +22,9 @@ def sample(ppg: torch.Tensor, grid: torch.Tensor) -> torch.Tensor:
     Returns
         Interpolated PPG
     """
+    if isinstance(ppg, ppgs.SparsePPG):
+        return ppgs.sparse.sample(ppg, grid)
+
     # Get interpolation residuals
     interp = grid - torch.floor(grid)
 
@@ -106,6 +109,26 @@ def from_alignments(
     return indices
 
 
+def from_path(path: torch.Tensor) -> torch.Tensor:
+    """Create time-stretch grid from a dynamic time warping path
+
+    Arguments
+        path
+            Alignment path returned by ppgs.dtw_distance(ppgX, ppgY)
+            shape=(2, steps)
+
+    Returns
+        Grid for time-stretching ppgX to the length of ppgY. Each frame of
+        ppgY maps to the average index of the frames of ppgX aligned to it.
+    """
+    length = int(path[1].max()) + 1
+    totals = torch.zeros(length, dtype=torch.float, device=path.device)
+    totals.index_add_(0, path[1], path[0].to(torch.float))
+    counts = torch.zeros(length, dtype=torch.float, device=path.device)
+    counts.index_add_(0, path[1], torch.ones_like(totals[path[1]]))
+    return totals / counts
+
+
 def of_length(ppg: torch.Tensor, length: int) -> torch.Tensor:
     """Create time-stretch grid to resample PPG to a specified length
 
@@ -0,0 +1,93 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Supported PPG storage encodings
+ENCODINGS = ['float32', 'float16', 'uint8', 'topk']
+
+
+###############################################################################
+# Compact PPG storage encodings
+###############################################################################
+
+
+def encode(ppg, encoding=None, k=None):
+    """Encode a PPG for storage
+
+    Arguments
+        ppg
+            Phonetic posteriorgram
+            shape=(len(ppgs.PHONEMES), frames)
+        encoding
+            One of ppgs.encoding.ENCODINGS, or None to store the tensor
+            unchanged. 'float32' stores a single-precision dense tensor.
+            'float16' stores a half-precision dense tensor.
+            'uint8' stores each frame quantized to 256 levels between zero
+            and the maximum probability of the frame.
+            'topk' stores the indices and half-precision values of the k most
+            probable phonemes in each frame.
+        k
+            Number of phonemes kept per frame by 'topk'.
+            Defaults to ppgs.ENCODING_TOPK.
+
+    Returns
+        A tensor (None, 'float32', and 'float16') or a dictionary of tensors
+    """
+    ppg = ppg.detach()
+    if encoding is None:
+        return ppg
+    if encoding == 'float32':
+        return ppg.to(torch.float32)
+    if encoding == 'float16':
+        return ppg.to(torch.float16)
+    if encoding == 'uint8':
+        ppg = ppg.to(torch.float32)
+        scale = ppg.amax(dim=-2, keepdim=True).clamp(min=1e-8)
+        return {
+            'encoding': encoding,
+            'values': torch.round(ppg / scale * 255).to(torch.uint8),
+            'scale': scale.to(torch.float16)}
+    if encoding == 'topk':
+        if k is None:
+            k = ppgs.ENCODING_TOPK
+        values, indices = ppg.topk(min(k, ppg.shape[-2]), dim=-2)
+        return {
+            'encoding': encoding,
+            'channels': ppg.shape[-2],
+            'indices': indices.to(torch.uint8),
+            'values': values.to(torch.float16)}
+    raise ValueError(f'Encoding {encoding} is not defined')
+
+
+def decode(encoded):
+    """Decode a stored PPG to a dense float32 tensor
+
+    Arguments
+        encoded
+            The output of ppgs.encoding.encode
+
+    Returns
+        Phonetic posteriorgram
+        shape=(len(ppgs.PHONEMES), frames)
+    """
+    if isinstance(encoded, torch.Tensor):
+        return encoded.to(torch.float32)
+    encoding = encoded['encoding']
+    if encoding == 'uint8':
+        return (
+            encoded['values'].to(torch.float32) / 255 *
+            encoded['scale'].to(torch.float32))
+    if encoding == 'topk':
+        indices = encoded['indices'].to(torch.long)
+        ppg = torch.zeros(
+            indices.shape[:-2] + (encoded['channels'], indices.shape[-1]),
+            dtype=torch.float32,
+            device=indices.device)
+        return ppg.scatter_(-2, indices, encoded['values'].to(torch.float32))
+    raise ValueError(f'Encoding {encoding} is not defined')
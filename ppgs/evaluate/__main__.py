@@ -27,6 +27,16 @@ def parse_args():
         '--gpu',
         type=int,
         help='The index of the GPU to use for evaluation')
+    parser.add_argument(
+        '--quantize',
+        choices=ppgs.model.quantization.QUANTIZATIONS,
+        help='Also evaluate an int8-quantized model and report the change '
+             'in each metric')
+    parser.add_argument(
+        '--precision',
+        choices=ppgs.precision.PRECISIONS,
+        help='Evaluate at this precision and report the change in each '
+             'metric from float32')
 
     return parser.parse_args()
 
@@ -13,15 +13,54 @@ import ppgs
 
 
 @torchutil.notify('evaluate')
-def datasets(datasets, gpu=None, checkpoint=None):
-    """Perform evaluation"""
-    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
-
+def datasets(
+    datasets,
+    gpu=None,
+    checkpoint=None,
+    quantize=None,
+    precision=None):
+    """Perform evaluation
+
+    If a quantization mode or a precision (one of
+    ppgs.precision.PRECISIONS) is given, the full-precision model is
+    evaluated in float32 as well and the change in each metric is saved
+    under 'regression'.
+    """
     # Get model checkpoint
     if checkpoint is None:
         checkpoint = torchutil.checkpoint.latest_path(
             ppgs.RUNS_DIR / ppgs.CONFIG)
 
+    # Evaluate
+    with ppgs.precision.using(precision):
+        results = evaluate(datasets, gpu, checkpoint, quantize)
+
+    # Measure accuracy cost of quantization and reduced precision
+    if quantize is not None or precision is not None:
+        with ppgs.precision.using('float32'):
+            reference = evaluate(datasets, gpu, checkpoint)
+        results['regression'] = {
+            key: {
+                metric: value - reference[key][metric]
+                for metric, value in results[key].items()
+                if isinstance(value, float)}
+            for key in reference}
+
+    # Make output directory
+    directory = ppgs.EVAL_DIR / ppgs.CONFIG
+    directory.mkdir(exist_ok=True, parents=True)
+
+    # Save to disk
+    name = '-'.join(
+        ['overall'] +
+        [mode for mode in (quantize, precision) if mode is not None])
+    save(results, name, directory)
+
+
+def evaluate(datasets, gpu=None, checkpoint=None, quantize=None):
+    """Evaluate a checkpoint on the test partitions of datasets"""
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+
     # Containers for results
     results = {}
 
@@ -52,7 +91,8 @@ def datasets(datasets, gpu=None, checkpoint=None):
                 lengths,
                 checkpoint=checkpoint,
                 gpu=gpu,
-                softmax=False)
+                softmax=False,
+                quantize=quantize)
 
             # Update metrics
             indices = indices.to(device)
@@ -61,12 +101,7 @@ def datasets(datasets, gpu=None, checkpoint=None):
         results[dataset] = dataset_metrics()
     results['aggregate'] = aggregate_metrics()
 
-    # Make output directory
-    directory = ppgs.EVAL_DIR / ppgs.CONFIG
-    directory.mkdir(exist_ok=True, parents=True)
-
-    # Save to disk
-    save(results, f'overall', directory)
+    return results
 
 
 ###############################################################################
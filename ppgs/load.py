@@ -1,7 +1,9 @@
 import json
+import os
 from pathlib import Path
 
 import huggingface_hub
+import numpy as np
 import torch
 import torchutil
 import torchaudio
@@ -30,11 +32,34 @@ def audio(file):
     return ppgs.resample(audio, sample_rate)
 
 
-def model(checkpoint=None, representation=None):
-    """Load a model"""
+def frames(file):
+    """Get the number of PPG frames of an audio file from its header
+
+    Matches the number of frames of the audio after ppgs.resample.
+    """
+    info = torchaudio.info(file)
+    samples = -(-info.num_frames * ppgs.SAMPLE_RATE // info.sample_rate)
+    return samples // ppgs.HOPSIZE
+
+
+def model(checkpoint=None, representation=None, backend=None, quantize=None):
+    """Load a model
+
+    Arguments
+        checkpoint
+            The checkpoint file
+        representation
+            The input representation of the model
+        backend
+            The inference backend. One of ppgs.model.backend.BACKENDS.
+            Defaults to ppgs.BACKEND.
+        quantize
+            Optional int8 quantization mode. One of
+            ppgs.model.quantization.QUANTIZATIONS.
+    """
     if representation is not None:
         if representation == 'w2v2fb':
-            checkpoint = huggingface_hub.hf_hub_download(
+            checkpoint = hub_checkpoint(
                 'CameronChurchwell/ppgs',
                 'w2v2fb-425k.pt')
             conf = vars(ppgs.config.w2v2fb)
@@ -58,9 +83,7 @@ def model(checkpoint=None, representation=None):
     # Maybe download from HuggingFace
     if checkpoint is None and ppgs.LOCAL_CHECKPOINT is None:
         if ppgs.REPRESENTATION == 'mel' or ppgs.REPRESENTATION is None:
-            checkpoint = huggingface_hub.hf_hub_download(
-                'taisa1/ppgs-ja',
-                'mel_ja.pt')
+            checkpoint = hub_checkpoint('taisa1/ppgs-ja', 'mel_ja.pt')
         else:
             raise ValueError(
                 f'No default checkpoints exist for '
@@ -69,14 +92,98 @@ def model(checkpoint=None, representation=None):
         checkpoint = ppgs.LOCAL_CHECKPOINT
 
     # Load from checkpoint
-    state_dict = torch.load(checkpoint, map_location='cpu')
+    state_dict = weights(checkpoint)
     if 'model' in state_dict:
         state_dict = state_dict['model']
-    model.load_state_dict(state_dict)
+    try:
+
+        # Use mapped weights in place instead of copying them
+        model.load_state_dict(state_dict, assign=ppgs.CHECKPOINT_MMAP)
+
+    except TypeError:
+
+        # Versions of torch before 2.1 always copy
+        model.load_state_dict(state_dict)
+
+    # Maybe quantize
+    if quantize is not None:
+        model = ppgs.model.quantize(model, quantize)
+
+    # Maybe compile
+    if backend is None:
+        backend = ppgs.BACKEND
+    if backend == 'onnx' and quantize is not None:
+        raise ValueError('Quantized models cannot be exported to onnx')
+    if backend != 'eager':
+        model.eval()
+        model.backend = ppgs.model.Backend(model, backend)
 
     return model
 
 
+def hub_checkpoint(repo_id, filename):
+    """Resolve a HuggingFace checkpoint to a local file
+
+    Resolved files are recorded in ppgs.CHECKPOINT_INDEX_FILE, so that only
+    the first call on a host contacts the hub.
+    """
+    key = f'{repo_id}/{filename}'
+
+    # Load index
+    try:
+        with open(ppgs.CHECKPOINT_INDEX_FILE) as file:
+            index = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+
+    # Maybe use previously resolved file
+    if key in index and Path(index[key]).is_file():
+        return index[key]
+
+    # Download
+    path = huggingface_hub.hf_hub_download(repo_id, filename)
+
+    # Update index atomically, so concurrent processes never read a partial
+    # index
+    index[key] = str(path)
+    ppgs.CHECKPOINT_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temporary = ppgs.CHECKPOINT_INDEX_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporary, 'w') as file:
+        json.dump(index, file, indent=4)
+    os.replace(temporary, ppgs.CHECKPOINT_INDEX_FILE)
+
+    return path
+
+
+def ppg(file, device='cpu'):
+    """Load a PPG saved with any encoding as a dense float32 tensor
+
+    .npy files written by ppgs.longform are memory-mapped.
+    """
+    if Path(file).suffix == '.npy':
+        return torch.from_numpy(np.load(file, mmap_mode='c')).to(device)
+    return ppgs.encoding.decode(torch.load(file, map_location=device))
+
+
+def weights(checkpoint):
+    """Load the tensors of a checkpoint onto the CPU
+
+    .safetensors files (pip install ppgs[safetensors]) are read from a memory
+    map. If ppgs.CHECKPOINT_MMAP is True, other checkpoints saved in the
+    default zipfile format of torch.save are memory-mapped instead of copied.
+    """
+    if Path(checkpoint).suffix == '.safetensors':
+        import safetensors.torch
+        return safetensors.torch.load_file(checkpoint, device='cpu')
+    if ppgs.CHECKPOINT_MMAP:
+        try:
+            return torch.load(checkpoint, map_location='cpu', mmap=True)
+        except (RuntimeError, TypeError):
+            # Legacy checkpoint format or torch before 2.1
+            pass
+    return torch.load(checkpoint, map_location='cpu')
+
+
 def partition(dataset):
     """Load partitions for dataset"""
     with open(ppgs.PARTITION_DIR / f'{dataset}.json') as file:
@@ -0,0 +1,270 @@
+import math
+import os
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torchaudio
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Reflection padding applied to each end of the audio before the STFT
+PADDING = (ppgs.NUM_FFT - ppgs.HOPSIZE) // 2
+
+# Seconds of extra audio read on each side of a window so that resampling
+# filters see the same samples as when resampling the whole file
+RESAMPLE_MARGIN = .05
+
+
+###############################################################################
+# Long-form inference
+###############################################################################
+
+
+def from_file(
+    file: Union[str, bytes, os.PathLike],
+    checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+    gpu: Optional[int] = None,
+    window_frames: Optional[int] = None,
+    quantize: Optional[str] = None
+) -> Iterator[Tuple[int, torch.Tensor]]:
+    """Infer PPGs of a long audio file one window at a time
+
+    Audio is read from disk one window at a time. Each window is resampled
+    and converted to mels with the STFT and chunk context of its neighbors,
+    so the concatenated windows match ppgs.from_file, while memory does not
+    depend on the length of the file. Only the mel representation is
+    supported.
+
+    Arguments
+        file
+            The audio file
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        window_frames
+            Number of frames inferred per window. Rounded up to a multiple
+            of the chunk stride. Defaults to ppgs.LONG_FORM_WINDOW_FRAMES.
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
+
+    Returns
+        Iterator over (offset, ppg) pairs, where offset is the index of the
+        first frame of the window
+        shape=(len(ppgs.PHONEMES), frames)
+    """
+    if ppgs.REPRESENTATION not in ['mel', None]:
+        raise ValueError(
+            'Long-form inference is only supported for the mel '
+            f'representation, not {ppgs.REPRESENTATION}')
+    device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+
+    # Align windows to chunks so that every chunk sees the same context as
+    # when inferring the whole file
+    overlap = ppgs.CHUNK_OVERLAP
+    stride = ppgs.CHUNK_LENGTH - 2 * overlap
+    if window_frames is None:
+        window_frames = ppgs.LONG_FORM_WINDOW_FRAMES
+    window_frames = stride * math.ceil(window_frames / stride)
+
+    # Load model
+    model = ppgs.cached_model(device, 'mel', checkpoint, quantize=quantize)
+    if not isinstance(model, ppgs.model.Transformer):
+        raise ValueError('Long-form inference requires a transformer model')
+
+    reader = Reader(file)
+    frames = reader.samples // ppgs.HOPSIZE
+    for start in range(0, frames, window_frames):
+        end = min(start + window_frames, frames)
+
+        # Include left and right chunk context
+        first = max(0, start - overlap)
+        last = min(frames, end + overlap)
+
+        # Compute mels
+        with torch.inference_mode():
+            features = ppgs.precision.cast(
+                reader.features(first, last).to(device))
+
+        # Infer
+        with ppgs.precision.inference(model, device):
+            logits = model.chunked(
+                features,
+                torch.tensor([last - first], device=device),
+                context=start > 0)
+            ppg = torch.nn.functional.softmax(logits[0, :, :end - start], 0)
+
+        yield start, ppg
+
+
+def from_file_to_file(
+    audio_file: Union[str, bytes, os.PathLike],
+    output_file: Union[str, bytes, os.PathLike],
+    checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+    gpu: Optional[int] = None,
+    window_frames: Optional[int] = None,
+    quantize: Optional[str] = None,
+    frames: Optional[int] = None
+) -> None:
+    """Infer PPGs of a long audio file and append them to disk
+
+    Frames are appended to a float32 .npy file as each window is inferred,
+    so memory does not depend on the length of the file. The .npy file is
+    stored in column-major order so that it can be memory-mapped as a
+    tensor of shape (len(ppgs.PHONEMES), frames) with ppgs.load.ppg. Other
+    output files are written to a temporary .npy file first and then saved
+    from the memory-mapped result with torch.save.
+
+    Arguments
+        audio_file
+            The audio file
+        output_file
+            The .npy or .pt file to save PPGs
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        window_frames
+            Number of frames inferred per window.
+            Defaults to ppgs.LONG_FORM_WINDOW_FRAMES.
+        quantize
+            Optional int8 quantization mode for CPU inference. One of
+            ppgs.model.quantization.QUANTIZATIONS.
+        frames
+            Number of frames of the audio file, if already known.
+            Defaults to ppgs.load.frames(audio_file).
+    """
+    output_file = Path(output_file)
+    if output_file.suffix == '.npy':
+        array_file = output_file
+    else:
+        array_file = output_file.with_name(f'.{output_file.name}.npy')
+
+    # Allocate output
+    if frames is None:
+        frames = ppgs.load.frames(audio_file)
+    array = np.lib.format.open_memmap(
+        array_file,
+        mode='w+',
+        dtype=np.float32,
+        shape=(len(ppgs.PHONEMES), frames),
+        fortran_order=True)
+    offset = array.offset
+    del array
+
+    # Append frames of each window
+    with open(array_file, 'r+b') as file:
+        file.seek(offset)
+        for _, ppg in from_file(
+            audio_file,
+            checkpoint,
+            gpu,
+            window_frames,
+            quantize
+        ):
+            file.write(ppg.T.to(torch.float32).cpu().contiguous().numpy())
+
+    # Maybe convert
+    if array_file != output_file:
+        try:
+            torch.save(
+                torch.from_numpy(np.load(array_file, mmap_mode='c')),
+                output_file)
+        finally:
+            array_file.unlink()
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+class Reader:
+    """Read windows of resampled audio and mels from an audio file"""
+
+    def __init__(self, file):
+        self.file = file
+        info = torchaudio.info(file)
+        self.sample_rate = info.sample_rate
+        self.source_samples = info.num_frames
+
+        # Resampling maps each period of orig input samples to new output
+        # samples
+        divisor = math.gcd(self.sample_rate, ppgs.SAMPLE_RATE)
+        self.orig = self.sample_rate // divisor
+        self.new = ppgs.SAMPLE_RATE // divisor
+        self.samples = math.ceil(self.new * self.source_samples / self.orig)
+        self.margin = math.ceil(
+            RESAMPLE_MARGIN * self.sample_rate / self.orig)
+        if self.sample_rate != ppgs.SAMPLE_RATE:
+            self.resampler = torchaudio.transforms.Resample(
+                self.sample_rate,
+                ppgs.SAMPLE_RATE)
+
+    def audio(self, start, end):
+        """Read mono audio samples at ppgs.SAMPLE_RATE
+
+        Arguments
+            start
+                Index of the first sample at ppgs.SAMPLE_RATE
+            end
+                Index after the last sample at ppgs.SAMPLE_RATE
+
+        Returns
+            shape=(1, end - start)
+        """
+        if self.sample_rate == ppgs.SAMPLE_RATE:
+            audio, _ = torchaudio.load(
+                self.file,
+                frame_offset=start,
+                num_frames=end - start)
+            return audio.mean(dim=0, keepdim=True)
+
+        # Start reading at a whole resampling period so that resampled
+        # samples line up with those of the whole file
+        first = max(0, start // self.new - self.margin)
+        last = min(
+            math.ceil(end / self.new) + self.margin,
+            math.ceil(self.source_samples / self.orig))
+        audio, _ = torchaudio.load(
+            self.file,
+            frame_offset=first * self.orig,
+            num_frames=(last - first) * self.orig)
+        audio = self.resampler(audio.mean(dim=0, keepdim=True))
+        offset = first * self.new
+        return audio[:, start - offset:end - offset]
+
+    def features(self, start, end):
+        """Compute mel frames
+
+        Arguments
+            start
+                Index of the first frame
+            end
+                Index after the last frame
+
+        Returns
+            shape=(1, ppgs.NUM_MELS, end - start)
+        """
+        # Samples of the STFT windows, relative to the unpadded audio
+        first = start * ppgs.HOPSIZE - PADDING
+        last = (end - 1) * ppgs.HOPSIZE + ppgs.NUM_FFT - PADDING
+        audio = self.audio(max(0, first), min(self.samples, last))[None]
+
+        # Reflect at the ends of the file
+        audio = torch.nn.functional.pad(
+            audio,
+            (max(0, -first), max(0, last - self.samples)),
+            mode='reflect')
+
+        # Compute mels in the same way as ppgs.preprocess.from_audio
+        return ppgs.preprocess.features.from_padded(audio)
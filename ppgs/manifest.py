@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+
+###############################################################################
+# Resumable batch-processing manifest
+###############################################################################
+
+
+class Manifest:
+    """Append-only journal of completed outputs and audio lengths
+
+    Each line of the journal is a JSON record. An output is recorded after it
+    has been written, along with its size in bytes. On restart, outputs
+    whose file still exists with the recorded size are skipped, and audio
+    lengths are reused instead of being recomputed with torchaudio.info.
+    A partially-written final line (e.g., after a crash) is ignored.
+
+    Arguments
+        file
+            The journal file. Created if it does not exist.
+    """
+
+    def __init__(self, file: Union[str, bytes, os.PathLike]):
+        self.file = Path(file)
+        self.lock = threading.Lock()
+
+        # Map from audio filename to length in frames
+        self.lengths = {}
+
+        # Map from output filename to size in bytes
+        self.outputs = {}
+
+        # Load previous records
+        if self.file.exists():
+            with open(self.file) as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if 'length' in record:
+                        self.lengths[record['audio_file']] = record['length']
+                    if 'output_file' in record:
+                        self.outputs[record['output_file']] = record['size']
+
+        # Open for appending
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = open(self.file, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Close the journal"""
+        with self.lock:
+            self.handle.close()
+
+    def complete(self, output_file: Union[str, bytes, os.PathLike]) -> bool:
+        """Whether an output was recorded and is still intact on disk"""
+        size = self.outputs.get(str(output_file))
+        if size is None:
+            return False
+        try:
+            return os.path.getsize(output_file) == size
+        except OSError:
+            return False
+
+    def pending(
+        self,
+        audio_files: List[Union[str, bytes, os.PathLike]],
+        output_files: List[Union[str, bytes, os.PathLike]]
+    ) -> Tuple[List, List]:
+        """Filter audio and output files to those that are not complete"""
+        pending = [
+            (audio_file, output_file)
+            for audio_file, output_file in zip(audio_files, output_files)
+            if not self.complete(output_file)]
+        if not pending:
+            return [], []
+        return tuple(map(list, zip(*pending)))
+
+    def record(
+        self,
+        audio_file: Union[str, bytes, os.PathLike],
+        output_file: Union[str, bytes, os.PathLike]
+    ):
+        """Record that an output file has been written"""
+        size = os.path.getsize(output_file)
+        self.write({
+            'audio_file': str(audio_file),
+            'output_file': str(output_file),
+            'size': size})
+        self.outputs[str(output_file)] = size
+
+    def record_lengths(self, lengths: Dict[str, int]):
+        """Record lengths in frames of audio files"""
+        for audio_file, length in lengths.items():
+            if self.lengths.get(str(audio_file)) != length:
+                self.write({'audio_file': str(audio_file), 'length': length})
+                self.lengths[str(audio_file)] = length
+
+    def write(self, record):
+        """Append a record to the journal"""
+        with self.lock:
+            self.handle.write(json.dumps(record) + '\n')
+            self.handle.flush()
@@ -1,5 +1,21 @@
+from .backend import Backend
 from .core import Model
+from .quantization import quantize
 from .convolution import Convolution
 from .transformer import Transformer
-from .w2v2 import W2V2
-from .w2v2fc import W2V2FC
+
+
+###############################################################################
+# Lazy imports
+###############################################################################
+
+
+def __getattr__(name):
+    """Import models that depend on transformers on first access"""
+    if name == 'W2V2':
+        from .w2v2 import W2V2
+        return W2V2
+    if name == 'W2V2FC':
+        from .w2v2fc import W2V2FC
+        return W2V2FC
+    raise AttributeError(f'module {__name__} has no attribute {name}')
@@ -0,0 +1,132 @@
+import io
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Supported inference backends
+BACKENDS = ['eager', 'compile', 'torchscript', 'onnx']
+
+
+###############################################################################
+# Compiled and exported inference backends
+###############################################################################
+
+
+class Backend:
+    """Compiled or exported CPU implementation of Transformer.fixed
+
+    Graphs are built for chunks of ppgs.CHUNK_LENGTH frames. Batches are
+    padded to a power of two so that at most a few graphs are compiled.
+
+    Arguments
+        model
+            The ppgs.model.Transformer to compile. Must be in eval mode.
+        backend
+            One of 'compile' (torch.compile), 'torchscript' (traced and
+            optimized for inference), or 'onnx' (exported and run with
+            onnxruntime, which must be installed)
+    """
+
+    def __init__(self, model, backend):
+        if not isinstance(model, ppgs.model.Transformer):
+            raise ValueError(
+                f'Backend {backend} is only supported for transformer models')
+        self.name = backend
+        module = Fixed(model.eval())
+        example = (
+            torch.zeros((1, model.input_channels, ppgs.CHUNK_LENGTH)),
+            torch.full((1,), ppgs.CHUNK_LENGTH, dtype=torch.long))
+
+        if backend == 'compile':
+            self.fn = torch.compile(module, dynamic=False)
+
+        elif backend == 'torchscript':
+            with torch.inference_mode(False), torch.no_grad():
+                self.fn = torch.jit.optimize_for_inference(
+                    torch.jit.trace(module, example))
+
+        elif backend == 'onnx':
+            import onnxruntime
+
+            # Export with a dynamic batch dimension
+            buffer = io.BytesIO()
+            with torch.inference_mode(False), torch.no_grad():
+                torch.onnx.export(
+                    module,
+                    example,
+                    buffer,
+                    input_names=['features', 'lengths'],
+                    output_names=['logits'],
+                    dynamic_axes={
+                        'features': {0: 'batch'},
+                        'lengths': {0: 'batch'},
+                        'logits': {0: 'batch'}},
+                    opset_version=17)
+
+            # Start session
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = torch.get_num_threads()
+            session = onnxruntime.InferenceSession(
+                buffer.getvalue(),
+                options,
+                providers=['CPUExecutionProvider'])
+            self.fn = lambda x, lengths: torch.from_numpy(session.run(
+                None,
+                {'features': x.numpy(), 'lengths': lengths.numpy()})[0])
+
+        else:
+            raise ValueError(f'Backend {backend} is not defined')
+
+    def __call__(self, x, lengths):
+        """Infer logits for chunks of ppgs.CHUNK_LENGTH frames
+
+        Arguments
+            x
+                Input features
+                shape=(batch, channels, ppgs.CHUNK_LENGTH)
+            lengths
+                Number of valid frames in each chunk
+                shape=(batch,)
+
+        Returns
+            logits
+                shape=(batch, len(ppgs.PHONEMES), ppgs.CHUNK_LENGTH)
+        """
+        if x.device.type != 'cpu':
+            raise ValueError(f'Backend {self.name} only supports CPU')
+
+        # Pad batch to a power of two by repeating the first chunk
+        batch = x.shape[0]
+        size = 1 << (batch - 1).bit_length()
+        x = x.to(torch.float32)
+        lengths = lengths.to(torch.long)
+        if size > batch:
+            x = torch.cat((x, x[:1].expand(size - batch, -1, -1)))
+            lengths = torch.cat((lengths, lengths[:1].expand(size - batch)))
+
+        # Run at full precision regardless of surrounding autocast
+        with torch.autocast('cpu', enabled=False):
+            return self.fn(x.contiguous(), lengths.contiguous())[:batch]
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+class Fixed(torch.nn.Module):
+    """Module wrapper exposing Transformer.fixed as forward"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, lengths):
+        return self.model.fixed(x, lengths)
@@ -0,0 +1,108 @@
+import itertools
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Supported quantization modes
+QUANTIZATIONS = ['dynamic', 'static']
+
+
+###############################################################################
+# Int8 quantization
+###############################################################################
+
+
+def quantize(model, mode='dynamic', calibration=None):
+    """Quantize a transformer model for CPU inference
+
+    Arguments
+        model
+            The ppgs.model.Transformer to quantize
+        mode
+            One of ppgs.model.quantization.QUANTIZATIONS. 'dynamic'
+            quantizes the weights of the linear layers to int8 and
+            quantizes their activations on the fly. 'static' additionally
+            quantizes the input and output convolutions using activation
+            ranges observed on calibration data.
+        calibration
+            Iterable of (features, lengths) used to calibrate 'static'
+            quantization. Defaults to ppgs.QUANTIZATION_CALIBRATION_BATCHES
+            batches of the validation partition of ppgs.TRAINING_DATASET.
+
+    Returns
+        The quantized model
+    """
+    if not isinstance(model, ppgs.model.Transformer):
+        raise ValueError('Quantization is only supported for transformers')
+    if mode not in QUANTIZATIONS:
+        raise ValueError(f'Quantization {mode} is not defined')
+    model = model.cpu().eval()
+
+    # Maybe statically quantize convolutions before replacing linear layers
+    if mode == 'static':
+        engine = torch.backends.quantized.engine
+        qconfig = torch.ao.quantization.get_default_qconfig(engine)
+        for name in ['input_layer', 'output_layer']:
+            conv = getattr(model, name)
+
+            # Quantized convolutions require explicit padding
+            if conv.padding == 'same':
+                if conv.kernel_size[0] % 2 == 0:
+                    raise ValueError(
+                        'Static quantization requires odd kernel sizes')
+                conv.padding = (conv.kernel_size[0] // 2,)
+
+            layer = torch.nn.Sequential(
+                torch.ao.quantization.QuantStub(),
+                conv,
+                torch.ao.quantization.DeQuantStub())
+            layer.qconfig = qconfig
+            setattr(model, name, torch.ao.quantization.prepare(layer))
+
+        # Observe activation ranges
+        if calibration is None:
+            calibration = calibration_batches()
+        with torch.no_grad():
+            for features, lengths in calibration:
+                model(features.to(torch.float32), lengths)
+
+        for name in ['input_layer', 'output_layer']:
+            setattr(
+                model,
+                name,
+                torch.ao.quantization.convert(getattr(model, name)))
+
+    # Dynamically quantize linear layers
+    return torch.ao.quantization.quantize_dynamic(
+        model,
+        {torch.nn.Linear},
+        dtype=torch.qint8)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def calibration_batches():
+    """Get batches of validation features for static quantization"""
+    try:
+        loader = ppgs.data.loader(
+            ppgs.TRAINING_DATASET,
+            'valid',
+            features=[ppgs.REPRESENTATION, 'length'],
+            num_workers=0)
+    except (FileNotFoundError, ValueError) as error:
+        raise ValueError(
+            'Static quantization is calibrated on the preprocessed '
+            f'{ppgs.TRAINING_DATASET} validation partition, which was not '
+            'found. Pass calibration data or use dynamic quantization.'
+        ) from error
+    return itertools.islice(loader, ppgs.QUANTIZATION_CALIBRATION_BATCHES)
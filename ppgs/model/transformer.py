@@ -1,10 +1,19 @@
 import math
 
 import torch
-import math
+
 import ppgs
 
 
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Number of frames of queries that share keys in local attention
+LOCAL_ATTENTION_BLOCK_SIZE = 64
+
+
 ###############################################################################
 # Transformer model
 ###############################################################################
@@ -21,47 +30,68 @@ class Transformer(torch.nn.Module):
         kernel_size=ppgs.KERNEL_SIZE,
         attention_heads=ppgs.ATTENTION_HEADS,
         is_causal=ppgs.IS_CAUSAL,
-        max_len=5000
+        max_len=5000,
+        attention=ppgs.ATTENTION,
+        attention_window_size=ppgs.ATTENTION_WINDOW_SIZE
     ):
         super().__init__()
         self.position = PositionalEncoding(hidden_channels, max_len=max_len)
         self.max_len = max_len
+        self.input_channels = input_channels
         self.input_layer = torch.nn.Conv1d(
             input_channels,
             hidden_channels,
             kernel_size=kernel_size,
             padding='same')
-        self.model = torch.nn.TransformerEncoder(
-            torch.nn.TransformerEncoderLayer(hidden_channels, attention_heads),
-            num_hidden_layers)
+        if attention == 'full':
+            layer = torch.nn.TransformerEncoderLayer(
+                hidden_channels,
+                attention_heads)
+        elif attention == 'local':
+            layer = LocalTransformerEncoderLayer(
+                hidden_channels,
+                attention_heads,
+                window_size=attention_window_size,
+                is_causal=is_causal)
+        else:
+            raise ValueError(f'Attention {attention} is not defined')
+        self.model = torch.nn.TransformerEncoder(layer, num_hidden_layers)
+        self.attention = attention
         self.output_layer = torch.nn.Conv1d(
             hidden_channels,
             output_channels,
             kernel_size=kernel_size,
             padding='same')
         self.is_causal = is_causal
+        self.kernel_size = kernel_size
+
+        # Optional compiled or exported implementation of fixed (see
+        # ppgs.model.Backend)
+        self.backend = None
 
     def forward(self, x, lengths=None, legacy_mode=False):
+        if lengths is None:
+            lengths = torch.full(
+                (x.shape[0],),
+                x.shape[-1],
+                dtype=torch.long,
+                device=x.device)
         if legacy_mode:
             assert x.shape[-1] < ppgs.MAX_INFERENCE_FRAMES
-        else: # do chunking
-            overlap = 50
-            # max_len = self.max_len
-            max_len = 500
-            stride = max_len - 2*overlap
-            if x.shape[-1] > self.max_len:
-                padded = torch.nn.functional.pad(x, (overlap, 0), mode='replicate').to(x.device)
-                split_results = []
-                num_blocks = math.ceil(x.shape[-1] / stride)
-                for i in range(0, num_blocks):
-                    split = padded[..., i*stride:(i+1)*(stride)+2*overlap]
-                    chunk_lengths = (lengths+overlap).clamp(0, max_len)
-                    chunk_lengths[chunk_lengths==overlap] = 0
-                    lengths = (lengths-stride).clamp(min=0)
-                    # recursively compute forward in chunks
-                    split_results.append(self.forward(split, chunk_lengths)[..., overlap:max_len-overlap])
-                return torch.cat(split_results, dim=-1)
-        if self.is_causal: # apply causal mask
+        elif self.backend is not None or (
+            self.attention == 'full' and x.shape[-1] > self.max_len
+        ):
+            return self.chunked(x, lengths)
+        elif (
+            ppgs.PACKED_INFERENCE and
+            not self.training and
+            bool((lengths < x.shape[-1]).any())
+        ):
+            return self.packed(x, lengths)
+
+        # Local attention applies causality within its band, so the square
+        # causal mask is never built
+        if self.is_causal and self.attention == 'full': # apply causal mask
             causal_mask = torch.nn.Transformer.generate_square_subsequent_mask(
                 torch.max(lengths),
                 device = x.device
@@ -79,6 +109,268 @@ class Transformer(torch.nn.Module):
         ).permute(1, 2, 0)
         return self.output_layer(x) * mask
 
+    def chunked(
+        self,
+        x,
+        lengths,
+        max_frames=ppgs.MAX_CHUNK_FRAMES,
+        context=False):
+        """Chunked inference with all chunks folded into the batch dimension
+
+        Each chunk of ppgs.CHUNK_LENGTH frames overlaps its neighbors by
+        ppgs.CHUNK_OVERLAP frames on both sides. Chunks from every item in
+        the batch are stacked and inferred in batches of at most max_frames
+        frames, and the centers of the chunks are stitched back together.
+        If a backend is set, every chunk is inferred at the full chunk length
+        so that compiled graphs are reused. If context is True, the first
+        ppgs.CHUNK_OVERLAP frames of x are left context that is not returned
+        (see ppgs.longform).
+        """
+        overlap, length = ppgs.CHUNK_OVERLAP, ppgs.CHUNK_LENGTH
+        stride = length - 2 * overlap
+
+        # Use given left context or replicate the first frame
+        if context:
+            left = x[..., :overlap]
+            x, lengths = x[..., overlap:], lengths - overlap
+        else:
+            left = x[..., :1].expand(-1, -1, overlap)
+
+        batch, channels, frames = x.shape
+        num_blocks = math.ceil(frames / stride)
+
+        # Add left context and zero-pad the final chunk
+        padded = torch.cat(
+            (
+                left,
+                x,
+                x.new_zeros((
+                    batch,
+                    channels,
+                    (num_blocks - 1) * stride + length - overlap - frames))
+            ),
+            dim=-1)
+
+        # Fold chunks into the batch dimension
+        # shape=(batch * num_blocks, channels, length)
+        blocks = padded.unfold(-1, length, stride).transpose(1, 2)
+        blocks = blocks.reshape(batch * num_blocks, channels, length)
+
+        # Get number of valid frames in each chunk, including left context
+        offsets = torch.arange(num_blocks, device=lengths.device) * stride
+        remaining = (lengths[:, None] - offsets).clamp(min=0)
+        chunk_lengths = (remaining + overlap).clamp(max=length)
+        chunk_lengths[remaining == 0] = 0
+        chunk_lengths = chunk_lengths.flatten()
+
+        # Infer non-empty chunks in large batches
+        indices = torch.nonzero(chunk_lengths, as_tuple=True)[0]
+        step = max(1, int(max_frames // length))
+        outputs = []
+        for i in range(0, len(indices), step):
+            group = indices[i:i + step]
+            group_lengths = chunk_lengths[group]
+            if self.backend is None:
+                width = int(group_lengths.max())
+                output = self.forward(
+                    blocks[group, :, :width],
+                    group_lengths)
+            else:
+                width = length
+                output = self.backend(blocks[group], group_lengths)
+            outputs.append(
+                torch.nn.functional.pad(output, (0, length - width)))
+        outputs = torch.cat(outputs)
+
+        # Scatter into place, leaving empty chunks as zeros
+        output = outputs.new_zeros((batch * num_blocks,) + outputs.shape[1:])
+        output[indices] = outputs
+
+        # Stitch chunk centers together
+        # shape=(batch, output_channels, frames)
+        output = output[..., overlap:length - overlap]
+        output = output.reshape(batch, num_blocks, -1, stride).permute(
+            0, 2, 1, 3)
+        return output.reshape(batch, -1, num_blocks * stride)[..., :frames]
+
+    def incremental(self, x, state=None, final=False):
+        """Causal inference of new frames given the state of previous calls
+
+        Each convolution keeps its last input frames as context and each
+        layer caches the keys and values of previous frames, so the cost of
+        a call depends on the number of new and cached frames rather than
+        the number of frames seen so far. Frames are returned once the right
+        context of both convolutions is available, 2 * (kernel_size // 2)
+        frames after they are given, or immediately if final is True. While
+        no keys or values are dropped from the cache, the concatenated
+        outputs match forward on all frames.
+
+        Arguments
+            x
+                New input frames
+                shape=(batch, input_channels, frames)
+            state
+                ppgs.model.transformer.State of previous calls, or None to
+                start a new sequence
+            final
+                Whether x contains the last frames of the sequence
+
+        Returns
+            logits
+                Logits of frames that no longer depend on future frames
+                shape=(batch, output_channels, frames)
+            state
+                ppgs.model.transformer.State for the next call
+        """
+        if not self.is_causal:
+            raise ValueError('Incremental inference requires a causal model')
+        if state is None:
+            state = State()
+        radius = self.kernel_size // 2
+
+        # Input layer
+        x, state.inputs = convolve_incremental(
+            self.input_layer,
+            state.inputs,
+            x,
+            radius,
+            final)
+
+        # Transformer layers
+        frames = x.shape[-1]
+        if frames:
+            positions = torch.arange(
+                state.position,
+                state.position + frames,
+                device=x.device)
+            cached = (
+                positions if state.positions is None
+                else torch.cat((state.positions, positions)))
+            x = self.position.positions(
+                frames,
+                state.position) + x.permute(2, 0, 1)
+            for i, layer in enumerate(self.model.layers):
+                x, keys, values = incremental_layer(
+                    layer,
+                    x,
+                    positions,
+                    cached,
+                    *state.cache(i))
+                state.update(i, keys, values)
+            if self.model.norm is not None:
+                x = self.model.norm(x)
+            x = x.permute(1, 2, 0)
+            state.positions = cached
+            state.position += frames
+
+            # Discard keys and values that are no longer attended to
+            if self.attention == 'local':
+                state.truncate(
+                    self.model.layers[0].window_size if state.context is None
+                    else min(self.model.layers[0].window_size, state.context))
+            elif state.context is not None:
+                state.truncate(state.context)
+
+        # Output layer
+        x, state.hidden = convolve_incremental(
+            self.output_layer,
+            state.hidden,
+            x,
+            radius,
+            final)
+
+        return x, state
+
+    def packed(self, x, lengths):
+        """Inference over the valid frames of a batch without padding
+
+        Items are concatenated along time, separated by enough zeros that
+        convolutions do not mix neighboring items. Linear layers run once on
+        all valid frames and attention runs on each item separately, so no
+        compute is spent on padding. Each item matches inferring it on its
+        own. Dropout is not applied, so this is only used for inference.
+
+        Arguments
+            x
+                Padded input features
+                shape=(batch, input_channels, frames)
+            lengths
+                Number of valid frames of each item
+                shape=(batch,)
+
+        Returns
+            Logits, with zeros after the last frame of each item
+            shape=(batch, output_channels, frames)
+        """
+        batch, _, frames = x.shape
+        positions = torch.arange(frames, device=x.device).expand(batch, -1)
+        mask = positions < lengths[:, None]
+
+        # Position of each valid frame in the concatenated sequence
+        gap = self.kernel_size // 2
+        item = torch.repeat_interleave(
+            torch.arange(batch, device=x.device),
+            lengths)
+        index = torch.arange(len(item), device=x.device) + gap * item
+        total = len(item) + gap * (batch - 1)
+
+        # Input layer
+        # shape=(valid frames, hidden_channels)
+        x = self.convolve(
+            self.input_layer,
+            x.transpose(1, 2)[mask],
+            index,
+            total)
+
+        # Positional encoding
+        x = x + self.position.positions(frames)[positions[mask], 0]
+
+        # Transformer layers
+        lengths = lengths.tolist()
+        for layer in self.model.layers:
+            x = packed_layer(layer, x, lengths, self.is_causal)
+        if self.model.norm is not None:
+            x = self.model.norm(x)
+
+        # Output layer
+        x = self.convolve(self.output_layer, x, index, total)
+
+        # Unpack
+        output = x.new_zeros((batch, frames, x.shape[-1]))
+        output[mask] = x
+        return output.transpose(1, 2)
+
+    def convolve(self, layer, x, index, total):
+        """Apply a convolution to packed frames separated by zeros"""
+        sequence = x.new_zeros((total, x.shape[-1]))
+        sequence[index] = x
+        return layer(sequence.T[None])[0].T[index]
+
+    def fixed(self, x, lengths):
+        """Forward pass with shapes that do not depend on lengths
+
+        Used by compiled and exported backends. Frames past each length are
+        zeroed before the input and output layers, which matches forward on
+        inputs trimmed to their length.
+        """
+        frames = x.shape[-1]
+        mask = (
+            torch.arange(frames, device=x.device)[None] < lengths[:, None]
+        ).unsqueeze(1)
+        if self.is_causal and self.attention == 'full':
+            causal_mask = torch.nn.Transformer.generate_square_subsequent_mask(
+                frames,
+                device=x.device)
+        else:
+            causal_mask = None
+        x = self.input_layer(x * mask) * mask
+        x = self.model(
+            self.position(x.permute(2, 0, 1)),
+            mask=causal_mask,
+            src_key_padding_mask=~mask.squeeze(1)
+        ).permute(1, 2, 0)
+        return self.output_layer(x * mask) * mask
+
 
 ###############################################################################
 # Utilities
@@ -90,18 +382,404 @@ class PositionalEncoding(torch.nn.Module):
     def __init__(self, channels, dropout=.1, max_len=5000):
         super().__init__()
         self.dropout = torch.nn.Dropout(p=dropout)
-        index = torch.arange(max_len).unsqueeze(1)
-        frequency = torch.exp(
-            torch.arange(0, channels, 2) * (-math.log(10000.0) / channels))
-        encoding = torch.zeros(max_len, 1, channels)
-        encoding[:, 0, 0::2] = torch.sin(index * frequency)
-        encoding[:, 0, 1::2] = torch.cos(index * frequency)
-        self.register_buffer('encoding', encoding)
+        self.register_buffer('encoding', sinusoids(max_len, channels))
 
     def forward(self, x):
-        if x.size(0) > self.encoding.size(0):
-            raise ValueError('size is too large')
-        return self.dropout(x + self.encoding[:x.size(0)])
+        return self.dropout(x + self.positions(x.size(0)))
+
+    def positions(self, frames, start=0):
+        """Get encodings of frames from start, extending past max_len"""
+        if start + frames <= self.encoding.size(0):
+            return self.encoding[start:start + frames]
+        return sinusoids(
+            frames,
+            self.encoding.size(-1),
+            self.encoding.device,
+            start)
+
+
+class LocalTransformerEncoderLayer(torch.nn.TransformerEncoderLayer):
+    """Transformer encoder layer with local windowed attention
+
+    Each frame attends only to frames at most window_size frames away (or
+    only to previous frames if causal), so cost grows linearly with length.
+    Parameters match torch.nn.TransformerEncoderLayer. The forward pass is
+    implemented here from the public submodules of the parent layer, so it
+    does not depend on private methods or the fast path of torch.
+
+    Arguments
+        d_model
+            Number of channels
+        nhead
+            Number of attention heads
+        window_size
+            Maximum distance in frames between attending frames
+        is_causal
+            Whether frames only attend to previous frames
+    """
+
+    def __init__(self, d_model, nhead, window_size, is_causal=False):
+        super().__init__(d_model, nhead)
+        self.window_size = window_size
+        self.is_causal = is_causal
+
+    def forward(
+        self,
+        src,
+        src_mask=None,
+        src_key_padding_mask=None,
+        is_causal=False):
+        # The band and causal masks are applied by local_attention
+        if src_mask is not None:
+            raise ValueError(
+                'Local attention does not support attention masks. '
+                'Use is_causal when constructing the layer.')
+        if is_causal and not self.is_causal:
+            raise ValueError(
+                'Causal attention requires a layer constructed with '
+                'is_causal=True')
+
+        x = src
+        if self.norm_first:
+            x = x + self.attend(self.norm1(x), src_key_padding_mask)
+            x = x + self.feedforward(self.norm2(x))
+        else:
+            x = self.norm1(x + self.attend(x, src_key_padding_mask))
+            x = self.norm2(x + self.feedforward(x))
+        return x
+
+    def attend(self, x, key_padding_mask=None):
+        """Local self-attention block"""
+        attention = self.self_attn
+        frames, batch, channels = x.shape
+
+        # Project to queries, keys, and values
+        # shape=(batch, heads, frames, channels // heads)
+        queries, keys, values = (
+            item.reshape(frames, batch, attention.num_heads, -1).permute(
+                1, 2, 0, 3)
+            for item in torch.nn.functional.linear(
+                x,
+                attention.in_proj_weight,
+                attention.in_proj_bias
+            ).chunk(3, dim=-1))
+
+        # Canonicalized key padding masks are additive
+        if (
+            key_padding_mask is not None and
+            key_padding_mask.is_floating_point()
+        ):
+            key_padding_mask = key_padding_mask != 0
+
+        output = local_attention(
+            queries,
+            keys,
+            values,
+            self.window_size,
+            self.is_causal,
+            key_padding_mask,
+            attention.dropout if self.training else 0.)
+        output = output.permute(2, 0, 1, 3).reshape(frames, batch, channels)
+        return self.dropout1(attention.out_proj(output))
+
+    def feedforward(self, x):
+        """Feed-forward block"""
+        return self.dropout2(
+            self.linear2(self.dropout(self.activation(self.linear1(x)))))
+
+
+def local_attention(
+    queries,
+    keys,
+    values,
+    window_size,
+    is_causal=False,
+    key_padding_mask=None,
+    dropout=0.):
+    """Banded attention within a window of frames
+
+    Frames are split into blocks of LOCAL_ATTENTION_BLOCK_SIZE frames. Each
+    block attends to itself and to window_size frames on either side, so
+    memory and compute grow linearly with the number of frames.
+
+    Arguments
+        queries, keys, values
+            shape=(batch, heads, frames, channels)
+        window_size
+            Maximum distance in frames between attending frames
+        is_causal
+            Whether frames only attend to previous frames
+        key_padding_mask
+            Optional mask that is True for padding frames
+            shape=(batch, frames)
+        dropout
+            Dropout probability of attention weights
+
+    Returns
+        shape=(batch, heads, frames, channels)
+    """
+    batch, heads, frames, channels = queries.shape
+    size = max(LOCAL_ATTENTION_BLOCK_SIZE, window_size)
+    blocks = math.ceil(frames / size)
+    pad = blocks * size - frames
+    span = size + 2 * window_size
+
+    # Split queries into blocks
+    # shape=(batch, heads, blocks, size, channels)
+    queries = torch.nn.functional.pad(queries, (0, 0, 0, pad)).reshape(
+        batch, heads, blocks, size, channels)
+
+    # Keys and values of each block and its neighboring frames
+    # shape=(batch, heads, blocks, span, channels)
+    keys, values = (
+        torch.nn.functional.pad(
+            item,
+            (0, 0, window_size, window_size + pad)
+        ).unfold(2, span, size).transpose(-1, -2)
+        for item in (keys, values))
+
+    # Mask frames outside of the window and outside of the sequence
+    # shape=(batch, 1, blocks, size, span)
+    offset = (
+        torch.arange(span, device=queries.device)[None] - window_size -
+        torch.arange(size, device=queries.device)[:, None])
+    if is_causal:
+        mask = (offset <= 0) & (offset >= -window_size)
+    else:
+        mask = offset.abs() <= window_size
+    if key_padding_mask is None:
+        key_padding_mask = torch.zeros(
+            (batch, frames),
+            dtype=torch.bool,
+            device=queries.device)
+    padding = torch.nn.functional.pad(
+        key_padding_mask,
+        (window_size, window_size + pad),
+        value=True
+    ).unfold(1, span, size)
+    mask = mask & ~padding[:, None, :, None]
+
+    # Attend
+    scores = torch.matmul(queries, keys.transpose(-1, -2)) / math.sqrt(
+        channels)
+    scores = scores.masked_fill(~mask, torch.finfo(scores.dtype).min)
+    weights = torch.nn.functional.dropout(
+        torch.softmax(scores, dim=-1),
+        dropout,
+        training=dropout > 0.)
+    output = torch.matmul(weights, values)
+    return output.reshape(batch, heads, blocks * size, channels)[
+        :, :, :frames]
+
+
+class State:
+    """State of incremental inference (see Transformer.incremental)
+
+    Arguments
+        context
+            Maximum number of previous frames that full attention attends
+            to, or None to attend to all previous frames
+    """
+
+    def __init__(self, context=None):
+        self.context = context
+
+        # Last input frames of the input and output convolutions
+        self.inputs = None
+        self.hidden = None
+
+        # Cached keys and values of each layer
+        # shape=(batch, heads, frames, channels)
+        self.keys = []
+        self.values = []
+
+        # Positions of cached keys and values
+        self.positions = None
+
+        # Number of frames given to the transformer layers
+        self.position = 0
+
+    def cache(self, layer):
+        """Get the cached keys and values of a layer"""
+        if layer < len(self.keys):
+            return self.keys[layer], self.values[layer]
+        return None, None
+
+    def truncate(self, frames):
+        """Keep only the keys and values of the last frames"""
+        self.positions = self.positions[-frames:]
+        self.keys = [keys[:, :, -frames:] for keys in self.keys]
+        self.values = [values[:, :, -frames:] for values in self.values]
+
+    def update(self, layer, keys, values):
+        """Set the cached keys and values of a layer"""
+        if layer < len(self.keys):
+            self.keys[layer], self.values[layer] = keys, values
+        else:
+            self.keys.append(keys)
+            self.values.append(values)
+
+
+def convolve_incremental(layer, context, x, radius, final=False):
+    """Apply a convolution with same padding to new frames
+
+    Arguments
+        layer
+            The convolution
+        context
+            Previous input frames, or None at the start of the sequence
+        x
+            New input frames
+            shape=(batch, channels, frames)
+        radius
+            Number of frames on each side of the convolution kernel
+        final
+            Whether x contains the last frames of the sequence
+
+    Returns
+        Output frames with complete input context and the input frames kept
+        as context of the next call
+    """
+    if context is None:
+        context = x.new_zeros((x.shape[0], x.shape[1], radius))
+    x = torch.cat((context.to(x.dtype), x), dim=-1)
+    if final:
+        x = torch.nn.functional.pad(x, (0, radius))
+    frames = max(0, x.shape[-1] - 2 * radius)
+    output = layer(x)[..., radius:radius + frames]
+    return output, x[..., x.shape[-1] - min(x.shape[-1], 2 * radius):]
+
+
+def incremental_layer(layer, x, positions, cached, keys=None, values=None):
+    """Apply a causal transformer encoder layer to new frames
+
+    Arguments
+        layer
+            torch.nn.TransformerEncoderLayer in evaluation mode
+        x
+            New frames
+            shape=(frames, batch, channels)
+        positions
+            Positions of the new frames
+            shape=(frames,)
+        cached
+            Positions of the cached and new frames
+            shape=(cached frames + frames,)
+        keys, values
+            Cached keys and values of previous frames, or None
+            shape=(batch, heads, cached frames, channels // heads)
+
+    Returns
+        Output frames and keys and values of cached and new frames
+    """
+    def attend(x):
+        nonlocal keys, values
+        attention = layer.self_attn
+        frames, batch, channels = x.shape
+
+        # Project to queries, keys, and values
+        # shape=(batch, heads, frames, channels // heads)
+        query, key, value = (
+            item.reshape(frames, batch, attention.num_heads, -1).permute(
+                1, 2, 0, 3)
+            for item in torch.nn.functional.linear(
+                x,
+                attention.in_proj_weight,
+                attention.in_proj_bias
+            ).chunk(3, dim=-1))
+
+        # Update cache
+        if keys is not None:
+            key = torch.cat((keys, key), dim=2)
+            value = torch.cat((values, value), dim=2)
+        keys, values = key, value
+
+        # Attend to previous frames, maybe within a window
+        mask = cached[None] <= positions[:, None]
+        if isinstance(layer, LocalTransformerEncoderLayer):
+            mask &= positions[:, None] - cached[None] <= layer.window_size
+        output = torch.nn.functional.scaled_dot_product_attention(
+            query,
+            key,
+            value,
+            attn_mask=mask)
+        output = output.permute(2, 0, 1, 3).reshape(frames, batch, channels)
+        return attention.out_proj(output)
+
+    def feedforward(x):
+        return layer.linear2(layer.activation(layer.linear1(x)))
+
+    if layer.norm_first:
+        x = x + attend(layer.norm1(x))
+        x = x + feedforward(layer.norm2(x))
+    else:
+        x = layer.norm1(x + attend(x))
+        x = layer.norm2(x + feedforward(x))
+    return x, keys, values
+
+
+def packed_layer(layer, x, lengths, is_causal=False):
+    """Apply a transformer encoder layer to packed frames
+
+    Arguments
+        layer
+            torch.nn.TransformerEncoderLayer in evaluation mode
+        x
+            Valid frames of all items, concatenated
+            shape=(sum(lengths), channels)
+        lengths
+            Number of frames of each item
+        is_causal
+            Whether to apply causal masking within each item
+
+    Returns
+        shape=(sum(lengths), channels)
+    """
+    def attend(x):
+        attention = layer.self_attn
+        queries, keys, values = torch.nn.functional.linear(
+            x,
+            attention.in_proj_weight,
+            attention.in_proj_bias
+        ).chunk(3, dim=-1)
+
+        # Attend within each item
+        # shape=(heads, frames, channels // heads)
+        outputs = []
+        for query, key, value in zip(
+            queries.split(lengths),
+            keys.split(lengths),
+            values.split(lengths)
+        ):
+            frames = len(query)
+            shape = (frames, attention.num_heads, -1)
+            query, key, value = (
+                item.reshape(shape).transpose(0, 1)
+                for item in (query, key, value))
+            if isinstance(layer, LocalTransformerEncoderLayer):
+                output = local_attention(
+                    query[None],
+                    key[None],
+                    value[None],
+                    layer.window_size,
+                    is_causal)[0]
+            else:
+                output = torch.nn.functional.scaled_dot_product_attention(
+                    query,
+                    key,
+                    value,
+                    is_causal=is_causal)
+            outputs.append(output.transpose(0, 1).reshape(frames, -1))
+        return attention.out_proj(torch.cat(outputs))
+
+    def feedforward(x):
+        return layer.linear2(layer.activation(layer.linear1(x)))
+
+    if layer.norm_first:
+        x = x + attend(layer.norm1(x))
+        return x + feedforward(layer.norm2(x))
+    x = layer.norm1(x + attend(x))
+    return layer.norm2(x + feedforward(x))
 
 
 def mask_from_lengths(lengths, padding=0):
@@ -111,3 +789,19 @@ def mask_from_lengths(lengths, padding=0):
         dtype=lengths.dtype,
         device=lengths.device)
     return x.unsqueeze(0) - 2 * padding < lengths.unsqueeze(1)
+
+
+def sinusoids(frames, channels, device=None, start=0):
+    """Create sinusoidal positional encodings of frames from start
+
+    Returns
+        shape=(frames, 1, channels)
+    """
+    index = torch.arange(start, start + frames, device=device).unsqueeze(1)
+    frequency = torch.exp(
+        torch.arange(0, channels, 2, device=device) *
+        (-math.log(10000.0) / channels))
+    encoding = torch.zeros(frames, 1, channels, device=device)
+    encoding[:, 0, 0::2] = torch.sin(index * frequency)
+    encoding[:, 0, 1::2] = torch.cos(index * frequency)
+    return encoding
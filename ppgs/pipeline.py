@@ -0,0 +1,138 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Marks the end of the items in a queue
+DONE = object()
+
+# Seconds to wait on a queue before checking for errors in other stages
+POLL_INTERVAL = .1
+
+
+###############################################################################
+# Staged pipeline executor
+###############################################################################
+
+
+def run(
+    source: Iterable,
+    stages: List[Tuple[Callable[[Any], Any], int]],
+    queue_size: int = ppgs.PIPELINE_QUEUE_SIZE
+) -> Iterator:
+    """Run items through stages of worker threads joined by bounded queues
+
+    Each stage blocks when its output queue is full, so a slow stage
+    throttles the stages before it instead of letting work pile up in
+    memory. Torch releases the GIL inside its kernels and file I/O, so
+    feature extraction, inference, and saving overlap in time.
+
+    Arguments
+        source
+            Iterable of input items (e.g., a DataLoader). Iterated in its
+            own thread.
+        stages
+            List of (function, number of worker threads). Each function
+            maps an item to the input item of the next stage.
+        queue_size
+            Maximum number of items waiting between two stages
+
+    Returns
+        Iterator over the outputs of the final stage, in completion order
+    """
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+    errors = []
+
+    def put(outgoing, item):
+        """Put an item, giving up if another thread failed"""
+        while not stop.is_set():
+            try:
+                outgoing.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(incoming):
+        """Get an item, giving up if another thread failed"""
+        while not stop.is_set():
+            try:
+                return incoming.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return DONE
+
+    def fail(error):
+        errors.append(error)
+        stop.set()
+
+    def produce():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+            put(queues[0], DONE)
+        except BaseException as error:
+            fail(error)
+
+    def work(function, incoming, outgoing, remaining, lock):
+        try:
+            while True:
+                item = get(incoming)
+
+                # Let sibling workers see the end of input; the last worker
+                # of the stage forwards it to the next stage
+                if item is DONE:
+                    put(incoming, DONE)
+                    with lock:
+                        remaining[0] -= 1
+                        if remaining[0] == 0:
+                            put(outgoing, DONE)
+                    return
+
+                if not put(outgoing, function(item)):
+                    return
+        except BaseException as error:
+            fail(error)
+
+    # Start threads
+    threads = [threading.Thread(target=produce, daemon=True)]
+    for i, (function, num_workers) in enumerate(stages):
+        num_workers = max(1, num_workers)
+        remaining, lock = [num_workers], threading.Lock()
+        threads.extend(
+            threading.Thread(
+                target=work,
+                args=(function, queues[i], queues[i + 1], remaining, lock),
+                daemon=True)
+            for _ in range(num_workers))
+    for thread in threads:
+        thread.start()
+
+    try:
+
+        # Yield outputs of final stage
+        while True:
+            item = get(queues[-1])
+            if item is DONE:
+                break
+            yield item
+
+    finally:
+
+        # Stop all stages if the consumer exits early or a stage failed
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    # Surface errors from worker threads in the calling thread
+    if errors:
+        raise errors[0]
@@ -0,0 +1,108 @@
+import contextlib
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Supported precisions
+PRECISIONS = ['float32', 'bfloat16', 'float16']
+
+
+###############################################################################
+# Precision policy
+###############################################################################
+
+
+def autocast(device: Union[str, torch.device]):
+    """Mixed precision context of the precision policy of a device
+
+    Arguments
+        device
+            The device performing computation
+
+    Returns
+        torch.autocast context, or a null context for float32
+    """
+    device = torch.device(device)
+    precision = dtype(device)
+    if precision == torch.float32:
+        return contextlib.nullcontext()
+    return torch.autocast(device.type, dtype=precision)
+
+
+def cast(tensor: torch.Tensor) -> torch.Tensor:
+    """Cast floating-point tensors to the precision policy of their device"""
+    if not tensor.is_floating_point():
+        return tensor
+    return tensor.to(dtype(tensor.device))
+
+
+def dtype(device: Union[str, torch.device]) -> torch.dtype:
+    """Get the precision of a device from ppgs.PRECISION
+
+    Device types missing from ppgs.PRECISION use float32.
+    """
+    precision = ppgs.PRECISION.get(torch.device(device).type, 'float32')
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f'Precision {precision} is not one of {PRECISIONS}')
+    return getattr(torch, precision)
+
+
+@contextlib.contextmanager
+def inference(model: torch.nn.Module, device: Union[str, torch.device]):
+    """Inference context of a model under the precision policy
+
+    Unlike torchutil.inference.context, models already in evaluation mode
+    are never returned to training mode on exit, so threads can share a
+    model from the registry.
+
+    Arguments
+        model
+            The torch model performing inference
+        device
+            The device performing inference
+    """
+    training = model.training
+    if training:
+        model.eval()
+    try:
+        with torch.inference_mode(), autocast(device):
+            yield
+    finally:
+        if training:
+            model.train()
+
+
+@contextlib.contextmanager
+def using(precision: Optional[str] = None, device_type: Optional[str] = None):
+    """Temporarily override the precision policy
+
+    Arguments
+        precision
+            One of ppgs.precision.PRECISIONS, or None to keep the policy
+        device_type
+            Device type to override (e.g., 'cpu'). Defaults to all.
+    """
+    if precision is None:
+        yield
+        return
+    if precision not in PRECISIONS:
+        raise ValueError(f'Precision {precision} is not one of {PRECISIONS}')
+
+    previous = ppgs.PRECISION
+    if device_type is None:
+        ppgs.PRECISION = {key: precision for key in ['cpu', 'cuda', *previous]}
+    else:
+        ppgs.PRECISION = {**previous, device_type: precision}
+    try:
+        yield
+    finally:
+        ppgs.PRECISION = previous
@@ -1,36 +1,52 @@
 ###############################################################################
-# Import Charsiu models from Git submodule
+# Module imports
 ###############################################################################
 
 
-from pathlib import Path
+import importlib
 import importlib.util
+from pathlib import Path
 
-try:
-
-    # Import Charsiu
-    charsiu_spec = importlib.util.spec_from_file_location(
-        'charsiu_models',
-        Path(__file__).parent / 'charsiu' / 'src' / 'models.py')
-    charsiu_models = importlib.util.module_from_spec(charsiu_spec)
-    charsiu_spec.loader.exec_module(charsiu_models)
-
-except (FileNotFoundError, ImportError, ModuleNotFoundError):
-
-    # Continue without Charsiu
-    pass
+from .core import *
 
 
 ###############################################################################
-# Module imports
+# Lazy module imports
 ###############################################################################
 
 
-from . import bottleneck
-from . import w2v2fc
-from . import w2v2fb
-from . import spectrogram
-from . import mel
-from . import encodec
-from . import dac
-from .core import *
+def __getattr__(name):
+    """Import preprocessors and Charsiu models on first access
+
+    Each representation depends on different and often heavy packages (e.g.,
+    transformers or the espnet-derived conformer), so preprocessors are only
+    imported when first used.
+    """
+    if name in [
+        'bottleneck',
+        'dac',
+        'encodec',
+        'features',
+        'mel',
+        'spectrogram',
+        'w2v2fb',
+        'w2v2fc'
+    ]:
+        return importlib.import_module(f'.{name}', __name__)
+
+    # Import Charsiu models from Git submodule
+    if name == 'charsiu_models':
+        try:
+            charsiu_spec = importlib.util.spec_from_file_location(
+                'charsiu_models',
+                Path(__file__).parent / 'charsiu' / 'src' / 'models.py')
+            charsiu_models = importlib.util.module_from_spec(charsiu_spec)
+            charsiu_spec.loader.exec_module(charsiu_models)
+        except (FileNotFoundError, ImportError, ModuleNotFoundError):
+            # Continue without Charsiu
+            pass
+        else:
+            globals()['charsiu_models'] = charsiu_models
+            return charsiu_models
+
+    raise AttributeError(f'module {__name__} has no attribute {name}')
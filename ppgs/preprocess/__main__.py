@@ -34,6 +34,10 @@ def parse_args():
     parser.add_argument(
         '--partition',
         help='The partition to preprocess. Uses all partitions by default.')
+    parser.add_argument(
+        '--shards',
+        action='store_true',
+        help='Write features to a sharded container instead of many files')
     return parser.parse_args()
 
 
@@ -36,14 +36,7 @@ def from_audios(
         device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
         # Cache model
-        if not hasattr(from_audios, 'model'):
-            conformer_checkpoint_file = hf_hub_download(
-                repo_id='CameronChurchwell/ppg_conformer_model',
-                filename='24epoch.pth')
-            from_audios.model = ppgs.preprocess.bottleneck.conformer_ppg_model.build_ppg_model.load_ppg_model(
-                config,
-                conformer_checkpoint_file,
-                device)
+        conformer = model(config, device)
 
         # Maybe resample
         audio = ppgs.resample(audio, sample_rate, SAMPLE_RATE)
@@ -56,8 +49,8 @@ def from_audios(
         audio = audio.squeeze(dim=1)
 
         # Infer Bottleneck PPGs
-        output = from_audios.model(audio, lengths).transpose(1, 2)
-        return output.to(torch.float16)
+        output = conformer(audio, lengths).transpose(1, 2)
+        return ppgs.precision.cast(output)
 
 
 def from_audio(
@@ -70,12 +63,7 @@ def from_audio(
         device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
         # Cache model
-        if not hasattr(from_audio, 'model'):
-            conformer_checkpoint_file = hf_hub_download(repo_id='CameronChurchwell/ppg_conformer_model', filename='24epoch.pth')
-            from_audio.model = ppgs.preprocess.bottleneck.conformer_ppg_model.build_ppg_model.load_ppg_model(
-                config,
-                conformer_checkpoint_file,
-                device)
+        conformer = model(config, device)
 
         # Maybe resample
         audio = ppgs.resample(audio, sample_rate, SAMPLE_RATE)
@@ -90,7 +78,7 @@ def from_audio(
 
         # Infer Bottleneck PPGs
         with torch.no_grad():
-            return from_audio.model(audio, length)[0].T
+            return conformer(audio, length)[0].T
 
 
 def from_file(audio_file, gpu=None):
@@ -112,3 +100,21 @@ def from_files_to_files(audio_files, output_files, gpu=None):
         total=len(audio_files)
     ):
         from_file_to_file(audio_file, output_file, gpu)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def model(config=CONFIG_FILE, device='cpu'):
+    """Load and cache the conformer bottleneck model"""
+    def load():
+        conformer_checkpoint_file = hf_hub_download(
+            repo_id='CameronChurchwell/ppg_conformer_model',
+            filename='24epoch.pth')
+        return ppgs.preprocess.bottleneck.conformer_ppg_model.build_ppg_model.load_ppg_model(
+            config,
+            conformer_checkpoint_file,
+            device)
+    return ppgs.registry.get(('bottleneck', str(config)), device, load)
@@ -1,6 +1,4 @@
 import contextlib
-import multiprocessing as mp
-import time
 
 import torch
 import torchutil
@@ -19,7 +17,8 @@ def datasets(
     representations=None,
     gpu=None,
     num_workers=0,
-    partition=None):
+    partition=None,
+    shards=False):
     """Preprocess a dataset
 
     Arguments
@@ -33,6 +32,10 @@ def datasets(
             The number of worker threads to use
         partition
             The partition to preprocess. Default (None) uses all partitions.
+        shards
+            If True, append features to a sharded container (see
+            ppgs.container) in the dataset cache instead of saving one file
+            per utterance and representation
     """
     if representations is None:
         representations = [ppgs.REPRESENTATION]
@@ -54,15 +57,51 @@ def datasets(
             # Empty partition
             continue
 
-        output = {
-            file: f'{file.parent}/{file.stem}' + '-{}.pt'
-            for _, _, files in dataloader for file in files}
-        from_dataloader(
-            dataloader,
-            representations,
-            output,
-            num_workers=(num_workers + 1) // 2,
-            gpu=gpu)
+        cache = dataloader.dataset.cache
+        with (
+            ppgs.container.Writer(cache / 'shards') if shards
+            else contextlib.nullcontext()
+        ) as container:
+
+            # Container keys are relative to the dataset cache
+            if container is None:
+                output = {
+                    file: f'{file.parent}/{file.stem}' + '-{}.pt'
+                    for _, _, files in dataloader for file in files}
+            else:
+                output = {
+                    file: str(file.with_suffix('').relative_to(cache)) +
+                    '-{}.pt'
+                    for file in dataloader.dataset.audio_files}
+
+                # Skip files whose features were indexed by a previous run
+                pending = [
+                    file for file, key in output.items()
+                    if not all(
+                        filename in container
+                        for filename in output_filenames(
+                            key,
+                            representations))]
+                if not pending:
+                    continue
+                if len(pending) < len(output):
+                    dataloader = ppgs.data.loader(
+                        pending,
+                        features=['audio', 'length', 'audio_file'],
+                        num_workers=num_workers // 2,
+                        max_frames=ppgs.MAX_PREPROCESS_FRAMES,
+                        lengths=dict(zip(
+                            dataloader.dataset.audio_files,
+                            dataloader.dataset.lengths)))
+                    output = {file: output[file] for file in pending}
+
+            from_dataloader(
+                dataloader,
+                representations,
+                output,
+                num_workers=(num_workers + 1) // 2,
+                gpu=gpu,
+                container=container)
 
 
 def from_files_to_files(
@@ -70,7 +109,8 @@ def from_files_to_files(
     output_files,
     representations=ppgs.REPRESENTATION,
     num_workers=0,
-    gpu=None):
+    gpu=None,
+    manifest_file=None):
     """Preprocess from files
 
     Arguments
@@ -84,19 +124,53 @@ def from_files_to_files(
             The number of worker threads to use
         gpu
             The gpu to use for preprocessing
+        manifest_file
+            Journal of completed outputs. If given, files whose outputs were
+            all completed by a previous run with the same journal are skipped.
     """
-    # Setup dataloader
-    dataloader = ppgs.data.loader(
-        audio_files,
-        features=['audio', 'length', 'audio_file'],
-        num_workers=num_workers//2,
-        max_frames=ppgs.MAX_PREPROCESS_FRAMES)
-    from_dataloader(
-        dataloader,
-        representations,
-        dict(zip(audio_files, output_files)),
-        num_workers=(num_workers+1)//2,
-        gpu=gpu)
+    if isinstance(representations, str):
+        representations = [representations]
+
+    with (
+        contextlib.nullcontext() if manifest_file is None
+        else ppgs.manifest.Manifest(manifest_file)
+    ) as manifest:
+
+        # Skip files completed by a previous run
+        if manifest is not None:
+            pending = [
+                (audio_file, output_file)
+                for audio_file, output_file in zip(audio_files, output_files)
+                if not all(
+                    manifest.complete(filename)
+                    for filename in output_filenames(
+                        output_file,
+                        representations))]
+            if not pending:
+                return
+            audio_files, output_files = map(list, zip(*pending))
+
+        # Setup dataloader
+        dataloader = ppgs.data.loader(
+            audio_files,
+            features=['audio', 'length', 'audio_file'],
+            num_workers=num_workers//2,
+            max_frames=ppgs.MAX_PREPROCESS_FRAMES,
+            lengths=None if manifest is None else manifest.lengths)
+
+        # Save lengths so that a restart does not recompute them
+        if manifest is not None:
+            manifest.record_lengths(dict(zip(
+                dataloader.dataset.audio_files,
+                dataloader.dataset.lengths)))
+
+        from_dataloader(
+            dataloader,
+            representations,
+            dict(zip(audio_files, output_files)),
+            num_workers=(num_workers+1)//2,
+            gpu=gpu,
+            manifest=manifest)
 
 
 ###############################################################################
@@ -104,9 +178,19 @@ def from_files_to_files(
 ###############################################################################
 
 
-def from_dataloader(loader, representations, output, num_workers=0, gpu=None):
+def from_dataloader(
+    loader,
+    representations,
+    output,
+    num_workers=0,
+    gpu=None,
+    manifest=None,
+    container=None):
     """Preprocess from a dataloader
 
+    Feature extraction and saving run as pipelined stages of worker threads
+    joined by bounded queues (see ppgs.pipeline.run).
+
     Arguments
         loader
             A Pytorch DataLoader yielding batches of (audio, length, filename)
@@ -118,77 +202,82 @@ def from_dataloader(loader, representations, output, num_workers=0, gpu=None):
             The number of worker threads to use for async file saving
         gpu
             The gpu to use for preprocessing
+        manifest
+            Optional ppgs.manifest.Manifest in which to record saved outputs
+        container
+            Optional ppgs.container.Writer to append features to instead of
+            saving separate files. Output filenames are used as keys.
     """
     device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
-    # Setup multiprocessing
-    if num_workers == 0:
-        pool = contextlib.nullcontext()
-    else:
-        pool = mp.get_context('spawn').Pool(num_workers)
+    def preprocess(batch):
+        audios, lengths, audio_files = batch
 
-    try:
+        # Copy to device
+        audios = audios.to(device)
+        lengths = lengths.to(device)
+
+        # Get length in frames
+        frame_lengths = (lengths // ppgs.HOPSIZE).cpu()
 
-        with torch.inference_mode():
+        items = []
+        for representation in representations:
 
-            # Batch preprocess
-            for audios, lengths, audio_files in torchutil.iterator(
-                loader,
-                f'Preprocessing {", ".join(representations)} '
-                f'for {loader.dataset.metadata.name}',
-                total=len(loader)
+            # Preprocess
+            with torch.inference_mode(), ppgs.precision.autocast(device):
+                outputs = getattr(
+                    ppgs.preprocess,
+                    representation
+                ).from_audios(audios, lengths, gpu=gpu).cpu()
+
+            # Get output filenames
+            filenames = [
+                output_filenames(output[file], [representation])[0]
+                for file in audio_files]
+
+            items.append((outputs, audio_files, filenames, frame_lengths))
+
+        return items
+
+    def save(items):
+        for outputs, audio_files, filenames, frame_lengths in items:
+            for latent_output, audio_file, filename, new_length in zip(
+                outputs,
+                audio_files,
+                filenames,
+                frame_lengths
             ):
-                # Copy to device
-                audios = audios.to(device)
-                lengths = lengths.to(device)
-
-                for representation in representations:
-
-                    # Preprocess
-                    outputs = getattr(
-                        ppgs.preprocess,
-                        representation
-                    ).from_audios(audios, lengths, gpu=gpu).cpu()
-
-                    # Get length in frames
-                    frame_lengths = lengths // ppgs.HOPSIZE
-
-                    # Get output filenames
-                    filenames = []
-                    for file in audio_files:
-                        output_file = output[file]
-                        if '{}' in output_file:
-                            filenames.append(
-                                output_file.format(representation))
-                        else:
-                            filenames.append(output_file)
-
-                    if num_workers == 0:
-
-                        # Synchronous save
-                        for latent_output, filename, new_length in zip(
-                            outputs.cpu(),
-                            filenames,
-                            frame_lengths.cpu()
-                        ):
-                            save_masked(latent_output, filename, new_length)
-                    else:
-
-                        # Asynchronous save
-                        pool.starmap_async(
-                            save_masked,
-                            zip(outputs, filenames, frame_lengths.cpu()))
-
-                        # Wait if the queue is full
-                        while pool._taskqueue.qsize() > 256:
-                            time.sleep(1)
+                save_masked(
+                    latent_output,
+                    filename,
+                    new_length,
+                    container=container)
+
+                # Maybe mark as complete
+                if manifest is not None and container is None:
+                    manifest.record(audio_file, filename)
+        return 1
+
+    # Setup progress bar
+    progress = torchutil.iterator(
+        range(len(loader)),
+        f'Preprocessing {", ".join(representations)} '
+        f'for {loader.dataset.metadata.name}',
+        total=len(loader))
+
+    try:
+
+        # Batch preprocess
+        for count in ppgs.pipeline.run(
+            loader,
+            [(preprocess, 1), (save, num_workers)]
+        ):
+            progress.update(count)
 
     finally:
 
-        # Shutdown multiprocessing
-        if num_workers > 0:
-            pool.close()
-            pool.join()
+        # Close progress bar
+        progress.close()
 
 
 def from_audio(
@@ -204,7 +293,7 @@ def from_audio(
         representation = ppgs.REPRESENTATION
 
     # Compute representation
-    with torch.autocast('cuda' if gpu is not None else 'cpu'):
+    with ppgs.precision.autocast('cpu' if gpu is None else f'cuda:{gpu}'):
         features = getattr(ppgs.preprocess, representation).from_audio(
             audio,
             sample_rate=ppgs.SAMPLE_RATE,
@@ -216,6 +305,36 @@ def from_audio(
         return features
 
 
-def save_masked(tensor, file, length):
-    """Save masked tensor"""
-    torch.save(tensor[..., :length].clone(), file)
+def save_masked(tensor, file, length, encoding=None, container=None):
+    """Save masked tensor
+
+    Arguments
+        tensor
+            The tensor to save
+        file
+            The output file
+        length
+            The number of valid frames
+        encoding
+            Storage encoding. One of ppgs.encoding.ENCODINGS, or None to
+            save the tensor unchanged. Load with ppgs.load.ppg.
+        container
+            Optional ppgs.container.Writer to append the tensor to, with
+            file as the key, instead of saving a separate file
+    """
+    tensor = ppgs.encoding.encode(tensor[..., :length].clone(), encoding)
+    if container is None:
+        torch.save(tensor, file)
+    else:
+        container.write(file, tensor)
+
+
+def output_filenames(output_file, representations):
+    """Get the output filename of each representation
+
+    Output filenames containing '{}' are formatted with the representation.
+    """
+    output_file = str(output_file)
+    if '{}' in output_file:
+        return [output_file.format(r) for r in representations]
+    return [output_file] * len(representations)
@@ -16,19 +16,15 @@ def from_audios(audio, lengths, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
     expected_length = audio.shape[-1] // ppgs.HOPSIZE
 
     # Cache model
-    if not hasattr(from_audios, 'model'):
-        import dac
-        model_path = dac.utils.download(model_type='16khz')
-        from_audios.model = dac.DAC.load(model_path)
-        from_audios.model = from_audios.model.to(device)
+    model = ppgs.registry.get('dac', device, load_model)
 
-    with torch.autocast(device.type):
+    with ppgs.precision.autocast(device):
 
         audio = audio.to(device)
 
         # Encode
-        model_input = from_audios.model.preprocess(audio, sample_rate)
-        z, codes, latents, _, _ = from_audios.model.encode(model_input)
+        model_input = model.preprocess(audio, sample_rate)
+        z, codes, latents, _, _ = model.encode(model_input)
 
         # Upsample
         return torch.nn.functional.interpolate(
@@ -46,3 +42,14 @@ def from_audio(audio, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
         audio.shape[-1],
         sample_rate=sample_rate,
         gpu=gpu)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def load_model():
+    """Load the 16 kHz DAC model"""
+    import dac
+    return dac.DAC.load(dac.utils.download(model_type='16khz'))
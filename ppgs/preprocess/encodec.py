@@ -24,19 +24,16 @@ def from_audios(audio, lengths, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
         ).to(device)
 
     # Cache model
-    if not hasattr(from_audios, 'model'):
-        from encodec import EncodecModel
-        from_audios.model = EncodecModel.encodec_model_24khz()
-        from_audios.model.to(device)
+    model = ppgs.registry.get('encodec', device, load_model)
 
-    with torch.autocast(device.type):
+    with ppgs.precision.autocast(device):
 
         # Resample to 24khz
         audio = audio.to(device)
         audio = from_audios.resampler(audio)
 
         # Encode
-        output = from_audios.model.encode(audio)[0][0].to(torch.float32)
+        output = model.encode(audio)[0][0].to(torch.float32)
 
         # Upsample
         return torch.nn.functional.interpolate(
@@ -54,3 +51,14 @@ def from_audio(audio, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
         audio.shape[-1],
         sample_rate=sample_rate,
         gpu=gpu)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def load_model():
+    """Load the 24 kHz EnCodec model"""
+    from encodec import EncodecModel
+    return EncodecModel.encodec_model_24khz()
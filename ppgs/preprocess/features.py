@@ -0,0 +1,244 @@
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Reflection padding applied to each end of the audio before the STFT
+PADDING = (ppgs.NUM_FFT - ppgs.HOPSIZE) // 2
+
+# Number of consecutive mel channels that share one band of the mel basis
+BLOCK_SIZE = 8
+
+
+###############################################################################
+# Feature extraction
+###############################################################################
+
+
+def from_audios(audio, lengths=None, sample_rate=ppgs.SAMPLE_RATE):
+    """Compute log-mel spectrograms of a batch of audio
+
+    Items shorter than the batch are packed end to end into one signal, each
+    with its own reflection padding, so that the STFT is only computed on
+    valid samples and every item gets the frames it would get on its own.
+    Items of at most PADDING samples are followed by zeros before they are
+    reflected, as when the whole batch is padded, and items shorter than
+    ppgs.HOPSIZE samples have no frames.
+
+    Arguments
+        audio
+            Batch of audio
+            shape=(batch, 1, samples)
+        lengths
+            Number of valid samples of each item, or None if all are valid
+            shape=(batch,)
+        sample_rate
+            Audio sampling rate
+
+    Returns
+        Log-mel spectrograms, with zeros after the last frame of each item
+        shape=(batch, ppgs.NUM_MELS, samples // ppgs.HOPSIZE)
+    """
+    samples = audio.shape[-1]
+    if lengths is None:
+        lengths = [samples] * audio.shape[0]
+    else:
+        lengths = torch.as_tensor(lengths).reshape(-1).expand(
+            audio.shape[0]).tolist()
+
+    # Compute all items at once if none are padded
+    if samples > PADDING and all(length == samples for length in lengths):
+        return from_padded(
+            torch.nn.functional.pad(
+                audio,
+                (PADDING, PADDING),
+                mode='reflect'),
+            sample_rate)
+
+    # Pack items at multiples of the hopsize so that frames of each item do
+    # not overlap its neighbors
+    segments, offsets, offset = [], [], 0
+    for item, length in zip(audio, lengths):
+
+        # Skip items without frames
+        if length < ppgs.HOPSIZE:
+            offsets.append(None)
+            continue
+
+        # Reflect each item on its own
+        segment = item[None, :, :length]
+        if length > PADDING:
+            segment = torch.nn.functional.pad(
+                segment,
+                (PADDING, PADDING),
+                mode='reflect')
+        else:
+            segment = torch.nn.functional.pad(
+                torch.nn.functional.pad(segment, (0, PADDING)),
+                (PADDING, 0),
+                mode='reflect')
+
+        segment = torch.nn.functional.pad(
+            segment,
+            (0, -segment.shape[-1] % ppgs.HOPSIZE))
+        segments.append(segment)
+        offsets.append(offset)
+        offset += segment.shape[-1] // ppgs.HOPSIZE
+
+    # Unpack
+    output = torch.zeros(
+        (audio.shape[0], ppgs.NUM_MELS, samples // ppgs.HOPSIZE),
+        dtype=ppgs.precision.dtype(audio.device),
+        device=audio.device)
+    if not segments:
+        return output
+    features = from_padded(torch.cat(segments, dim=-1), sample_rate)[0]
+    for i, (offset, length) in enumerate(zip(offsets, lengths)):
+        if offset is not None:
+            frames = length // ppgs.HOPSIZE
+            output[i, :, :frames] = features[:, offset:offset + frames]
+    return output
+
+
+def from_padded(audio, sample_rate=ppgs.SAMPLE_RATE, dtype=torch.float32):
+    """Compute log-mel spectrograms of audio that includes STFT padding
+
+    The STFT, magnitude, mel projection, and dynamic range compression run
+    in one pass in the given precision, updating intermediates in place.
+    Outputs are cast to the precision of ppgs.PRECISION for their device.
+
+    Arguments
+        audio
+            Padded audio
+            shape=(batch, 1, samples)
+        sample_rate
+            Audio sampling rate
+        dtype
+            Precision of the computation
+
+    Returns
+        Log-mel spectrograms
+        shape=(batch, ppgs.NUM_MELS, frames)
+    """
+    cached = engine(audio.device, dtype, sample_rate)
+    with torch.autocast(audio.device.type, enabled=False):
+
+        # Compute stft
+        stft = torch.stft(
+            audio.reshape(-1, audio.shape[-1]).to(dtype),
+            ppgs.NUM_FFT,
+            hop_length=ppgs.HOPSIZE,
+            window=cached.window,
+            center=False,
+            normalized=False,
+            onesided=True,
+            return_complex=True)
+
+        # Compute magnitude
+        magnitude = torch.view_as_real(stft).square_().sum(-1)
+        magnitude = magnitude.add_(1e-6).sqrt_()
+
+        # Convert to mels and apply dynamic range compression
+        melspectrogram = cached.mel(magnitude)
+        return ppgs.precision.cast(melspectrogram.clamp_(min=1e-5).log_())
+
+
+###############################################################################
+# Cache
+###############################################################################
+
+
+class Engine:
+    """Window and mel basis for one device, precision, and sample rate
+
+    The mel basis is stored as bands of BLOCK_SIZE mel channels, each
+    restricted to the frequency bins where its filters are nonzero, so the
+    mel projection skips the zeros of the basis.
+
+    Arguments
+        device
+            The device of the cached tensors
+        dtype
+            The precision of the cached tensors
+        sample_rate
+            Audio sampling rate
+    """
+
+    def __init__(self, device, dtype, sample_rate):
+        import librosa
+
+        self.window = torch.hann_window(
+            ppgs.WINDOW_SIZE,
+            dtype=dtype,
+            device=device)
+
+        # Create mel basis
+        self.basis = torch.from_numpy(
+            librosa.filters.mel(
+                sr=sample_rate,
+                n_fft=ppgs.NUM_FFT,
+                n_mels=ppgs.NUM_MELS)
+        ).to(device=device, dtype=dtype)
+
+        # Split mel basis into bands
+        self.bands = []
+        for start in range(0, ppgs.NUM_MELS, BLOCK_SIZE):
+            block = self.basis[start:start + BLOCK_SIZE]
+            nonzero = torch.nonzero(block.abs().sum(dim=0)).flatten()
+            if not len(nonzero):
+                continue
+            low, high = nonzero[0].item(), nonzero[-1].item() + 1
+            self.bands.append((
+                start,
+                low,
+                high,
+                block[:, low:high].contiguous()))
+
+    def mel(self, magnitude):
+        """Project magnitude spectrograms onto the mel basis
+
+        Arguments
+            magnitude
+                Magnitude spectrograms
+                shape=(batch, ppgs.NUM_FFT // 2 + 1, frames)
+
+        Returns
+            Mel spectrograms
+            shape=(batch, ppgs.NUM_MELS, frames)
+        """
+        output = torch.zeros(
+            (magnitude.shape[0], ppgs.NUM_MELS, magnitude.shape[-1]),
+            dtype=magnitude.dtype,
+            device=magnitude.device)
+        for start, low, high, weights in self.bands:
+            output[:, start:start + len(weights)] = torch.matmul(
+                weights,
+                magnitude[:, low:high])
+        return output
+
+
+def engine(device, dtype=torch.float32, sample_rate=ppgs.SAMPLE_RATE):
+    """Get the cached feature extraction engine
+
+    Arguments
+        device
+            The device of the cached tensors
+        dtype
+            The precision of the cached tensors
+        sample_rate
+            Audio sampling rate
+
+    Returns
+        ppgs.preprocess.features.Engine
+    """
+    if not hasattr(engine, 'cache'):
+        engine.cache = {}
+    key = (torch.device(device), dtype, sample_rate)
+    if key not in engine.cache:
+        engine.cache[key] = Engine(*key)
+    return engine.cache[key]
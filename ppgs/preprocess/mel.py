@@ -13,14 +13,14 @@ import ppgs
 
 def from_audios(audio, lengths, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
     device = f'cuda:{gpu}' if gpu is not None else 'cpu'
-    audio = audio.to(device)
-    spec = ppgs.preprocess.spectrogram.from_audios(audio, lengths)
-    melspec = linear_to_mel(spec)
-    return melspec.to(torch.float16)
+    return ppgs.preprocess.features.from_audios(
+        audio.to(device),
+        lengths,
+        sample_rate)
 
 
 def from_audio(audio, sample_rate=ppgs.SAMPLE_RATE, gpu=None):
-    with torch.autocast('cuda' if gpu is not None else 'cpu'):
+    with ppgs.precision.autocast('cpu' if gpu is None else f'cuda:{gpu}'):
         if audio.dim() == 2:
             audio = audio.unsqueeze(dim=0)
         return from_audios(
@@ -53,24 +53,15 @@ def from_files_to_files(audio_files, output_files):
 ###############################################################################
 
 
-def linear_to_mel(spectrogram):
-    import librosa
-
-    # Create mel basis
-    if not hasattr(linear_to_mel, 'mel_basis'):
-        basis = librosa.filters.mel(
-            sr=ppgs.SAMPLE_RATE,
-            n_fft=ppgs.NUM_FFT,
-            n_mels=ppgs.NUM_MELS)
-        basis = torch.from_numpy(basis)
-        basis = basis.to(spectrogram.device)
-        linear_to_mel.basis = basis
+def linear_to_mel(spectrogram, sample_rate=ppgs.SAMPLE_RATE):
+    # Get cached mel basis
+    basis = ppgs.preprocess.features.engine(
+        spectrogram.device,
+        sample_rate=sample_rate).basis
 
     # Convert to mels
     original_dtype = spectrogram.dtype
-    melspectrogram = torch.matmul(
-        linear_to_mel.basis,
-        spectrogram.to(torch.float))
+    melspectrogram = torch.matmul(basis, spectrogram.to(torch.float))
 
     # Apply dynamic range compression
     return torch.log(torch.clamp(melspectrogram, min=1e-5)).to(original_dtype)
@@ -12,18 +12,6 @@ import ppgs
 
 
 def from_audios(audio, lengths, gpu=None):
-    if (
-        not hasattr(from_audio, 'window') or
-        from_audio.dtype != audio.dtype or
-        from_audio.device != audio.device
-    ):
-        from_audio.window = torch.hann_window(
-            ppgs.WINDOW_SIZE,
-            dtype=audio.dtype,
-            device=audio.device)
-        from_audio.dtype = audio.dtype
-        from_audio.device = audio.device
-
     # Pad audio
     size = (ppgs.NUM_FFT - ppgs.HOPSIZE) // 2
     audio = torch.nn.functional.pad(
@@ -31,12 +19,22 @@ def from_audios(audio, lengths, gpu=None):
         (size, size),
         mode='reflect')
 
+    # Compute magnitude
+    return from_padded(audio)
+
+
+def from_padded(audio):
+    """Compute spectrogram from audio that already includes STFT padding"""
+    window = ppgs.preprocess.features.engine(
+        audio.device,
+        audio.dtype).window
+
     # Compute stft
     stft = torch.stft(
         audio.squeeze(1),
         ppgs.NUM_FFT,
         hop_length=ppgs.HOPSIZE,
-        window=from_audio.window,
+        window=window,
         center=False,
         normalized=False,
         onesided=True,
@@ -46,8 +44,7 @@ def from_audios(audio, lengths, gpu=None):
     # Compute magnitude
     spectrogram = torch.sqrt(stft.pow(2).sum(-1) + 1e-6)
 
-    # Maybe convert to mels
-    return spectrogram.to(torch.float16)
+    return ppgs.precision.cast(spectrogram)
 
 
 def from_audio(audio, sample_rate, gpu=None):
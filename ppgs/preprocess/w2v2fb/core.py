@@ -41,10 +41,10 @@ def from_audios(
         device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
         # Cache model
-        if not hasattr(from_audios, 'model') or from_audios.device != device:
-            from_audios.model = transformers.Wav2Vec2Model.from_pretrained(
-                config).to(device)
-            from_audios.device = device
+        model = ppgs.registry.get(
+            ('w2v2fb', config),
+            device,
+            lambda: transformers.Wav2Vec2Model.from_pretrained(config))
 
         # Maybe resample
         audio = ppgs.resample(audio, sample_rate, SAMPLE_RATE).to(device)
@@ -63,7 +63,7 @@ def from_audios(
         mask = ppgs.model.transformer.mask_from_lengths(
             lengths, pad
         ).squeeze(dim=1).to(torch.long).to(audio.device)
-        output = from_audios.model(padded_audio, mask).last_hidden_state
+        output = model(padded_audio, mask).last_hidden_state
         output = torch.transpose(output, 1, 2)
 
         # Upsample
@@ -72,7 +72,7 @@ def from_audios(
             size=audio.shape[-1] // ppgs.HOPSIZE,
             mode='nearest')
 
-        return upsampled_outputs.to(torch.float16)
+        return ppgs.precision.cast(upsampled_outputs)
 
 def from_audio(
     audio: torch.Tensor,
@@ -101,7 +101,7 @@ def from_file(audio_file, gpu=None):
 
 def from_file_to_file(audio_file, output_file, gpu=None):
     """Compute W2V2FB latents from audio file and save to disk"""
-    ppg = from_file(audio_file, gpu).to(torch.float16)
+    ppg = ppgs.precision.cast(from_file(audio_file, gpu))
     torch.save(ppg, output_file)
 
 
@@ -40,9 +40,10 @@ def from_audios(
         device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
         # Cache model
-        if not hasattr(from_audio, 'model'):
-            from_audio.model = transformers.Wav2Vec2Model.from_pretrained(
-                config).to(device)
+        model = ppgs.registry.get(
+            ('w2v2fc', config),
+            device,
+            lambda: transformers.Wav2Vec2Model.from_pretrained(config))
 
         # Maybe resample
         audio = ppgs.resample(audio, sample_rate, SAMPLE_RATE).to(device)
@@ -56,9 +57,9 @@ def from_audios(
         mask = ppgs.model.transformer.mask_from_lengths(
             lengths
         ).squeeze(dim=1).to(torch.long).to(audio.device)
-        output = from_audio.model(padded_audio, mask).last_hidden_state
+        output = model(padded_audio, mask).last_hidden_state
         output = torch.transpose(output, 1, 2)
-        return output.to(torch.float16)
+        return ppgs.precision.cast(output)
 
 
 def from_audio(
@@ -72,9 +73,10 @@ def from_audio(
         device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
 
         # Cache model
-        if not hasattr(from_audio, 'model'):
-            from_audio.model = transformers.Wav2Vec2Model.from_pretrained(
-                config).to(device)
+        model = ppgs.registry.get(
+            ('w2v2fc', config),
+            device,
+            lambda: transformers.Wav2Vec2Model.from_pretrained(config))
 
         # Maybe resample
         audio = ppgs.resample(audio, sample_rate, SAMPLE_RATE).squeeze()
@@ -86,7 +88,7 @@ def from_audio(
 
         # Infer W2V2FC latents
         with torch.no_grad():
-            return from_audio.model(inputs).last_hidden_state.squeeze().T
+            return model(inputs).last_hidden_state.squeeze().T
 
 
 def from_file(audio_file, gpu=None):
@@ -96,7 +98,7 @@ def from_file(audio_file, gpu=None):
 
 def from_file_to_file(audio_file, output_file, gpu=None):
     """Compute W2V2FC latents from audio file and save to disk"""
-    ppg = from_file(audio_file, gpu).to(torch.float16)
+    ppg = ppgs.precision.cast(from_file(audio_file, gpu))
     torch.save(ppg, output_file)
 
 
@@ -55,7 +55,7 @@ def from_file(audio_file, gpu=None):
 
 def from_file_to_file(audio_file, output_file, gpu=None):
     """Compute audio tensors from file and save to file"""
-    ppg = from_file(audio_file, gpu).to(torch.float16)
+    ppg = ppgs.precision.cast(from_file(audio_file, gpu))
     torch.save(ppg, output_file)
 
 
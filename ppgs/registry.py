@@ -0,0 +1,133 @@
+import collections
+import threading
+from typing import Any, Callable, Hashable, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Model registry
+###############################################################################
+
+
+class Registry:
+    """Thread-safe, memory-bounded LRU cache of loaded models
+
+    Models are stored per device. When the total size of the cached models
+    exceeds the memory budget, least-recently-used models are evicted. The
+    most recently used model is never evicted, so a single model larger than
+    the budget can still be used.
+
+    Arguments
+        max_bytes
+            Memory budget in bytes. Defaults to ppgs.MAX_MODEL_CACHE_BYTES.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.loading = {}
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def clear(self):
+        """Remove all cached models"""
+        with self.lock:
+            self.entries.clear()
+
+    def get(
+        self,
+        name: Hashable,
+        device: Union[str, torch.device],
+        load_fn: Callable[[], Any]
+    ) -> Any:
+        """Retrieve a cached model, loading it if necessary
+
+        Arguments
+            name
+                Identifies the model independent of device
+                (e.g., representation and checkpoint)
+            device
+                The device to place the model on
+            load_fn
+                Loads a new copy of the model onto the CPU or the device
+
+        Returns
+            The cached model on the requested device
+        """
+        key = (name, str(torch.device(device)))
+
+        # Fast path for cache hits
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            key_lock = self.loading.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it
+        with key_lock:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key][0]
+
+            # Load
+            model = load_fn()
+            # Cached models stay in evaluation mode so that threads sharing
+            # them never observe another thread's training flag
+            if isinstance(model, torch.nn.Module):
+                model = model.to(device).eval()
+
+            # Cache
+            with self.lock:
+                self.entries[key] = (model, size(model))
+                self.loading.pop(key, None)
+                self.evict()
+
+        return model
+
+    def nbytes(self):
+        """Total size in bytes of all cached models"""
+        with self.lock:
+            return sum(entry[1] for entry in self.entries.values())
+
+    def evict(self):
+        """Evict least-recently-used models until within budget"""
+        max_bytes = (
+            ppgs.MAX_MODEL_CACHE_BYTES if self.max_bytes is None
+            else self.max_bytes)
+        total = sum(entry[1] for entry in self.entries.values())
+        while total > max_bytes and len(self.entries) > 1:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            total -= nbytes
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def get(name, device, load_fn):
+    """Retrieve a model from the default registry"""
+    return models.get(name, device, load_fn)
+
+
+def size(model):
+    """Size in bytes of the parameters and buffers of a model"""
+    if not isinstance(model, torch.nn.Module):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+# Default registry used by inference and preprocessing
+models = Registry()
@@ -0,0 +1,195 @@
+import multiprocessing as mp
+import os
+import queue
+import traceback
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Multi-replica inference
+###############################################################################
+
+
+class Pool:
+    """Long-lived inference processes that each hold one copy of the model
+
+    Each replica is a spawned process with its own intra-op thread pool that
+    extracts features and infers PPGs for the batches it is sent. Models are
+    loaded on the first batch and stay resident for the life of the pool.
+    Calling the pool from several threads (e.g., one ppgs.pipeline stage
+    worker per replica) keeps every replica busy.
+
+    Arguments
+        replicas
+            Number of replica processes
+        threads
+            Number of intra-op threads per replica.
+            Defaults to the number of CPUs divided by the number of replicas.
+        representation
+            The representation to use for inference
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        legacy_mode
+            Use legacy (unchunked) inference
+        quantize
+            Optional int8 quantization mode
+    """
+
+    def __init__(
+        self,
+        replicas: int,
+        threads: Optional[int] = None,
+        representation: str = ppgs.REPRESENTATION,
+        checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+        gpu: Optional[int] = None,
+        legacy_mode: bool = False,
+        quantize: Optional[str] = None
+    ):
+        if threads is None:
+            threads = max(1, os.cpu_count() // replicas)
+        self.threads = threads
+
+        # Start replicas
+        context = mp.get_context('spawn')
+        self.replicas = []
+        for _ in range(replicas):
+            connection, child = context.Pipe()
+            process = context.Process(
+                target=worker,
+                args=(
+                    child,
+                    threads,
+                    representation,
+                    checkpoint,
+                    gpu,
+                    legacy_mode,
+                    quantize),
+                daemon=True)
+            process.start()
+            child.close()
+            self.replicas.append((process, connection))
+
+        # Replicas that are not processing a batch
+        self.idle = queue.Queue()
+        for replica in self.replicas:
+            self.idle.put(replica)
+
+    def __call__(self, audios, lengths):
+        """Infer PPGs on the next idle replica
+
+        Arguments
+            audios
+                Batched audio
+                shape=(batch, 1, samples)
+            lengths
+                Lengths of each audio in samples
+                shape=(batch,)
+
+        Returns
+            ppgs
+                Phonetic posteriorgrams
+                shape=(batch, len(ppgs.PHONEMES), frames)
+        """
+        replica = self.idle.get()
+        _, connection = replica
+        try:
+            connection.send((audios, lengths))
+            status, value = connection.recv()
+        except (EOFError, OSError) as error:
+            raise RuntimeError('Inference replica exited unexpectedly') \
+                from error
+        finally:
+            self.idle.put(replica)
+        if status == 'error':
+            raise RuntimeError(f'Inference replica failed:\n{value}')
+        return value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self.replicas)
+
+    def close(self):
+        """Stop all replicas"""
+        for process, connection in self.replicas:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process, _ in self.replicas:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.replicas = []
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def worker(
+    connection,
+    threads,
+    representation,
+    checkpoint,
+    gpu,
+    legacy_mode,
+    quantize):
+    """Replica process loop"""
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    while True:
+        try:
+            item = connection.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        audios, lengths = item
+
+        try:
+
+            # Preprocess
+            if representation == 'wav':
+                features = audios
+                feature_lengths = lengths
+            else:
+                with torch.inference_mode():
+                    features = getattr(
+                        ppgs.preprocess,
+                        representation
+                    ).from_audios(audios, lengths, gpu=gpu)
+                feature_lengths = lengths // ppgs.HOPSIZE
+
+            # Infer
+            result = ppgs.from_features(
+                features=features,
+                lengths=feature_lengths,
+                representation=representation,
+                checkpoint=checkpoint,
+                gpu=gpu,
+                legacy_mode=legacy_mode,
+                quantize=quantize)
+
+            connection.send(('ok', result.cpu()))
+
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+
+    connection.close()
@@ -0,0 +1,2 @@
+from .core import *
+from .client import Client
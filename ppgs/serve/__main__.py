@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import yapecs
+
+import ppgs
+
+
+###############################################################################
+# Inference server
+###############################################################################
+
+
+def parse_args():
+    """Parse command-line arguments"""
+    parser = yapecs.ArgumentParser(
+        description='Serve PPG inference over HTTP with micro-batching')
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='The host to listen on')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=ppgs.SERVE_PORT,
+        help='The port to listen on')
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        help='Unix socket path to listen on instead of a port')
+    parser.add_argument(
+        '--representation',
+        type=str,
+        default=ppgs.REPRESENTATION,
+        help='Representation to use for inference')
+    parser.add_argument(
+        '--checkpoint',
+        type=Path,
+        help='The checkpoint file')
+    parser.add_argument(
+        '--gpu',
+        type=int,
+        help='The index of the GPU to use for inference. Defaults to CPU.')
+    parser.add_argument(
+        '--max_frames',
+        type=int,
+        default=ppgs.SERVE_MAX_FRAMES,
+        help='Maximum number of padded frames in a batch')
+    parser.add_argument(
+        '--max_wait',
+        type=float,
+        default=ppgs.SERVE_MAX_WAIT,
+        help='Maximum seconds a request waits for a batch to fill')
+    parser.add_argument(
+        '--quantize',
+        choices=ppgs.model.quantization.QUANTIZATIONS,
+        help='Int8 quantization mode for CPU inference')
+    return parser.parse_args()
+
+
+ppgs.serve.run(**vars(parse_args()))
@@ -0,0 +1,121 @@
+import http.client
+import json
+import os
+import socket as sockets
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Inference client
+###############################################################################
+
+
+class Client:
+    """Blocking client of a ppgs.serve.Server
+
+    Each client holds one keep-alive connection. Use one client per thread.
+
+    Arguments
+        host
+            The server host
+        port
+            The server port. Defaults to ppgs.SERVE_PORT.
+        socket
+            Optional Unix socket path of the server instead of a port
+        timeout
+            Seconds to wait for a response
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: Optional[int] = None,
+        socket: Optional[Union[str, bytes, os.PathLike]] = None,
+        timeout: float = 60.
+    ):
+        if socket is None:
+            self.connection = http.client.HTTPConnection(
+                host,
+                ppgs.SERVE_PORT if port is None else port,
+                timeout=timeout)
+        else:
+            self.connection = UnixConnection(socket, timeout=timeout)
+
+    def __call__(
+        self,
+        audio: torch.Tensor,
+        sample_rate: int = ppgs.SAMPLE_RATE
+    ) -> torch.Tensor:
+        """Infer the PPG of mono audio
+
+        Arguments
+            audio
+                Mono audio
+                shape=(samples,) or (1, samples) or (1, 1, samples)
+            sample_rate
+                Audio sampling rate
+
+        Returns
+            ppgs
+                Phonetic posteriorgram
+                shape=(len(ppgs.PHONEMES), frames)
+        """
+        body = audio.reshape(-1).to(torch.float32).contiguous().numpy()
+        response = self.request(
+            'POST',
+            '/ppgs',
+            body.tobytes(),
+            {
+                'Content-Type': 'application/octet-stream',
+                'X-Sample-Rate': str(int(sample_rate))})
+        shape = [
+            int(size) for size in response.getheader('X-Shape').split(',')]
+        return torch.frombuffer(
+            bytearray(response.read()),
+            dtype=torch.float32).reshape(shape)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Close the connection"""
+        self.connection.close()
+
+    def metrics(self) -> dict:
+        """Get server metrics"""
+        return json.loads(self.request('GET', '/metrics').read())
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request and check the response status"""
+        self.connection.request(method, path, body, headers or {})
+        response = self.connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(
+                f'Server returned {response.status}: '
+                f'{response.read().decode()}')
+        return response
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+class UnixConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket"""
+
+    def __init__(self, path, timeout=60.):
+        super().__init__('localhost', timeout=timeout)
+        self.path = str(path)
+
+    def connect(self):
+        self.sock = sockets.socket(sockets.AF_UNIX, sockets.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
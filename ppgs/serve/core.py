@@ -0,0 +1,432 @@
+import asyncio
+import collections
+import concurrent.futures
+import json
+import math
+import os
+import threading
+import time
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Inference server
+###############################################################################
+
+
+class Server:
+    """Inference server that coalesces concurrent requests into batches
+
+    Requests wait at most max_wait seconds for other requests to arrive, and
+    are batched until the padded batch would exceed max_frames frames.
+    Batches are inferred one at a time on a dedicated thread, so the event
+    loop keeps accepting requests during inference. The model stays resident
+    in the model registry for the life of the server.
+
+    Arguments
+        representation
+            The representation to use for inference
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        max_frames
+            Maximum number of padded frames in a batch.
+            Defaults to ppgs.SERVE_MAX_FRAMES.
+        max_wait
+            Maximum seconds a request waits for a batch to fill.
+            Defaults to ppgs.SERVE_MAX_WAIT.
+        quantize
+            Optional int8 quantization mode for CPU inference
+    """
+
+    def __init__(
+        self,
+        representation: str = ppgs.REPRESENTATION,
+        checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+        gpu: Optional[int] = None,
+        max_frames: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        quantize: Optional[str] = None
+    ):
+        self.representation = representation
+        self.checkpoint = checkpoint
+        self.gpu = gpu
+        self.device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+        self.max_frames = (
+            ppgs.SERVE_MAX_FRAMES if max_frames is None else max_frames)
+        self.max_wait = ppgs.SERVE_MAX_WAIT if max_wait is None else max_wait
+        self.quantize = quantize
+
+        # Inference runs on one thread outside of the event loop
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+
+        # Request that did not fit in the previous batch
+        self.pending = None
+
+        # Metrics
+        self.batch_sizes = collections.Counter()
+        self.latencies = collections.deque(maxlen=ppgs.SERVE_LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+
+        # Set once the server accepts connections
+        self.started = threading.Event()
+        self.address = None
+
+    async def __call__(self, audio, sample_rate=ppgs.SAMPLE_RATE):
+        """Infer the PPG of one request
+
+        Arguments
+            audio
+                Mono audio
+                shape=(samples,)
+            sample_rate
+                Audio sampling rate
+
+        Returns
+            ppgs
+                Phonetic posteriorgram
+                shape=(len(ppgs.PHONEMES), frames)
+
+        Raises
+            ValueError
+                If the audio is not mono or is shorter than one frame
+        """
+        validate(audio, sample_rate)
+        start = time.perf_counter()
+        request = Request(
+            audio,
+            sample_rate,
+            asyncio.get_running_loop().create_future())
+        await self.queue.put(request)
+        try:
+            return await request.future
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def batch(self):
+        """Collect the next batch of requests"""
+        loop = asyncio.get_running_loop()
+
+        # Wait for a first request
+        if self.pending is None:
+            batch = [await self.queue.get()]
+        else:
+            batch, self.pending = [self.pending], None
+        longest = batch[0].frames
+
+        # Wait for more requests until the batch is full or times out
+        deadline = loop.time() + self.max_wait
+        while True:
+            timeout = deadline - loop.time()
+            try:
+                if self.queue.empty() and timeout <= 0:
+                    break
+                request = (
+                    self.queue.get_nowait() if not self.queue.empty()
+                    else await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            if (len(batch) + 1) * max(longest, request.frames) > \
+                    self.max_frames:
+                self.pending = request
+                break
+            batch.append(request)
+            longest = max(longest, request.frames)
+
+        return batch
+
+    async def batcher(self):
+        """Infer batches of requests until cancelled"""
+        while True:
+            batch = await self.batch()
+            self.batch_sizes[len(batch)] += 1
+            await self.resolve(batch)
+
+    async def resolve(self, batch):
+        """Infer a batch of requests and set their results
+
+        If a batch fails, each of its requests is retried on its own, so
+        that one failing request does not fail the others.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                self.infer,
+                [(request.audio, request.sample_rate) for request in batch])
+        except Exception as error:
+            if len(batch) > 1:
+                for request in batch:
+                    await self.resolve([request])
+                return
+            self.errors += 1
+            if not batch[0].future.done():
+                batch[0].future.set_exception(error)
+        else:
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    def infer(self, items):
+        """Infer PPGs of a batch of (audio, sample_rate)"""
+        # Resample and pad
+        audios = [
+            ppgs.resample(audio[None], sample_rate)[0]
+            for audio, sample_rate in items]
+        lengths = torch.tensor(
+            [audio.shape[-1] for audio in audios],
+            dtype=torch.long)
+        padded = torch.zeros((len(audios), 1, int(lengths.max())))
+        for i, audio in enumerate(audios):
+            padded[i, 0, :audio.shape[-1]] = audio
+
+        # Preprocess
+        if self.representation == 'wav':
+            features = padded
+            frame_lengths = lengths
+        else:
+            with torch.inference_mode():
+                features = getattr(
+                    ppgs.preprocess,
+                    self.representation
+                ).from_audios(
+                    padded.to(self.device),
+                    lengths.to(self.device),
+                    gpu=self.gpu)
+            frame_lengths = lengths // ppgs.HOPSIZE
+
+        # Infer
+        ppg = ppgs.from_features(
+            features,
+            frame_lengths,
+            representation=self.representation,
+            checkpoint=self.checkpoint,
+            gpu=self.gpu,
+            quantize=self.quantize).cpu()
+
+        return [
+            ppg[i, :, :length]
+            for i, length in enumerate(frame_lengths.tolist())]
+
+    def metrics(self):
+        """Get queue depth, batch-size histogram, and latency percentiles"""
+        latencies = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue.qsize() + (self.pending is not None),
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': sum(self.batch_sizes.values()),
+            'batch_sizes': {
+                str(size): count
+                for size, count in sorted(self.batch_sizes.items())},
+            'latency': {
+                f'p{int(100 * q)}': percentile(latencies, q)
+                for q in (.5, .9, .99)}}
+
+    async def serve(self, host='127.0.0.1', port=None, socket=None):
+        """Accept HTTP requests until cancelled
+
+        Arguments
+            host
+                The host to listen on
+            port
+                The port to listen on. Defaults to ppgs.SERVE_PORT.
+            socket
+                Optional Unix socket path to listen on instead of a port
+        """
+        self.queue = asyncio.Queue()
+
+        # Load the model before accepting requests
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor,
+            self.infer,
+            [(torch.zeros(ppgs.SAMPLE_RATE), ppgs.SAMPLE_RATE)])
+
+        # Start server
+        if socket is None:
+            server = await asyncio.start_server(
+                self.handle,
+                host,
+                ppgs.SERVE_PORT if port is None else port)
+        else:
+            server = await asyncio.start_unix_server(self.handle, socket)
+        self.address = server.sockets[0].getsockname()
+        self.started.set()
+
+        batcher = asyncio.create_task(self.batcher())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(wait=False)
+
+    ###########################################################################
+    # HTTP
+    ###########################################################################
+
+    async def handle(self, reader, writer):
+        """Handle the requests of one HTTP connection"""
+        try:
+            while True:
+
+                # Parse request
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, value = line.decode('latin-1').split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(
+                    int(headers.get('content-length', 0)))
+
+                # Respond
+                status, content_type, response, extra = await self.route(
+                    method,
+                    path,
+                    headers,
+                    body)
+                head = [
+                    f'HTTP/1.1 {status}',
+                    f'Content-Type: {content_type}',
+                    f'Content-Length: {len(response)}']
+                head += [f'{name}: {value}' for name, value in extra.items()]
+                writer.write(
+                    ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') +
+                    response)
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def route(self, method, path, headers, body):
+        """Get (status, content type, body, extra headers) of a request"""
+        if method == 'GET' and path == '/metrics':
+            return (
+                '200 OK',
+                'application/json',
+                json.dumps(self.metrics()).encode(),
+                {})
+
+        if method == 'POST' and path == '/ppgs':
+            self.requests += 1
+
+            # Reject malformed requests before they are batched with others
+            try:
+                sample_rate = int(
+                    headers.get('x-sample-rate', ppgs.SAMPLE_RATE))
+                if len(body) % 4:
+                    raise ValueError('Audio must be float32 samples')
+                audio = torch.frombuffer(bytearray(body), dtype=torch.float32) \
+                    if body else torch.zeros(0)
+                validate(audio, sample_rate)
+            except ValueError as error:
+                self.errors += 1
+                return (
+                    '400 Bad Request',
+                    'application/json',
+                    json.dumps({'error': str(error)}).encode(),
+                    {})
+
+            try:
+                ppg = await self(audio, sample_rate)
+            except Exception as error:
+                return (
+                    '500 Internal Server Error',
+                    'application/json',
+                    json.dumps({'error': repr(error)}).encode(),
+                    {})
+            return (
+                '200 OK',
+                'application/octet-stream',
+                ppg.to(torch.float32).contiguous().numpy().tobytes(),
+                {'X-Shape': ','.join(str(size) for size in ppg.shape)})
+
+        return (
+            '404 Not Found',
+            'application/json',
+            json.dumps({'error': f'{method} {path} not found'}).encode(),
+            {})
+
+
+def run(
+    host: str = '127.0.0.1',
+    port: Optional[int] = None,
+    socket: Optional[Union[str, bytes, os.PathLike]] = None,
+    **kwargs):
+    """Run an inference server until interrupted
+
+    Arguments
+        host
+            The host to listen on
+        port
+            The port to listen on. Defaults to ppgs.SERVE_PORT.
+        socket
+            Optional Unix socket path to listen on instead of a port
+        kwargs
+            Arguments of ppgs.serve.Server
+    """
+    try:
+        asyncio.run(Server(**kwargs).serve(host, port, socket))
+    except KeyboardInterrupt:
+        pass
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+class Request:
+    """A request waiting to be batched"""
+
+    def __init__(self, audio, sample_rate, future):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.future = future
+
+        # Length in frames after resampling
+        self.frames = frames(audio.shape[-1], sample_rate)
+
+
+def frames(samples, sample_rate):
+    """Number of frames of audio after resampling to ppgs.SAMPLE_RATE"""
+    return math.ceil(samples * ppgs.SAMPLE_RATE / sample_rate) // ppgs.HOPSIZE
+
+
+def percentile(values, quantile):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(quantile * len(values)))]
+
+
+def validate(audio, sample_rate):
+    """Raise a ValueError if audio of a request cannot be inferred"""
+    if sample_rate <= 0:
+        raise ValueError(f'Sample rate {sample_rate} must be positive')
+    if audio.dim() != 1:
+        raise ValueError(f'Audio of shape {tuple(audio.shape)} is not mono')
+    if frames(audio.shape[-1], sample_rate) < 1:
+        raise ValueError(
+            f'Audio of {audio.shape[-1]} samples at {sample_rate} Hz is '
+            f'shorter than one frame ({ppgs.HOPSIZE} samples at '
+            f'{ppgs.SAMPLE_RATE} Hz)')
@@ -0,0 +1,360 @@
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Sparse phonetic posteriorgrams
+###############################################################################
+
+
+class SparsePPG:
+    """Phonetic posteriorgram that stores the k most probable phonemes
+
+    Storage and most operations scale with k instead of the number of
+    phonemes. ppgs.distance, ppgs.interpolate, ppgs.edit.reallocate,
+    ppgs.edit.swap, and ppgs.edit.grid.sample accept sparse PPGs directly.
+
+    Arguments
+        indices
+            Phoneme indices of each frame
+            shape=(..., k, frames)
+        values
+            Probabilities of each phoneme index
+            shape=(..., k, frames)
+        channels
+            Number of phonemes of the dense PPG.
+            Defaults to len(ppgs.PHONEMES).
+    """
+
+    def __init__(
+        self,
+        indices: torch.Tensor,
+        values: torch.Tensor,
+        channels: Optional[int] = None
+    ):
+        self.indices = indices.to(torch.long)
+        self.values = values
+        self.channels = len(ppgs.PHONEMES) if channels is None else channels
+
+    def __repr__(self):
+        return (
+            f'SparsePPG(k={self.k}, channels={self.channels}, '
+            f'frames={self.frames}, dtype={self.dtype}, device={self.device})')
+
+    @classmethod
+    def from_dense(cls, ppg: torch.Tensor, k: Optional[int] = None):
+        """Keep the k most probable phonemes of each frame of a dense PPG
+
+        Arguments
+            ppg
+                Dense PPG
+                shape=(..., len(ppgs.PHONEMES), frames)
+            k
+                Number of phonemes to keep. Defaults to ppgs.ENCODING_TOPK.
+        """
+        if k is None:
+            k = ppgs.ENCODING_TOPK
+        values, indices = ppg.topk(min(k, ppg.shape[-2]), dim=-2)
+        return cls(indices, values, ppg.shape[-2])
+
+    @property
+    def device(self):
+        return self.values.device
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def frames(self):
+        return self.values.shape[-1]
+
+    @property
+    def k(self):
+        return self.values.shape[-2]
+
+    @property
+    def shape(self):
+        return self.values.shape[:-2] + (self.channels, self.frames)
+
+    def clone(self):
+        return SparsePPG(
+            self.indices.clone(),
+            self.values.clone(),
+            self.channels)
+
+    def to(self, device=None, dtype=None):
+        return SparsePPG(
+            self.indices.to(device),
+            self.values.to(device=device, dtype=dtype),
+            self.channels)
+
+    def to_dense(self) -> torch.Tensor:
+        """Convert to a dense PPG
+
+        Returns
+            shape=(..., len(ppgs.PHONEMES), frames)
+        """
+        return self.values.new_zeros(self.shape).scatter_add_(
+            -2,
+            self.indices,
+            self.values)
+
+
+###############################################################################
+# Sparse operations
+###############################################################################
+
+
+def frame_distance(
+    ppgX: SparsePPG,
+    ppgY: SparsePPG,
+    normalize: bool = True,
+    exponent: float = ppgs.SIMILARITY_EXPONENT
+) -> torch.Tensor:
+    """Normalized Jenson-Shannon divergence of each frame of sparse PPGs
+
+    Matches ppgs.distance on the corresponding dense PPGs. Without
+    normalization, only phonemes kept by either PPG are compared. With
+    normalization, the projection through the similarity matrix is dense,
+    but only gathers the k columns of each frame.
+
+    Returns
+        shape=(..., frames)
+    """
+    if normalize:
+        return ppgs.frame_distance(
+            project(ppgX, exponent),
+            project(ppgY, exponent))
+
+    valuesX = ppgX.values.clamp(1e-8, 1 - 1e-8)
+    valuesY = ppgY.values.clamp(1e-8, 1 - 1e-8)
+
+    # Match phonemes of X and Y
+    # shape=(..., kX, kY, frames)
+    same = ppgX.indices[..., :, None, :] == ppgY.indices[..., None, :, :]
+
+    # Probabilities of Y at the phonemes of X
+    matchedY = torch.where(
+        same.any(dim=-2),
+        (same * valuesY[..., None, :, :]).sum(dim=-2),
+        1e-8)
+
+    # Phonemes of Y that X does not keep. Phonemes kept by both contribute
+    # zero here because both arguments are equal.
+    unmatchedX = torch.where(same.any(dim=-3), valuesY, 1e-8)
+
+    return (
+        ppgs.frame_distance(valuesX, matchedY) +
+        ppgs.frame_distance(unmatchedX, valuesY))
+
+
+def interpolate(
+    ppgX: SparsePPG,
+    ppgY: SparsePPG,
+    interp: Union[float, torch.Tensor],
+    k: Optional[int] = None
+) -> SparsePPG:
+    """Linear interpolation of sparse PPGs
+
+    By default, the result keeps every phoneme of either input, so it
+    matches interpolation of the dense PPGs and k grows to at most
+    ppgX.k + ppgY.k. Passing a smaller k is lossy: probability outside the
+    k most probable phonemes of each frame is dropped and the kept
+    probabilities are rescaled to preserve the total of each frame.
+
+    Arguments
+        ppgX
+            Input PPG X
+        ppgY
+            Input PPG Y
+        interp
+            Interpolation values
+            scalar float OR shape=(frames,)
+        k
+            Optional number of phonemes kept per frame
+
+    Returns
+        Interpolated PPG
+    """
+    indices, values = merge(
+        torch.cat((ppgX.indices, ppgY.indices), dim=-2),
+        torch.cat(
+            ((1. - interp) * ppgX.values, interp * ppgY.values),
+            dim=-2))
+    if k is None:
+        return SparsePPG(*compact(indices, values), ppgX.channels)
+
+    # Truncate and rescale
+    total = values.sum(dim=-2, keepdim=True)
+    indices, values = compact(indices, values, k)
+    kept = values.sum(dim=-2, keepdim=True)
+    values = values * torch.where(kept > 0, total / kept, 1.)
+    return SparsePPG(indices, values, ppgX.channels)
+
+
+def reallocate(
+    ppg: SparsePPG,
+    source: str,
+    target: str,
+    value: Optional[float] = None
+) -> SparsePPG:
+    """Reallocate probability from source phoneme to target phoneme
+
+    The target phoneme is added to frames that do not already keep it, so
+    k may grow by one.
+
+    Arguments
+        ppg
+            Input PPG
+        source
+            Source phoneme
+        target
+            Target phoneme
+        value
+            Max amount to reallocate. If None, reallocates all probability.
+
+    Returns
+        Edited PPG
+    """
+    source_index = ppgs.PHONEMES.index(source)
+    target_index = ppgs.PHONEMES.index(target)
+
+    # Remove from source
+    is_source = ppg.indices == source_index
+    amount = (ppg.values * is_source).sum(dim=-2, keepdim=True)
+    if value is not None:
+        amount = amount.clamp(max=value)
+    values = ppg.values - is_source * amount
+
+    # Add to target
+    indices, values = merge(
+        torch.cat(
+            (ppg.indices, torch.full_like(ppg.indices[..., :1, :], target_index)),
+            dim=-2),
+        torch.cat((values, amount), dim=-2))
+    return SparsePPG(*compact(indices, values), ppg.channels)
+
+
+def sample(ppg: SparsePPG, grid: torch.Tensor) -> SparsePPG:
+    """Grid-based sparse PPG interpolation
+
+    Matches ppgs.edit.grid.sample on the dense PPG. Frames interpolated
+    between two frames keep the phonemes of both, so k may double.
+
+    Arguments
+        ppg
+            Input PPG
+        grid
+            Grid of desired length; each item is a float-valued index into ppg
+
+    Returns
+        Interpolated PPG
+    """
+    # Get interpolation residuals
+    interp = grid - torch.floor(grid)
+
+    # Get PPG indices, replicating the final frame
+    xp = torch.arange(ppg.frames, device=ppg.device)
+    i = torch.searchsorted(xp, grid, side='right')
+    previous = (i - 1).clamp(max=ppg.frames - 1)
+    i = i.clamp(max=ppg.frames - 1)
+
+    # Linear interpolation
+    return interpolate(
+        SparsePPG(
+            ppg.indices[..., previous],
+            ppg.values[..., previous],
+            ppg.channels),
+        SparsePPG(ppg.indices[..., i], ppg.values[..., i], ppg.channels),
+        interp.to(ppg.dtype))
+
+
+def swap(ppg: SparsePPG, phonemeA: str, phonemeB: str) -> SparsePPG:
+    """Swap the probabilities of two phonemes
+
+    Arguments
+        ppg
+            Input PPG
+        phonemeA
+            Input phoneme A
+        phonemeB
+            Input phoneme B
+
+    Returns
+        Edited PPG
+    """
+    indexA = ppgs.PHONEMES.index(phonemeA)
+    indexB = ppgs.PHONEMES.index(phonemeB)
+    indices = torch.where(
+        ppg.indices == indexA,
+        indexB,
+        torch.where(ppg.indices == indexB, indexA, ppg.indices))
+    return SparsePPG(indices, ppg.values.clone(), ppg.channels)
+
+
+###############################################################################
+# Utilities
+###############################################################################
+
+
+def compact(indices, values, k=None):
+    """Sort phonemes of each frame by probability and drop unused slots
+
+    Arguments
+        indices
+            shape=(..., slots, frames)
+        values
+            shape=(..., slots, frames)
+        k
+            Number of slots to keep. Defaults to the largest number of
+            nonzero probabilities in any frame.
+    """
+    values, order = values.sort(dim=-2, descending=True)
+    indices = indices.gather(-2, order)
+    if k is None:
+        k = max(1, int((values != 0).sum(dim=-2).max()))
+    return indices[..., :k, :], values[..., :k, :]
+
+
+def merge(indices, values):
+    """Sum the probabilities of repeated phonemes within each frame
+
+    The first slot of each phoneme holds the sum and repeats are zeroed.
+    """
+    slots = indices.shape[-2]
+
+    # shape=(..., slots, slots, frames)
+    same = indices[..., :, None, :] == indices[..., None, :, :]
+    earlier = torch.ones(
+        (slots, slots),
+        dtype=torch.bool,
+        device=indices.device).tril(-1)[..., None]
+    repeated = (same & earlier).any(dim=-2)
+    totals = (same * values[..., None, :, :]).sum(dim=-2)
+    return indices, torch.where(repeated, 0., totals)
+
+
+def project(ppg, exponent=ppgs.SIMILARITY_EXPONENT):
+    """Apply similarity based normalization to a sparse PPG
+
+    Matches ppgs.project on the dense PPG, including clamping of phonemes
+    that are not kept.
+
+    Returns
+        shape=(..., len(ppgs.PHONEMES), frames)
+    """
+    matrix = ppgs.similarity(exponent, ppg.dtype, ppg.device)
+
+    # Columns of the similarity matrix of each kept phoneme
+    # shape=(..., len(ppgs.PHONEMES), k, frames)
+    columns = matrix[:, ppg.indices].movedim(0, -3)
+
+    # Every phoneme is clamped to at least 1e-8
+    values = ppg.values.clamp(1e-8, 1 - 1e-8) - 1e-8
+    return (
+        1e-8 * matrix.sum(dim=1)[:, None] +
+        (columns * values[..., None, :, :]).sum(dim=-2))
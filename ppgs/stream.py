@@ -0,0 +1,232 @@
+import os
+from typing import Optional, Union
+
+import torch
+
+import ppgs
+
+
+###############################################################################
+# Constants
+###############################################################################
+
+
+# Reflection padding applied to each end of the audio before the STFT
+PADDING = (ppgs.NUM_FFT - ppgs.HOPSIZE) // 2
+
+
+###############################################################################
+# Streaming inference
+###############################################################################
+
+
+class Stream:
+    """Stateful, chunk-by-chunk PPG inference
+
+    Audio is pushed to the stream in arbitrarily-sized chunks. Each call
+    returns the PPG frames that no longer depend on future audio. The
+    unconsumed STFT window and a bounded window of past mel frames are kept
+    between calls, so each audio sample is transformed exactly once. Causal
+    transformers are inferred incrementally, caching the keys and values of
+    each layer and the context of each convolution, so each call only
+    infers new frames.
+
+    Arguments
+        checkpoint
+            The checkpoint file
+        gpu
+            The index of the GPU to use for inference
+        context
+            The number of past mel frames given to the model as left context,
+            or attended to by incremental inference
+        lookahead
+            The number of future mel frames that must be available before a
+            frame is emitted. Defaults to the receptive field of the
+            convolutions for causal models and ppgs.CHUNK_OVERLAP otherwise.
+            Incremental inference always uses the receptive field.
+        incremental
+            Whether to infer causal transformers incrementally
+    """
+
+    def __init__(
+        self,
+        checkpoint: Optional[Union[str, bytes, os.PathLike]] = None,
+        gpu: Optional[int] = None,
+        context: int = ppgs.CHUNK_LENGTH - 2 * ppgs.CHUNK_OVERLAP,
+        lookahead: Optional[int] = None,
+        incremental: bool = True
+    ):
+        if ppgs.REPRESENTATION != 'mel':
+            raise ValueError(
+                'Streaming inference is only supported for the mel '
+                f'representation, not {ppgs.REPRESENTATION}')
+        if lookahead is None:
+            if ppgs.IS_CAUSAL:
+                lookahead = 2 * (ppgs.KERNEL_SIZE // 2)
+            else:
+                lookahead = ppgs.CHUNK_OVERLAP
+        self.checkpoint = checkpoint
+        self.gpu = gpu
+        self.device = torch.device('cpu' if gpu is None else f'cuda:{gpu}')
+        self.context = context
+        self.lookahead = lookahead
+        self.incremental = incremental
+        self.reset()
+
+    def __call__(self, audio: torch.Tensor) -> torch.Tensor:
+        """Push a chunk of audio to the stream
+
+        Arguments
+            audio
+                Audio chunk at ppgs.SAMPLE_RATE
+                shape=(samples,) or (1, samples) or (1, 1, samples)
+
+        Returns
+            ppgs
+                Phonetic posteriorgram frames that are now final
+                shape=(len(ppgs.PHONEMES), frames)
+        """
+        self.audio = torch.cat(
+            (self.audio, audio.reshape(1, 1, -1).to(self.audio)),
+            dim=-1)
+
+        # Reflection padding requires more samples than the padding size
+        if not self.started:
+            if self.audio.shape[-1] <= PADDING:
+                return self.empty()
+            self.audio = torch.nn.functional.pad(
+                self.audio,
+                (PADDING, 0),
+                mode='reflect')
+            self.started = True
+
+        # Compute features from complete STFT windows
+        self.extract()
+
+        # Infer frames that are no longer affected by future audio
+        return self.infer(final=False)
+
+    def flush(self) -> torch.Tensor:
+        """Pad the end of the audio and return all remaining frames
+
+        Returns
+            ppgs
+                Remaining phonetic posteriorgram frames
+                shape=(len(ppgs.PHONEMES), frames)
+        """
+        if not self.started:
+            return self.empty()
+
+        # Pad the final STFT windows in the same way as ppgs.from_audio
+        self.audio = torch.nn.functional.pad(
+            self.audio,
+            (0, PADDING),
+            mode='reflect')
+        self.extract()
+        ppg = self.infer(final=True)
+
+        # Allow the stream to be reused
+        self.reset()
+
+        return ppg
+
+    def reset(self):
+        """Clear all streaming state"""
+        # Audio that has not yet been consumed by a full STFT window
+        self.audio = torch.zeros((1, 1, 0), device=self.device)
+
+        # Whether the start of the audio has been padded
+        self.started = False
+
+        # Mel frames kept for inference
+        self.features = torch.zeros(
+            (ppgs.NUM_MELS, 0),
+            dtype=ppgs.precision.dtype(self.device),
+            device=self.device)
+
+        # Absolute index of the first buffered mel frame
+        self.offset = 0
+
+        # Number of PPG frames returned so far
+        self.emitted = 0
+
+        # State of incremental inference
+        self.state = None
+
+    ###########################################################################
+    # Utilities
+    ###########################################################################
+
+    def empty(self):
+        """Create an empty PPG"""
+        return torch.zeros((len(ppgs.PHONEMES), 0), device=self.device)
+
+    def extract(self):
+        """Compute mel frames for every complete STFT window"""
+        frames = (self.audio.shape[-1] - ppgs.NUM_FFT) // ppgs.HOPSIZE + 1
+        if frames <= 0:
+            return
+
+        # Compute mels
+        used = (frames - 1) * ppgs.HOPSIZE + ppgs.NUM_FFT
+        features = ppgs.preprocess.features.from_padded(
+            self.audio[..., :used])
+
+        # Keep the overlap with the next window
+        self.audio = self.audio[..., frames * ppgs.HOPSIZE:]
+        self.features = torch.cat(
+            (self.features, features[0]),
+            dim=-1)
+
+    def infer(self, final):
+        """Infer PPG frames from the buffered mel frames"""
+        if self.incremental:
+            model = ppgs.cached_model(self.device, 'mel', self.checkpoint)
+            if (
+                isinstance(model, ppgs.model.Transformer) and
+                model.is_causal and
+                model.backend is None
+            ):
+                return self.step(model, final)
+
+        available = self.offset + self.features.shape[-1]
+        end = available if final else available - self.lookahead
+        if end <= self.emitted:
+            return self.empty()
+
+        # Infer from left context and all available lookahead
+        ppg = ppgs.from_features(
+            self.features[None],
+            torch.tensor([self.features.shape[-1]], dtype=torch.long),
+            representation='mel',
+            checkpoint=self.checkpoint,
+            gpu=self.gpu)[0]
+        ppg = ppg[:, self.emitted - self.offset:end - self.offset]
+        self.emitted = end
+
+        # Discard frames that are no longer needed as context
+        drop = max(0, self.emitted - self.context - self.offset)
+        self.features = self.features[:, drop:]
+        self.offset += drop
+
+        return ppg
+
+    def step(self, model, final):
+        """Infer PPG frames incrementally from the new mel frames"""
+        if self.state is None:
+            self.state = ppgs.model.transformer.State(self.context)
+
+        # Infer
+        with ppgs.precision.inference(model, self.device):
+            logits, self.state = model.incremental(
+                ppgs.precision.cast(self.features[None]),
+                self.state,
+                final)
+            ppg = torch.nn.functional.softmax(logits[0], dim=0)
+        self.emitted += ppg.shape[-1]
+
+        # Discard frames given to the model
+        self.offset += self.features.shape[-1]
+        self.features = self.features[:, :0]
+
+        return ppg
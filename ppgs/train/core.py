@@ -2,7 +2,6 @@ import functools
 import math
 
 # import accelerate
-import matplotlib
 import torch
 import torchutil
 
@@ -355,6 +354,7 @@ def evaluate(
             break
 
     # Write to tensorboard
+    import matplotlib.figure
     scalars, figures = {}, {}
     for key, val in metrics().items():
         if isinstance(val, matplotlib.figure.Figure):
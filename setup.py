@@ -13,6 +13,8 @@ setup(
     author_email='interactiveaudiolab@gmail.com',
     url='https://github.com/interactiveaudiolab/ppgs',
     extras_require={
+        'onnx': ['onnx', 'onnxruntime'],
+        'safetensors': ['safetensors'],
         'train': [
             'dac',
             'encodec',